@@ -1,11 +1,16 @@
-import os
-from asyncio import Semaphore
+import asyncio
+from typing import Any, AsyncIterator, Dict
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, responses
+from starlette.background import BackgroundTask
+from starlette.datastructures import State
 from starlette.requests import Request
 
 from app.api.schemas.output import Healthcheck
 from app.api.schemas.recommendations import (
+    BatchRecommendationRequest,
+    BatchRecommendationResult,
     RecommendationRequest,
     RecommendationResponse,
 )
@@ -14,25 +19,42 @@ from app.api.schemas.summarization import (
     SummarizationResponse,
 )
 from app.settings.settings import get_settings
-from app.core.services.llm.llm_factory import get_llm_client
+from app.core.event_handlers import init_app_state
+from app.core.services.admission import AdmissionRejected
+from app.core.services.batch import BatchRecommendationService
+from app.core.services.metrics import METRICS_AVAILABLE, render_metrics
 from app.core.services.recommendation import RecommendationService
 from app.core.services.summarization import SummarizationService
 
 router = APIRouter()
 
-# Create a semaphore with a limit of 50
-semaphore = Semaphore(os.environ.get("CONCURRENCY", 50))
+# Dependency to get the shared clients and caches - LLM clients are created lazily to avoid startup failures
+def get_app_state(request: Request) -> State:
+    if getattr(request.app.state, "llm_registry", None) is None:
+        # The start handler has not run (e.g. app served without lifespan events)
+        init_app_state(request.app, get_settings())
+    return request.app.state
 
-# Dependency to get LLM client - lazy initialization to avoid startup failures
-def get_recommendation_service():
-    llm_settings = get_settings()
-    llm_client = get_llm_client(llm_settings)
-    return RecommendationService(llm_client)
+def get_recommendation_service(state: State = Depends(get_app_state)):
+    registry = state.llm_registry
+    settings = registry.settings
+    fast_client = None
+    if settings.recommendation_cascade_enabled:
+        fast_client = registry.get(settings.cascade_fast_provider, model=settings.cascade_fast_model or None)
+    return RecommendationService(
+        registry.get_hedged() if settings.llm_hedging_enabled else registry.get(),
+        exa_client=state.exa_client,
+        cache=state.recommendation_cache,
+        single_flight=state.recommendation_flights,
+        fast_client=fast_client,
+        cascade_stats=state.cascade_stats,
+        admission=getattr(state, "admission", None),
+    )
 
-def get_summarization_service():
-    llm_settings = get_settings()
-    llm_client = get_llm_client(llm_settings)
-    return SummarizationService(llm_client)
+def get_summarization_service(state: State = Depends(get_app_state)):
+    return SummarizationService(
+        state.llm_registry.get(), cache=state.summary_cache, admission=getattr(state, "admission", None)
+    )
 
 
 @router.get("/health", response_model=Healthcheck)
@@ -52,16 +74,127 @@ async def check_health():
 async def get_recommendations(
     request: Request,
     request_params: RecommendationRequest,
-    service: RecommendationService = Depends(get_recommendation_service)
+    service: RecommendationService = Depends(get_recommendation_service),
 ):
     """Fetches general gift recommendations"""
 
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        request_params = request_params.model_copy(update={"use_cache": False})
+
+    # The service holds admission slots only while it calls the LLM; AdmissionRejected is answered with 429/503
     try:
         result = await service.generate_recommendations(request_params)
         return responses.ORJSONResponse(result.model_dump())
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _format_sse(event: Dict[str, Any]) -> bytes:
+    return b"event: " + event["event"].encode() + b"\ndata: " + orjson.dumps(event["data"]) + b"\n\n"
+
+
+def _format_ndjson(event: Dict[str, Any]) -> bytes:
+    return orjson.dumps(event) + b"\n"
+
+
+@router.post(
+    "/recommend/stream",
+    tags=["tlc_recommendations"],
+    operation_id="stream_recommendations",
+    responses={200: {"content": {"text/event-stream": {}, "application/x-ndjson": {}}}},
+)
+async def stream_recommendations(
+    request: Request,
+    request_params: RecommendationRequest,
+    service: RecommendationService = Depends(get_recommendation_service)
+):
+    """
+    Streams gift recommendations as server-sent events: one `recommendation` event per item as soon as
+    it is generated, `enrichment` events as product URLs are found, then `done`.
+    Send `Accept: application/x-ndjson` to get one JSON object per line instead.
+    """
+
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        request_params = request_params.model_copy(update={"use_cache": False})
+
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    formatter = _format_ndjson if ndjson else _format_sse
+
+    # Admitted before the response starts, so a rejection is still answered with 429/503 and Retry-After
+    slot = await service.admit_stream(request_params)
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for event in service.stream_recommendations(request_params, slot=slot):
+                yield formatter(event)
+        except AdmissionRejected as e:
+            # Rejected after the headers went out (e.g. by a top-up or the provider's adaptive limit)
+            data = {"detail": str(e), "status_code": e.status_code, "retry_after": e.retry_after}
+            yield formatter({"event": "error", "data": data})
+        except Exception as e:
+            yield formatter({"event": "error", "data": {"detail": str(e)}})
+        finally:
+            if slot is not None:
+                slot.release()
+
+    return responses.StreamingResponse(
+        events(),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also releases the slots when the client leaves before the stream has started
+        background=BackgroundTask(slot.release) if slot is not None else None,
+    )
+
+@router.post(
+    "/recommend/batch",
+    tags=["tlc_recommendations"],
+    operation_id="batch_recommendations",
+    responses={200: {"content": {"application/x-ndjson": {"schema": BatchRecommendationResult.model_json_schema()}}}},
+)
+async def batch_recommendations(
+    request: Request,
+    request_params: BatchRecommendationRequest,
+    service: RecommendationService = Depends(get_recommendation_service)
+):
+    """
+    Generates recommendations for many profiles at once. Streams one JSON line per request as it
+    finishes, in completion order: `{"index", "profile_id", "result"}` or `{"index", "profile_id", "error"}`.
+    """
+
+    settings = get_settings()
+    if len(request_params.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request_params.requests)} requests; the limit is {settings.batch_max_requests}",
+        )
+
+    requests = request_params.requests
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        requests = [item.model_copy(update={"use_cache": False}) for item in requests]
+
+    concurrency = min(request_params.concurrency or settings.batch_concurrency, settings.batch_max_concurrency)
+    batch = BatchRecommendationService(service, concurrency=concurrency)
+
+    # The batch holds a "batch" route slot, taken before the response starts so a rejection gets 429/503.
+    # Its generations still take "recommend" and provider slots; those rejections come back per item.
+    slot = await service.admission.acquire("batch") if service.admission is not None else None
+
+    async def lines() -> AsyncIterator[bytes]:
+        try:
+            async for result in batch.run(requests):
+                yield orjson.dumps(result.model_dump(exclude_none=True)) + b"\n"
+        finally:
+            if slot is not None:
+                slot.release()
+
+    return responses.StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.release) if slot is not None else None,
+    )
+
 @router.post(
     "/summarize",
     response_model=SummarizationResponse,
@@ -71,11 +204,41 @@ async def get_recommendations(
 async def summarize_user_profile(
     request: Request,
     request_params: SummarizationRequest,
-    service: SummarizationService = Depends(get_summarization_service)
+    service: SummarizationService = Depends(get_summarization_service),
 ):
     try:
         result = await service.generate_summary(request_params)
         return result
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/stats", tags=["ops"], operation_id="get_stats")
+async def get_stats(state: State = Depends(get_app_state)):
+    """Returns admission control, LLM concurrency and routing, cascade, cache and single-flight counters for this worker"""
+
+    def stats(component):
+        return component.stats() if component is not None else None
+
+    return responses.ORJSONResponse({
+        "admission": stats(getattr(state, "admission", None)),
+        "llm": state.llm_registry.stats(),
+        "recommendation_cache": stats(state.recommendation_cache),
+        "summary_cache": stats(state.summary_cache),
+        "recommendation_single_flight": stats(state.recommendation_flights),
+        "recommendation_cascade": stats(state.cascade_stats),
+        "exa": stats(state.exa_client),
+    })
+
+
+@router.get("/metrics", tags=["ops"], operation_id="get_metrics")
+async def get_metrics():
+    """Returns Prometheus metrics: per-stage and LLM call latency histograms and pipeline counters, for all workers"""
+
+    if not METRICS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+    # Multiprocess mode reads every worker's files, so keep it off the event loop
+    body, content_type = await asyncio.to_thread(render_metrics)
+    return responses.Response(body, media_type=content_type)
@@ -1,7 +1,22 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 
 class Healthcheck(BaseModel):
     """Healthcheck response"""
 
     isAlive: bool
+
+
+class LLMUsage(BaseModel):
+    """LLM calls made to produce a response: tokens, time and cost"""
+
+    calls: int = 0
+    input_tokens: int = 0  # prompt tokens, cached ones included
+    output_tokens: int = 0  # generated tokens, reasoning included
+    cached_tokens: int = 0  # prompt tokens served from the provider's prompt cache
+    truncated: int = 0  # calls cut off by their max_tokens
+    llm_ms: float = Field(0.0, description="Summed call time; parallel calls overlap, so it can exceed the elapsed time")
+    ttft_ms: Optional[float] = Field(None, description="Streams only: time until the LLM sent its first text")
+    cost_usd: Optional[float] = Field(None, description="Cost of the calls whose model has a price in LLM_PRICES")
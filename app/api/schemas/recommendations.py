@@ -3,6 +3,9 @@ from enum import Enum
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from app.api.schemas.output import LLMUsage
+from app.core.services.llm.base import LatencyMode
+
 class Gender(str, Enum):
     MALE = "male"
     FEMALE = "female"
@@ -29,6 +32,9 @@ class RecommendationRequest(BaseModel):
     count: Optional[int] = 3
     notes: Optional[str] = None  # Free text notes about the loved one
     web_search_enabled: Optional[bool] = True  # Whether to enable web search for enhanced data
+    use_cache: Optional[bool] = True  # Set to False to skip cached responses and force a fresh generation
+    high_value: Optional[bool] = False  # In cascade mode, go straight to the strong model
+    latency_mode: Optional[LatencyMode] = None  # fast, balanced or thorough; maps to the provider's reasoning budget
 
 
 class GeneralRecommendationItem(BaseModel):
@@ -42,9 +48,36 @@ class GeneralRecommendationItem(BaseModel):
     product_image: Optional[str] = None
     product_cost: Optional[str] = None
 
+class EnrichmentReport(BaseModel):
+    attempted: int = 0  # items that needed a product URL
+    enriched: int = 0  # items that got one before the deadline
+    timed_out: int = 0  # lookups still running when the deadline fired
+    item_latency_ms: List[Optional[float]] = Field(
+        default_factory=list,
+        description="Lookup time per recommendation, in response order; null when not looked up or not finished",
+    )
+    elapsed_ms: float = 0.0
+
 class RecommendationResponse(BaseModel):
     profile_id: str
     recommendations: List[GeneralRecommendationItem]
     generated_at: str
     provider: str
+    enrichment: Optional[EnrichmentReport] = None
+    usage: Optional[LLMUsage] = None
+
 
+class BatchRecommendationRequest(BaseModel):
+    requests: List[RecommendationRequest] = Field(..., min_length=1, description="Recommendation requests to run")
+    concurrency: Optional[int] = Field(
+        None, ge=1, description="Max requests generated at once; defaults to the server's batch_concurrency"
+    )
+
+
+class BatchRecommendationResult(BaseModel):
+    index: int  # position of the request in the batch
+    profile_id: str
+    result: Optional[RecommendationResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None  # with `error`: 429/503 when admission control turned the request away
+    retry_after: Optional[int] = None  # with `status_code`: seconds to wait before retrying
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+from app.api.schemas.output import LLMUsage
+
 class SummarizationRequest(BaseModel):
     text: str = Field(
         ..., 
@@ -23,3 +25,4 @@ class SummarizationResponse(BaseModel):
     summary_length: int
     generated_at: str
     provider: str
+    usage: Optional[LLMUsage] = None
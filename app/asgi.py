@@ -2,11 +2,14 @@ import os
 import uvicorn
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.core.event_handlers import start_app_handler, stop_app_handler
 from app.api.controllers.routes import router
+from app.core.services.admission import AdmissionRejected
+from app.core.services.metrics import InFlightMiddleware
 
 # Import frontend serving for Replit deployment
 try:
@@ -17,6 +20,14 @@ except ImportError:
 
 load_dotenv()
 
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> ORJSONResponse:
+    """Answer requests turned away by admission control straight away, telling clients when to retry"""
+    return ORJSONResponse(
+        {"detail": str(exc)},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 def get_app() -> FastAPI:
     """method to set and get FASTAPI app"""
     fast_app = FastAPI(
@@ -48,8 +59,11 @@ def get_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    fast_app.add_middleware(InFlightMiddleware)
+
     # Add routes after CORS middleware
     fast_app.include_router(router=router)
+    fast_app.add_exception_handler(AdmissionRejected, admission_rejected_handler)
     fast_app.add_event_handler("startup", start_app_handler(fast_app))
     fast_app.add_event_handler("shutdown", stop_app_handler(fast_app))
     
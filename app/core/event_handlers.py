@@ -2,13 +2,74 @@ from typing import Callable
 from fastapi import FastAPI
 
 from app.api.custom_logging.logging_setup import logger
+from app.api.schemas.recommendations import RecommendationResponse
+from app.api.schemas.summarization import SummarizationResponse
+from app.core.services.admission import AdmissionController
+from app.core.services.cache import ResponseCache
+from app.core.services.disk_cache import DiskCache
+from app.core.services.llm.base import shutdown_llm_executor
+from app.core.services.llm.registry import LLMClientRegistry
+from app.core.services.metrics import mark_worker_exit
+from app.core.services.recommendation import CascadeStats
+from app.core.services.singleflight import SingleFlight
+from app.core.services.websearch import ExaClient
+from app.settings.settings import LLMSettings, get_settings
+
+
+def init_app_state(app: FastAPI, settings: LLMSettings) -> None:
+    """Create the process-wide clients and caches shared by all requests."""
+    app.state.llm_registry = LLMClientRegistry(settings)
+    app.state.admission = AdmissionController(settings) if settings.admission_enabled else None
+    app.state.disk_cache = None
+    if settings.disk_cache_path:
+        try:
+            app.state.disk_cache = DiskCache(settings.disk_cache_path, max_bytes=settings.disk_cache_max_mb * 1024 * 1024)
+        except Exception as e:
+            logger.warning(f"Disk cache unavailable, using in-memory caches only: {e}")
+    app.state.exa_client = ExaClient.from_settings(settings, disk_cache=app.state.disk_cache)
+
+    app.state.recommendation_cache = None
+    if settings.recommendation_cache_enabled:
+        app.state.recommendation_cache = ResponseCache(
+            max_entries=settings.recommendation_cache_max_entries,
+            ttl_s=settings.recommendation_cache_ttl,
+            stale_ttl_s=settings.recommendation_cache_stale_ttl,
+            l2=app.state.disk_cache,
+            namespace="recommendation",
+            encode=lambda response: response.model_dump(),
+            decode=RecommendationResponse.model_validate,
+        )
+
+    app.state.recommendation_flights = SingleFlight() if settings.recommendation_single_flight else None
+    app.state.cascade_stats = CascadeStats() if settings.recommendation_cascade_enabled else None
+
+    app.state.summary_cache = None
+    if settings.summary_cache_enabled:
+        app.state.summary_cache = ResponseCache(
+            max_entries=settings.summary_cache_max_entries,
+            ttl_s=settings.summary_cache_ttl,
+            stale_ttl_s=0,
+            l2=app.state.disk_cache,
+            namespace="summary",
+            encode=lambda response: response.model_dump(),
+            decode=SummarizationResponse.model_validate,
+        )
 
 
 def start_app_handler(app: FastAPI) -> Callable:
     """application startup method"""
 
-    def startup() -> None:
+    async def startup() -> None:
         logger.info("Running app start handler.")
+        settings = get_settings()
+        init_app_state(app, settings)
+        if settings.llm_warm_up:
+            await app.state.llm_registry.warm_up()
+            if app.state.exa_client.enabled:
+                try:
+                    await app.state.exa_client.warm_up()
+                except Exception as e:
+                    logger.warning(f"Could not warm up Exa client: {e}")
 
     return startup
 
@@ -16,7 +77,18 @@ def start_app_handler(app: FastAPI) -> Callable:
 def stop_app_handler(app: FastAPI) -> Callable:
     """application shutdown method"""
 
-    def shutdown() -> None:
+    async def shutdown() -> None:
         logger.info("Running app shutdown handler.")
+        registry = getattr(app.state, "llm_registry", None)
+        if registry is not None:
+            await registry.aclose()
+        exa_client = getattr(app.state, "exa_client", None)
+        if exa_client is not None:
+            await exa_client.close()
+        disk_cache = getattr(app.state, "disk_cache", None)
+        if disk_cache is not None:
+            disk_cache.close()
+        shutdown_llm_executor()
+        mark_worker_exit()
 
     return shutdown
@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from app.settings.settings import LLMSettings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status and Retry-After to answer with."""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    Up to `limit` holders run at once. Up to `max_queue` more wait, each for at most `max_wait_s`.
+    Beyond that, callers are rejected straight away with 429. A caller that waits too long is
+    rejected with 503. Either way the caller fails fast and does not sit until the request timeout.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait_s: float, retry_after: int = 1):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self.queue_depth:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(f"{self.name}: too many requests queued", status_code=429, retry_after=self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot over by resolving the waiter, so in_flight is not touched here
+            await asyncio.wait_for(waiter, self.max_wait_s)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise AdmissionRejected(
+                f"{self.name}: no capacity within {self.max_wait_s:g}s", status_code=503, retry_after=self.retry_after
+            ) from None
+        except asyncio.CancelledError:
+            # The caller went away just after being handed a slot: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            with contextlib.suppress(ValueError):
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class AdmissionSlot:
+    """Limiter slots taken by AdmissionController.acquire; release() is idempotent and `async with` releases on exit."""
+
+    def __init__(self):
+        self.limiters: List[ConcurrencyLimiter] = []
+
+    def release(self) -> None:
+        while self.limiters:
+            self.limiters.pop().release()
+
+    async def __aenter__(self) -> "AdmissionSlot":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Admission control for the LLM-backed routes.
+
+    A request must get a slot from its route's limiter and then from its provider's limiter. The
+    provider limiter is shared by every route that calls that provider. Limits come from
+    admission_route_limits / admission_provider_limits, falling back to the default limits for
+    routes and providers not listed.
+    """
+
+    def __init__(self, settings: LLMSettings):
+        self.settings = settings
+        self._routes: Dict[str, ConcurrencyLimiter] = {}
+        self._providers: Dict[str, ConcurrencyLimiter] = {}
+
+    def _limiter(self, pool: Dict[str, ConcurrencyLimiter], name: str, limits: Dict[str, int], default: int):
+        limiter = pool.get(name)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(
+                name,
+                limit=limits.get(name, default),
+                max_queue=self.settings.admission_max_queue,
+                max_wait_s=self.settings.admission_max_wait,
+                retry_after=self.settings.admission_retry_after,
+            )
+            pool[name] = limiter
+        return limiter
+
+    def route(self, name: str) -> ConcurrencyLimiter:
+        return self._limiter(
+            self._routes, name, self.settings.admission_route_limits, self.settings.admission_route_concurrency
+        )
+
+    def provider(self, name: str) -> ConcurrencyLimiter:
+        return self._limiter(
+            self._providers, name, self.settings.admission_provider_limits, self.settings.admission_provider_concurrency
+        )
+
+    async def acquire(self, route: str, provider: Optional[str] = None) -> AdmissionSlot:
+        """Take a route slot (and a provider slot) until the returned AdmissionSlot is released."""
+        slot = AdmissionSlot()
+        try:
+            for limiter in [self.route(route)] + ([self.provider(provider)] if provider else []):
+                await limiter.acquire()
+                slot.limiters.append(limiter)
+        except AdmissionRejected as e:
+            logger.warning(f"Admission rejected ({e.status_code}): {e}")
+            slot.release()
+            raise
+        except BaseException:
+            slot.release()
+            raise
+        return slot
+
+    @contextlib.asynccontextmanager
+    async def admit(self, route: str, provider: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a route slot (and a provider slot) for the duration of the block."""
+        async with await self.acquire(route, provider):
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {name: limiter.stats() for name, limiter in self._routes.items()},
+            "providers": {name: limiter.stats() for name, limiter in self._providers.items()},
+        }
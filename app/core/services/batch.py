@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.api.schemas.recommendations import (
+    BatchRecommendationResult,
+    EnrichmentReport,
+    GeneralRecommendationItem,
+    RecommendationRequest,
+)
+from app.core.services.admission import AdmissionRejected
+from app.core.services.recommendation import RecommendationService
+from app.core.services.websearch import enrich_items
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRecommendationService:
+    """
+    Runs many recommendation requests through one RecommendationService.
+
+    Generations fan out under a concurrency cap. Exa enrichment is done by the batch rather than per
+    request, through one lookup table shared by every item, so each distinct product query is searched
+    once per batch. Results are yielded as each request finishes, so one slow profile does not hold
+    back the rest.
+    """
+
+    def __init__(self, service: RecommendationService, concurrency: int = 4):
+        self.service = service
+        self.concurrency = concurrency
+        self._lookups: Dict[str, asyncio.Future] = {}
+
+    async def run(self, requests: List[RecommendationRequest]) -> AsyncIterator[BatchRecommendationResult]:
+        """Yield one result (or error) per request, in completion order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.create_task(self._run_one(index, request, semaphore)) for index, request in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The caller went away: stop generations that have not finished
+            for task in tasks:
+                task.cancel()
+
+    async def _run_one(
+        self,
+        index: int,
+        request: RecommendationRequest,
+        semaphore: asyncio.Semaphore,
+    ) -> BatchRecommendationResult:
+        profile_id = request.profile.profile_id
+        try:
+            async with semaphore:
+                # Enrichment is done below with the batch-wide lookup table
+                response = await self.service.generate_recommendations(
+                    request.model_copy(update={"web_search_enabled": False})
+                )
+            if request.web_search_enabled:
+                # Enrichment fills items in place; keep the cached response untouched
+                response = response.model_copy(deep=True)
+                response.enrichment = await self._enrich(response.recommendations)
+            return BatchRecommendationResult(index=index, profile_id=profile_id, result=response)
+        except AdmissionRejected as e:
+            logger.warning(f"Batch item {index} ({profile_id}) was not admitted: {e}")
+            return BatchRecommendationResult(
+                index=index, profile_id=profile_id, error=str(e), status_code=e.status_code, retry_after=e.retry_after
+            )
+        except Exception as e:
+            logger.warning(f"Batch item {index} ({profile_id}) failed: {e}")
+            return BatchRecommendationResult(index=index, profile_id=profile_id, error=str(e))
+
+    async def _enrich(self, recommendations: List[GeneralRecommendationItem]) -> Optional[EnrichmentReport]:
+        try:
+            return await enrich_items(
+                recommendations,
+                client=self.service.exa_client,
+                deadline_s=self.service.settings.exa_enrichment_budget,
+                lookups=self._lookups,
+            )
+        except Exception as ex:
+            logger.warning(f"Exa enrichment failed for batch item; using base recommendations. Error: {ex}")
+            return None
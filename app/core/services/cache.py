@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from app.core.services.disk_cache import DiskCache
+from app.core.services.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class ResponseCache:
+    """
+    Bounded in-memory LRU cache with a TTL and a stale-while-revalidate window.
+
+    An entry is served as a hit until `ttl_s` has passed. For another `stale_ttl_s` it is still
+    served immediately, but a single background refresh replaces it. After that it is a miss.
+
+    With `l2` set, entries are also written to a DiskCache under `namespace`, shared by all workers
+    and kept across restarts; L1 misses are looked up there before computing. `encode`/`decode`
+    convert values to and from the orjson-serialisable form stored on disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 900,
+        stale_ttl_s: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+        l2: Optional[DiskCache] = None,
+        namespace: str = "default",
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stale_ttl_s = stale_ttl_s
+        self._clock = clock
+        self.l2 = l2
+        self.namespace = namespace
+        self._encode = encode
+        self._decode = decode
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.l2_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for `key` if it is fresh or stale, dropping it once fully expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._clock() >= entry.stale_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, value: Any, ttl_s: Optional[float] = None) -> None:
+        """Store `value`, evicting the least recently used entries beyond max_entries."""
+        now = self._clock()
+        fresh_until = now + (self.ttl_s if ttl_s is None else ttl_s)
+        self._entries[key] = CacheEntry(value, fresh_until, fresh_until + self.stale_ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the in-memory value for `key` (fresh or stale) and count the lookup; no refresh is triggered."""
+        entry = self.get_entry(key)
+        if entry is None:
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.namespace, "miss").inc()
+            return None
+        if self.is_fresh(entry):
+            self.hits += 1
+            CACHE_LOOKUPS.labels(self.namespace, "hit").inc()
+        else:
+            self.stale_hits += 1
+            CACHE_LOOKUPS.labels(self.namespace, "stale").inc()
+        return entry.value
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self._clock() < entry.fresh_until
+
+    async def _get_l2_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """Look `key` up in the disk tier and promote a live entry into memory."""
+        try:
+            found = await asyncio.to_thread(self.l2.get, self.namespace, str(key))
+        except Exception as e:
+            logger.warning(f"Disk cache read failed: {e}")
+            return None
+        if found is None:
+            return None
+        stored, fresh_until = found
+        value = self._decode(stored)
+        # The disk tier uses wall-clock time, memory uses self._clock
+        self.set(key, value, ttl_s=fresh_until - time.time())
+        self.l2_hits += 1
+        return self._entries[key]
+
+    async def store(self, key: Hashable, value: Any, ttl_s: Optional[float] = None) -> None:
+        """Write `value` to memory and, when configured, to the disk tier."""
+        self.set(key, value, ttl_s=ttl_s)
+        if self.l2 is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.l2.set,
+                self.namespace,
+                str(key),
+                self._encode(value),
+                self.ttl_s if ttl_s is None else ttl_s,
+                self.stale_ttl_s,
+            )
+        except Exception as e:
+            logger.warning(f"Disk cache write failed: {e}")
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        bypass: bool = False,
+        cacheable: Callable[[Any], bool] = lambda value: value is not None,
+        ttl_for: Optional[Callable[[Any], Optional[float]]] = None,
+    ) -> Any:
+        """
+        Return the cached value for `key`, computing (and caching) it on a miss.
+
+        Args:
+            key: Cache key
+            compute: Coroutine factory producing a fresh value
+            bypass: Skip the lookup and always compute; the fresh value still replaces the cached one
+            cacheable: Predicate deciding whether a computed value may be stored
+            ttl_for: Optional per-value TTL (e.g. shorter for negative results); None means ttl_s
+        """
+        if not bypass:
+            entry = self.get_entry(key)
+            if entry is None and self.l2 is not None:
+                entry = await self._get_l2_entry(key)
+            if entry is not None:
+                if self.is_fresh(entry):
+                    self.hits += 1
+                    CACHE_LOOKUPS.labels(self.namespace, "hit").inc()
+                else:
+                    self.stale_hits += 1
+                    CACHE_LOOKUPS.labels(self.namespace, "stale").inc()
+                    self._schedule_refresh(key, compute, cacheable, ttl_for)
+                return entry.value
+        self.misses += 1
+        CACHE_LOOKUPS.labels(self.namespace, "miss").inc()
+        value = await compute()
+        if cacheable(value):
+            await self.store(key, value, ttl_s=ttl_for(value) if ttl_for else None)
+        return value
+
+    def _schedule_refresh(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool],
+        ttl_for: Optional[Callable[[Any], Optional[float]]],
+    ):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                value = await compute()
+                if cacheable(value):
+                    await self.store(key, value, ttl_s=ttl_for(value) if ttl_for else None)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background cache refresh failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "l2_hits": self.l2_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refresh_errors": self.refresh_errors,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,123 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fresh_until REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class DiskCache:
+    """
+    Size-bounded key/value store on local disk, shared by every worker process on the host.
+
+    Backed by SQLite in WAL mode (readers never block the single writer) with orjson-encoded values,
+    so it needs no external service and survives restarts. Calls are blocking; async callers run
+    them with asyncio.to_thread. Each thread gets its own connection.
+    """
+
+    # Only check the total size every this many writes
+    EVICTION_CHECK_INTERVAL = 64
+    # Re-stamp accessed_at on reads at most this often, to avoid a write per hit
+    TOUCH_INTERVAL_S = 60.0
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, fresh_until) for a live entry, or None.
+
+        fresh_until is a wall-clock timestamp; the entry may be past it but still inside its stale window.
+        """
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, fresh_until, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        value, fresh_until, expires_at, accessed_at = row
+        if now >= expires_at:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            return None
+        if now - accessed_at > self.TOUCH_INTERVAL_S:
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return orjson.loads(value), fresh_until
+
+    def set(self, namespace: str, key: str, value: Any, ttl_s: float, stale_ttl_s: float = 0.0) -> None:
+        """Store `value` (anything orjson can serialise) for `ttl_s` seconds plus a stale window."""
+        now = time.time()
+        blob = orjson.dumps(value)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, size, fresh_until, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (namespace, key, blob, len(blob), now + ttl_s, now + ttl_s + stale_ttl_s, now),
+        )
+        self._writes += 1
+        if self._writes % self.EVICTION_CHECK_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until the store is under 90% of max_bytes."""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if total > self.max_bytes:
+            rows = conn.execute("SELECT namespace, key, size FROM cache ORDER BY accessed_at").fetchall()
+            victims = []
+            for namespace, key, size in rows:
+                if total <= target:
+                    break
+                victims.append((namespace, key))
+                total -= size
+            conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+            removed += len(victims)
+        if removed:
+            logger.info(f"Disk cache evicted {removed} entries")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,227 @@
+import logging
+import re
+from typing import Any, List, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Keys LLMs wrap the array in despite being asked for a bare array
+WRAPPER_KEYS = ("categories", "recommendations", "items", "results")
+
+_CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+
+
+class JsonArrayStream:
+    """
+    Incrementally splits a streamed JSON array into its top-level elements.
+
+    Text before the opening bracket (prose, code fences, a wrapper object's key) is skipped. Each
+    element's raw text is returned as soon as its closing brace/bracket arrives, so callers can
+    parse and use it while the rest of the array is still being generated.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0  # 0 = before the array, 1 = inside the array, >1 = inside an element
+        self._in_string = False
+        self._escaped = False
+        self._element_start = -1
+        self.closed = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of text and return the raw text of every element completed by it."""
+        self._buffer += chunk
+        elements = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            if self.closed:
+                break
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._element_start >= 0:
+                    elements.append(buffer[self._element_start:i + 1])
+                    self._element_start = -1
+                elif self._depth == 0:
+                    self.closed = True
+        self._pos = len(buffer)
+        # Drop consumed text we will never need again
+        keep_from = self._element_start if self._element_start >= 0 else self._pos
+        self._buffer = buffer[keep_from:]
+        self._pos -= keep_from
+        if self._element_start >= 0:
+            self._element_start = 0
+        return elements
+
+    def pending(self) -> Optional[str]:
+        """Raw text of the element still open when the input stopped (i.e. a truncated element), if any."""
+        if self.closed or self._element_start < 0:
+            return None
+        return self._buffer[self._element_start:]
+
+
+def _repair(raw: str) -> str:
+    """
+    Fix common LLM JSON defects outside of string literals: // comments (copied from the schema
+    in the prompt), trailing commas and Python literals.
+    """
+    out = []
+    i = 0
+    in_string = False
+    escaped = False
+    length = len(raw)
+    while i < length:
+        char = raw[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "/" and raw.startswith("//", i):
+            newline = raw.find("\n", i)
+            i = length if newline < 0 else newline
+            continue
+        elif char in "}]":
+            # Trailing comma: drop a comma that is followed only by whitespace before this bracket
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        elif char.isalpha():
+            word = re.match(r"\w+", raw[i:]).group()
+            out.append({"True": "true", "False": "false", "None": "null"}.get(word, word))
+            i += len(word)
+            continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def close_truncated(raw: str) -> Optional[str]:
+    """
+    Turn a cut-off element into valid JSON by dropping its last incomplete member and closing the
+    brackets still open. Returns None when nothing complete is left.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    last_complete = -1  # index of the last comma directly inside the outermost container
+    for i, char in enumerate(raw):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == "," and len(stack) == 1:
+            last_complete = i
+    if last_complete < 0:
+        return None
+    return raw[:last_complete] + stack[0]
+
+
+def loads_lenient(raw: str) -> Any:
+    """Parse one JSON value with orjson, repairing common LLM defects on failure. Raises ValueError."""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return orjson.loads(_repair(raw))
+
+
+def parse_structured(text: str, key: str) -> Optional[List[Any]]:
+    """
+    The `key` list of a schema-constrained response, parsed without any recovery.
+
+    Provider structured output guarantees a single JSON object, so there are no code fences, prose
+    or wrappers to look for. Returns None when the text is not that object (e.g. the provider
+    ignored the schema), leaving the caller to fall back to parse_json_array.
+    """
+    try:
+        parsed = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict) and isinstance(parsed.get(key), list):
+        return parsed[key]
+    return None
+
+
+def parse_json_array(text: str) -> List[Any]:
+    """
+    Recover the elements of the JSON array in an LLM response.
+
+    Accepts a bare array, an array wrapped in an object (e.g. {"categories": [...]}), code fences and
+    surrounding prose. Malformed elements are repaired locally or skipped, and a truncated last
+    element keeps its complete fields, so one defect never costs the whole response.
+    """
+    stripped = _CODE_FENCE.sub("", text)
+    # Fast path: the whole response is valid JSON
+    try:
+        parsed = orjson.loads(stripped)
+        if isinstance(parsed, list):
+            return parsed
+        if isinstance(parsed, dict):
+            for key in WRAPPER_KEYS:
+                if isinstance(parsed.get(key), list):
+                    return parsed[key]
+        logger.warning(f"Unexpected response format: {type(parsed)}")
+        return []
+    except orjson.JSONDecodeError:
+        pass
+
+    stream = JsonArrayStream()
+    elements = []
+    raws = stream.feed(stripped)
+    truncated = stream.pending()
+    for raw in raws:
+        try:
+            elements.append(loads_lenient(raw))
+        except ValueError as e:
+            logger.warning(f"Skipping malformed element in LLM response: {e}")
+    if truncated is not None:
+        closed = close_truncated(truncated)
+        try:
+            if closed is not None:
+                elements.append(loads_lenient(closed))
+                logger.warning("LLM response was truncated; recovered the last element's complete fields")
+        except ValueError:
+            logger.warning("LLM response was truncated; dropped the incomplete last element")
+    if not raws and truncated is None:
+        logger.error("No JSON array found in LLM response")
+    return elements
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from app.core.services.admission import AdmissionRejected
+from app.core.services.llm.base import LLMClient, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+OVERLOAD_MARKERS = (
+    "429", "rate limit", "rate_limit", "resource has been exhausted", "resource_exhausted", "overloaded",
+    "timed out", "timeout",
+)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True if `error` means the provider is shedding load: throttled (429), overloaded or timing out."""
+    if isinstance(error, asyncio.TimeoutError) or getattr(error, "status_code", None) in (429, 529):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in OVERLOAD_MARKERS)
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit driven by observed latency.
+
+    Each finished call is a sample and is compared with a latency baseline. The baseline is the lowest
+    recent latency. It creeps up by at most `drift` per second and never above the latest sample, and it
+    is reset once the limit is down to `min_limit`. That way it follows a provider that has become slower
+    for good, but not the queueing our own load causes:
+    - If the sample stays under baseline * `tolerance` while the limit is actually in use, the limit
+      grows by one for every `limit` such calls (additive increase).
+    - If latency rises past that, or the provider throttles or times out, the limit is multiplied by
+      `backoff` (multiplicative decrease). It can drop at most once per `cooldown_s`, so a burst of
+      slow replies to one overload counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        tolerance: float = 2.0,
+        backoff: float = 0.75,
+        drift: float = 0.002,
+        cooldown_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.drift = drift
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self.baseline_s: Optional[float] = None
+        self.last_latency_s: Optional[float] = None
+        self._baseline_at = 0.0
+        self._last_decrease = float("-inf")
+        self.increases = 0
+        self.decreases = 0
+        self.overloads = 0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def on_sample(self, latency_s: float, in_flight: int, throttled: bool = False) -> None:
+        """Record one finished call; `in_flight` is the number running when it finished (itself included)."""
+        self.last_latency_s = latency_s
+        if throttled:
+            self.overloads += 1
+            self._decrease()
+            return
+        if self.baseline_s is None:
+            self.baseline_s, self._baseline_at = latency_s, self._clock()
+            return
+        if latency_s > self.baseline_s * self.tolerance:
+            if self.current <= self.min_limit:
+                # As unloaded as it gets: the provider itself is slower now, so that is the new baseline
+                self.baseline_s, self._baseline_at = latency_s, self._clock()
+            else:
+                self._decrease()
+            return
+        self._update_baseline(latency_s)
+        # Only grow when the current limit is actually being used; +1 per limit's worth of calls
+        if in_flight * 2 >= self.current and self.limit < self.max_limit:
+            before = self.current
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.increases += self.current - before
+
+    def _update_baseline(self, latency_s: float) -> None:
+        now = self._clock()
+        allowed = self.baseline_s * (1 + self.drift * (now - self._baseline_at))
+        self.baseline_s = min(latency_s, allowed)
+        self._baseline_at = now
+
+    def _decrease(self) -> None:
+        now = self._clock()
+        if now - self._last_decrease < self.cooldown_s:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.decreases += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current,
+            "baseline_ms": self.baseline_s * 1000 if self.baseline_s is not None else None,
+            "last_latency_ms": self.last_latency_s * 1000 if self.last_latency_s is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "overloads": self.overloads,
+        }
+
+
+class AdaptiveLLMClient(LLMClient):
+    """
+    Wraps an LLMClient so at most `limit.current` calls to it are in flight.
+
+    Callers over the limit wait their turn, for at most `max_wait_s`; after that they are rejected with
+    AdmissionRejected (503), so a backed-off limit answers fast instead of piling requests up. Every call's
+    latency, and whether the provider was overloaded, feeds the AdaptiveLimit, which sizes the limit to
+    what the provider is currently handling well.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        limit: Optional[AdaptiveLimit] = None,
+        max_wait_s: Optional[float] = None,
+        retry_after: int = 1,
+    ):
+        self.client = client
+        self.limit = limit or AdaptiveLimit()
+        self.max_wait_s = max_wait_s
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slot_freed = asyncio.Condition()
+
+    @property
+    def provider_name(self) -> str:
+        return self.client.provider_name
+
+    @property
+    def model(self) -> str:
+        return getattr(self.client, "model", "")
+
+    async def _acquire(self) -> None:
+        async with self._slot_freed:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._slot_freed.wait_for(lambda: self.in_flight < self.limit.current), self.max_wait_s
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected(
+                    f"{self.provider_name}: no LLM capacity within {self.max_wait_s:g}s",
+                    status_code=503,
+                    retry_after=self.retry_after,
+                ) from None
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def _release(self, start: float, throttled: bool, cancelled: bool) -> None:
+        # A cancelled or abandoned call says nothing about the provider's latency
+        if not cancelled:
+            self.limit.on_sample(time.perf_counter() - start, self.in_flight, throttled=throttled)
+        async with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    async def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> LLMResponse:
+        await self._acquire()
+        start = time.perf_counter()
+        throttled = cancelled = False
+        try:
+            return await self.client.generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            throttled = is_overload_error(e)
+            raise
+        finally:
+            await self._release(start, throttled, cancelled)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        await self._acquire()
+        start = time.perf_counter()
+        throttled = cancelled = False
+        try:
+            async for chunk in self.client.generate_stream(
+                prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+            ):
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            cancelled = True
+            raise
+        except Exception as e:
+            throttled = is_overload_error(e)
+            raise
+        finally:
+            await self._release(start, throttled, cancelled)
+
+    async def warm_up(self) -> None:
+        await self.client.warm_up()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.limit.stats(), "in_flight": self.in_flight, "waiting": self.waiting, "rejected": self.rejected}
@@ -1,51 +1,187 @@
-import time
 import json
-from typing import Dict, Any, Optional
+import re
+import time
+from typing import Dict, Any, AsyncIterator, Optional
 
 import anthropic
-from anthropic import AI_PROMPT, HUMAN_PROMPT
 
-from app.core.services.llm.base import LLMClient
+from app.core.services.llm.base import LatencyMode, LLMClient, LLMResponse, cap_output_tokens, normalise_finish_reason
+from app.core.services.llm.http_pool import build_http_client, warm_connection
 from app.settings.settings import LLMSettings
 
+# Models that accept an extended thinking budget
+THINKING_MODELS = re.compile(r"claude-(3-7|(sonnet|opus|haiku)-4)")
+
+# Extended thinking budget per latency mode; fast calls do not think
+THINKING_BUDGETS = {LatencyMode.BALANCED: 1024, LatencyMode.THOROUGH: 8192}
+
+# Tool whose input schema carries the response schema; the model is forced to call it
+RESPONSE_TOOL = "record_response"
+
+
 class ClaudeClient(LLMClient):
     """Anthropic Claude client implementation."""
     
-    def __init__(self, settings: LLMSettings):
+    def __init__(self, settings: LLMSettings, model: Optional[str] = None):
         self.api_key = settings.claude_api_key
-        self.model = settings.claude_model
+        self.model = model or settings.claude_model
         if not self.api_key:
             raise ValueError("Claude API key is required but not provided")
-        self.client = anthropic.Anthropic(api_key=self.api_key)
         self.request_timeout = settings.request_timeout
+        self.use_executor = settings.llm_async_mode == "executor"
+        self.executor_workers = settings.llm_executor_workers
+        self.http_client = None
+        if self.use_executor:
+            self.client = anthropic.Anthropic(api_key=self.api_key, timeout=self.request_timeout)
+        else:
+            self.http_client = build_http_client(settings)
+            self.client = anthropic.AsyncAnthropic(
+                api_key=self.api_key, timeout=self.request_timeout, http_client=self.http_client
+            )
         
     async def generate(
         self, 
         prompt: str, 
         max_tokens: Optional[int] = 1000,
         temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
-        formatted_prompt = f"{HUMAN_PROMPT} {prompt} {AI_PROMPT}"
+    ) -> LLMResponse:
+        latency_params = self._latency_params(max_tokens, temperature, latency_mode)
+        params = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            **latency_params,
+            **self._system_params(system),
+            **self._schema_params(response_schema, latency_params),
+            **kwargs
+        }
         
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs
-            )
+            start = time.perf_counter()
+            if self.use_executor:
+                response = await self.run_blocking(self.client.messages.create, **params)
+            else:
+                response = await self.client.messages.create(**params)
             
             return {
-                "text": response.content[0].text,
+                "text": self._response_text(response),
                 "model": self.model,
                 "provider": self.provider_name,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **self._usage(response),
+                "finish_reason": normalise_finish_reason(getattr(response, "stop_reason", None)),
+                "latency_ms": (time.perf_counter() - start) * 1000,
             }
         except Exception as e:
             raise Exception(f"Claude API error: {str(e)}")
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = 1000,
+        temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        if self.use_executor:
+            async for chunk in super().generate_stream(
+                prompt, max_tokens, temperature, latency_mode, system, response_schema, **kwargs
+            ):
+                yield chunk
+            return
+
+        # Forced tool input does not reach text_stream, so streams rely on the prompt for the output format
+        try:
+            async with self.client.messages.stream(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                **self._latency_params(max_tokens, temperature, latency_mode),
+                **self._system_params(system),
+                **kwargs
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            raise Exception(f"Claude API error: {str(e)}")
+
+    @staticmethod
+    def _system_params(system: Optional[str]) -> Dict[str, Any]:
+        """The system prompt as a cache breakpoint: later calls with the same prefix read it from the prompt cache."""
+        if not system:
+            return {}
+        return {"system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+
+    @staticmethod
+    def _schema_params(response_schema: Optional[Dict[str, Any]], latency_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Structured output as a forced tool call whose input schema is `response_schema`.
+
+        Extended thinking does not allow a forced tool choice, so thinking calls rely on the prompt.
+        """
+        if response_schema is None or "thinking" in latency_params:
+            return {}
+        return {
+            "tools": [{
+                "name": RESPONSE_TOOL,
+                "description": "Record the response in the required format.",
+                "input_schema": response_schema,
+            }],
+            "tool_choice": {"type": "tool", "name": RESPONSE_TOOL},
+        }
+
+    @staticmethod
+    def _usage(response: Any) -> Dict[str, Optional[int]]:
+        """Token counts; Claude reports cache reads and writes apart from the other input tokens."""
+        usage = getattr(response, "usage", None)
+        cached = getattr(usage, "cache_read_input_tokens", None)
+        parts = [getattr(usage, "input_tokens", None), cached, getattr(usage, "cache_creation_input_tokens", None)]
+        known = [part for part in parts if isinstance(part, int)]
+        return {
+            "input_tokens": sum(known) if known else None,
+            "output_tokens": getattr(usage, "output_tokens", None),
+            "cached_tokens": cached,
+        }
+
+    @staticmethod
+    def _response_text(response) -> str:
+        """The forced tool input as JSON text, else the text block; with extended thinking it follows the thinking blocks."""
+        for block in response.content:
+            if block.type == "tool_use" and block.name == RESPONSE_TOOL:
+                return json.dumps(block.input)
+        return next(block.text for block in response.content if block.type == "text")
+
+    def _latency_params(
+        self, max_tokens: Optional[int], temperature: Optional[float], latency_mode: Optional[LatencyMode]
+    ) -> Dict[str, Any]:
+        """
+        max_tokens, temperature and thinking for a call in `latency_mode`.
+
+        Fast calls get no thinking and a short output cap. Balanced and thorough calls on models that
+        support it get a thinking budget on top of the output cap; thinking does not allow a temperature.
+        """
+        budget = THINKING_BUDGETS.get(latency_mode)
+        if budget is None or not THINKING_MODELS.search(self.model):
+            return {"max_tokens": cap_output_tokens(max_tokens, latency_mode), "temperature": temperature}
+        return {
+            "max_tokens": (max_tokens or 1000) + budget,
+            "thinking": {"type": "enabled", "budget_tokens": budget},
+        }
+
+    async def warm_up(self) -> None:
+        if self.http_client is not None:
+            await warm_connection(self.http_client, str(self.client.base_url))
+
+    async def aclose(self) -> None:
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        else:
+            self.client.close()
+
     @property
     def provider_name(self) -> str:
         return "claude"
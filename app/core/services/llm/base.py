@@ -1,8 +1,88 @@
+import asyncio
+import functools
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, Any, AsyncIterator, Callable, Optional, TypedDict
+
+# Shared, bounded pool for SDK calls that only have a blocking interface.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_llm_executor(max_workers: int = 16) -> ThreadPoolExecutor:
+    """Return the process-wide executor used for blocking LLM SDK calls."""
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-sdk")
+    return _executor
+
+
+def shutdown_llm_executor() -> None:
+    """Stop the shared executor, waiting for in-flight calls to finish."""
+    global _executor  # pylint: disable=global-statement
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+class LatencyMode(str, Enum):
+    """How long a caller is prepared to wait; each client maps it to its provider's reasoning and output knobs."""
+    FAST = "fast"  # no extended reasoning, short output: interactive flows that need an answer in a few seconds
+    BALANCED = "balanced"  # a small reasoning budget
+    THOROUGH = "thorough"  # a large reasoning budget
+
+
+# Output cap for fast calls; a handful of recommendations fits comfortably inside it
+FAST_OUTPUT_TOKENS = 2048
+
+
+def cap_output_tokens(max_tokens: Optional[int], latency_mode: Optional[LatencyMode]) -> Optional[int]:
+    """Return the output cap for a call: fast calls are held to FAST_OUTPUT_TOKENS, others keep `max_tokens`."""
+    if latency_mode == LatencyMode.FAST:
+        return min(max_tokens, FAST_OUTPUT_TOKENS) if max_tokens else FAST_OUTPUT_TOKENS
+    return max_tokens
+
+
+class LLMResponse(TypedDict, total=False):
+    """
+    What generate() returns. Usage fields are None where the provider does not report them.
+
+    A plain dict underneath, so wrappers can pass it on or copy it with extra keys.
+    """
+    text: str
+    model: str
+    provider: str
+    timestamp: float
+    input_tokens: Optional[int]  # prompt tokens, cached ones included
+    output_tokens: Optional[int]  # generated tokens, reasoning/thinking included
+    cached_tokens: Optional[int]  # prompt tokens served from the provider's prompt cache
+    finish_reason: Optional[str]  # "stop", "length" (cut off by max_tokens) or the provider's own reason
+    latency_ms: float  # time for the whole call
+
+
+# Provider stop reasons mapped onto OpenAI's "stop" / "length"
+_FINISH_REASONS = {
+    "end_turn": "stop",
+    "stop_sequence": "stop",
+    "tool_use": "stop",
+    "max_tokens": "length",
+}
+
+
+def normalise_finish_reason(reason: Any) -> Optional[str]:
+    """Map a provider's stop reason (string or enum) to "stop", "length" or its own lower-case name."""
+    if reason is None:
+        return None
+    name = str(getattr(reason, "name", reason)).lower()
+    return _FINISH_REASONS.get(name, name)
+
 
 class LLMClient(ABC):
     """Abstract base class for LLM clients."""
+
+    # Set to True by clients configured with llm_async_mode="executor"
+    use_executor: bool = False
+    executor_workers: int = 16
     
     @abstractmethod
     async def generate(
@@ -10,8 +90,11 @@ class LLMClient(ABC):
         prompt: str, 
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
         """
         Generate a response from the LLM.
         
@@ -19,12 +102,76 @@ class LLMClient(ABC):
             prompt: The input prompt for the LLM
             max_tokens: Maximum number of tokens to generate
             temperature: Temperature parameter for generation
+            latency_mode: Reasoning/latency trade-off; None keeps the provider's defaults
+            system: Static instructions sent ahead of the prompt; providers cache them where they can
+            response_schema: JSON schema (an object) the output must follow, using the provider's
+                structured output mode; the text is then that JSON object
             **kwargs: Additional model-specific parameters
             
         Returns:
-            A dictionary containing the response and additional metadata
+            The text with its model, provider, token usage, finish reason and latency
         """
         pass
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the generated text as it is produced.
+
+        Providers without a streaming API fall back to yielding the whole `generate` result once.
+
+        Args:
+            prompt: The input prompt for the LLM
+            max_tokens: Maximum number of tokens to generate
+            temperature: Temperature parameter for generation
+            latency_mode: Reasoning/latency trade-off; None keeps the provider's defaults
+            system: Static instructions sent ahead of the prompt; providers cache them where they can
+            response_schema: JSON schema (an object) the output must follow, using the provider's
+                structured output mode; the text is then that JSON object
+            **kwargs: Additional model-specific parameters
+
+        Yields:
+            Chunks of generated text
+        """
+        params = {"prompt": prompt, **kwargs}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        if latency_mode is not None:
+            params["latency_mode"] = latency_mode
+        if system is not None:
+            params["system"] = system
+        if response_schema is not None:
+            params["response_schema"] = response_schema
+        response = await self.generate(**params)
+        yield response["text"]
+
+    async def run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking SDK call on the bounded LLM executor so the event loop keeps serving requests.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_llm_executor(self.executor_workers),
+            functools.partial(func, *args, **kwargs),
+        )
+    
+    async def warm_up(self) -> None:
+        """Establish connections ahead of the first request. No-op by default."""
+        pass
+
+    async def aclose(self) -> None:
+        """Release pooled connections. No-op by default."""
+        pass
     
     @property
     @abstractmethod
@@ -1,8 +1,8 @@
 import time
 from typing import Dict, Any, Optional
-import httpx
 
-from app.core.services.llm.base import LLMClient
+from app.core.services.llm.base import LatencyMode, LLMClient, LLMResponse, cap_output_tokens
+from app.core.services.llm.http_pool import build_http_client, warm_connection
 from app.settings.settings import LLMSettings
 
 class GemmaClient(LLMClient):
@@ -15,42 +15,58 @@ class GemmaClient(LLMClient):
             raise ValueError("Gemma API key is required but not provided")
         self.base_url = "https://api.example.com/gemma"  # Replace with actual Gemma API URL
         self.request_timeout = settings.request_timeout
+        self.http_client = build_http_client(settings)
         
     async def generate(
         self, 
         prompt: str, 
         max_tokens: Optional[int] = 1000,
         temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
+        # The endpoint has no schema mode: the prompt carries the output format
+        if system:
+            prompt = f"{system}\n\n{prompt}"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/generate",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "max_tokens": max_tokens,
-                        "temperature": temperature,
-                        **kwargs
-                    },
-                    timeout=self.request_timeout
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "text": result["generated_text"],
-                        "model": self.model,
-                        "provider": self.provider_name,
-                        "timestamp": time.time()
-                    }
-                else:
-                    raise Exception(f"API returned status code {response.status_code}: {response.text}")
+            start = time.perf_counter()
+            response = await self.http_client.post(
+                f"{self.base_url}/generate",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    # No reasoning knobs on this API; fast calls only get a shorter output cap
+                    "max_tokens": cap_output_tokens(max_tokens, latency_mode),
+                    "temperature": temperature,
+                    **kwargs
+                },
+                timeout=self.request_timeout
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                return {
+                    "text": result["generated_text"],
+                    "model": self.model,
+                    "provider": self.provider_name,
+                    "timestamp": time.time(),
+                    # The endpoint reports no token usage
+                    "latency_ms": (time.perf_counter() - start) * 1000,
+                }
+            else:
+                raise Exception(f"API returned status code {response.status_code}: {response.text}")
         except Exception as e:
             raise Exception(f"Gemma API error: {str(e)}")
     
+    async def warm_up(self) -> None:
+        await warm_connection(self.http_client, self.base_url)
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
     @property
     def provider_name(self) -> str:
         return "gemma"
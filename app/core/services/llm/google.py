@@ -1,51 +1,186 @@
+import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
 
 import google.generativeai as genai
 
-from app.core.services.llm.base import LLMClient
+from app.core.services.llm.base import LatencyMode, LLMClient, LLMResponse, normalise_finish_reason
 from app.settings.settings import LLMSettings
 
+# Models that think before answering and count the thinking tokens against max_output_tokens
+THINKING_MODELS = re.compile(r"gemini-2\.5")
+
+# Output tokens added to the cap of thinking models so that thinking does not eat the answer
+THINKING_ALLOWANCE = 8192
+
+# Schema keys the Gemini API accepts (an OpenAPI subset); the rest, e.g. additionalProperties, are rejected
+GEMINI_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def to_gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a JSON schema to the keys Gemini's response_schema supports."""
+    reduced = {}
+    for key, value in schema.items():
+        if key not in GEMINI_SCHEMA_KEYS:
+            continue
+        if key == "items":
+            value = to_gemini_schema(value)
+        elif key == "properties":
+            value = {name: to_gemini_schema(prop) for name, prop in value.items()}
+        reduced[key] = value
+    return reduced
+
+
 class GeminiClient(LLMClient):
     """Google Gemini client implementation."""
     
-    def __init__(self, settings: LLMSettings):
+    def __init__(self, settings: LLMSettings, model: Optional[str] = None):
         self.api_key = settings.google_api_key
-        self.model = settings.gemini_model
+        self.model = model or settings.gemini_model
         if not self.api_key:
             raise ValueError("Google API key is required but not provided")
         genai.configure(api_key=self.api_key)
         self.request_timeout = settings.request_timeout
+        self.use_executor = settings.llm_async_mode == "executor"
+        self.executor_workers = settings.llm_executor_workers
+        self._model = genai.GenerativeModel(model_name=self.model)
+        # Fast calls go to the flash model: this SDK has no thinking budget to turn down
+        self.fast_model = settings.flash_model
+        # One handle per (model, system instruction); system prompts are static, so this stays small
+        self._models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {(self.model, None): self._model}
         
     async def generate(
         self, 
         prompt: str, 
-        # max_tokens: Optional[int] = 5000,
+        max_tokens: Optional[int] = None,
         temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
+        model_name, model = self._model_for(latency_mode, system)
+        generation_config = {"temperature": temperature, **kwargs}
+        # Truncated output is safe: the recommendation parser recovers every complete item
+        if max_tokens is not None:
+            generation_config["max_output_tokens"] = self._output_cap(model_name, max_tokens)
+        if response_schema is not None:
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = to_gemini_schema(response_schema)
+        request_options = {"timeout": self.request_timeout}
+
         try:
-            model = genai.GenerativeModel(model_name=self.model)
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    # we can't afford to have truncated output, the result would be unparseable.
-                    # ToDO: add result parsing logic that will support max_token and trucated output
-                    # "max_output_tokens": max_tokens,
-                    "temperature": temperature,
-                    **kwargs
-                }
-            )
+            start = time.perf_counter()
+            if self.use_executor:
+                response = await self.run_blocking(
+                    model.generate_content,
+                    prompt,
+                    generation_config=generation_config,
+                    request_options=request_options,
+                )
+            else:
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config=generation_config,
+                    request_options=request_options,
+                )
             
             return {
                 "text": response.text,
-                "model": self.model,
+                "model": model_name,
                 "provider": self.provider_name,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **self._usage(response),
+                "finish_reason": self._finish_reason(response),
+                "latency_ms": (time.perf_counter() - start) * 1000,
             }
         except Exception as e:
             raise Exception(f"Google Gemini API error: {str(e)}")
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        if self.use_executor:
+            async for chunk in super().generate_stream(
+                prompt, max_tokens, temperature, latency_mode, system, response_schema, **kwargs
+            ):
+                yield chunk
+            return
+
+        model_name, model = self._model_for(latency_mode, system)
+        generation_config = {"temperature": temperature, **kwargs}
+        if max_tokens is not None:
+            generation_config["max_output_tokens"] = self._output_cap(model_name, max_tokens)
+        if response_schema is not None:
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = to_gemini_schema(response_schema)
+        try:
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": self.request_timeout},
+                stream=True,
+            )
+            async for chunk in response:
+                # Chunks without text parts (e.g. the final usage-only chunk) have no .text
+                if chunk.parts:
+                    yield chunk.text
+        except Exception as e:
+            raise Exception(f"Google Gemini API error: {str(e)}")
+
+    @staticmethod
+    def _usage(response: Any) -> Dict[str, Optional[int]]:
+        """Token counts; thinking tokens are reported apart from the candidates on 2.5 models."""
+        usage = getattr(response, "usage_metadata", None)
+        output_tokens = getattr(usage, "candidates_token_count", None)
+        if output_tokens is not None:
+            output_tokens += getattr(usage, "thoughts_token_count", 0) or 0
+        return {
+            "input_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": output_tokens,
+            "cached_tokens": getattr(usage, "cached_content_token_count", None),
+        }
+
+    @staticmethod
+    def _finish_reason(response: Any) -> Optional[str]:
+        candidates = getattr(response, "candidates", None)
+        return normalise_finish_reason(candidates[0].finish_reason) if candidates else None
+
+    @staticmethod
+    def _output_cap(model_name: str, max_tokens: int) -> int:
+        """max_output_tokens for a call wanting `max_tokens` of answer; thinking models get THINKING_ALLOWANCE on top."""
+        return max_tokens + THINKING_ALLOWANCE if THINKING_MODELS.search(model_name) else max_tokens
+
+    def _model_for(
+        self, latency_mode: Optional[LatencyMode], system: Optional[str] = None
+    ) -> Tuple[str, genai.GenerativeModel]:
+        """
+        Model name and handle for a call in `latency_mode` with `system` as its system instruction.
+
+        The system instruction goes ahead of the prompt, so Gemini 2.5's implicit context caching can
+        reuse it across calls. Fast calls get no shorter output cap: Gemini 2.5 counts thinking tokens
+        against it, so a shorter cap would truncate the answer rather than shorten the thinking.
+        """
+        name = self.fast_model if latency_mode == LatencyMode.FAST and self.fast_model else self.model
+        key = (name, system or None)
+        if key not in self._models:
+            self._models[key] = genai.GenerativeModel(model_name=name, system_instruction=system or None)
+        return name, self._models[key]
+
+    async def warm_up(self) -> None:
+        # count_tokens is free and opens the channel (DNS, TLS) the generate calls will reuse
+        if self.use_executor:
+            await self.run_blocking(self._model.count_tokens, "warm-up")
+        else:
+            await self._model.count_tokens_async("warm-up")
+
     @property
     def provider_name(self) -> str:
         return "gemini"
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.core.services.llm.base import LLMClient, LLMResponse
+from app.core.services.llm.router import latency_percentile
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedLLMClient(LLMClient):
+    """
+    Cuts tail latency by hedging slow generations.
+
+    If the primary call has not answered within the `percentile` of recent latencies, a second,
+    identical call goes to `alternate` (or the same client). Whichever answers first wins and the
+    other is cancelled. If one of them fails, the other one's answer is used.
+
+    Hedges are paid for from a budget. Every call adds `budget` (e.g. 0.1) to it and every hedge spends
+    1, so over time hedges stay at or below that share of calls. Bursts are limited to `max_burst`.
+    Until `min_samples` latencies have been seen, no hedges are sent.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        alternate: Optional[LLMClient] = None,
+        *,
+        percentile: float = 0.9,
+        budget: float = 0.1,
+        max_burst: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay_s: float = 0.5,
+    ):
+        self.client = client
+        self.alternate = alternate or client
+        self.percentile = percentile
+        self.budget = budget
+        self.max_burst = max_burst
+        self.min_samples = min_samples
+        self.min_delay_s = min_delay_s
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._tokens = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.client.provider_name
+
+    @property
+    def model(self) -> str:
+        return getattr(self.client, "model", "")
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait for the primary before hedging, or None while there are too few samples."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        return max(self.min_delay_s, latency_percentile(list(self._latencies), self.percentile))
+
+    def _take_token(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> LLMResponse:
+        self.calls += 1
+        self._tokens = min(self.max_burst, self._tokens + self.budget)
+        delay = self.hedge_delay()
+        start = time.perf_counter()
+
+        def call(client: LLMClient) -> asyncio.Task:
+            return asyncio.create_task(
+                client.generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+            )
+
+        primary = call(self.client)
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._take_token():
+                    self.hedges += 1
+                    logger.info(f"Primary generation slower than {delay:.2f}s; sending a hedged request")
+                    tasks.add(call(self.alternate))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if not task.exception()), None)
+                if winner is not None:
+                    # The hedge delay is derived from the primary's own latency, not from whichever call answered
+                    if winner is primary:
+                        self._latencies.append(time.perf_counter() - start)
+                    else:
+                        self.hedge_wins += 1
+                        if not primary.done():
+                            # The primary is cancelled below; it would have taken at least the hedge delay
+                            self._latencies.append(delay)
+                    return winner.result()
+                if not tasks:
+                    # Everything failed: surface the primary's error when it is among them
+                    raise (primary.exception() if primary in done else next(iter(done)).exception())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        # The first item is already visible early when streaming; streams are not hedged
+        async for chunk in self.client.generate_stream(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs):
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+            "delay_ms": delay * 1000 if delay is not None else None,
+        }
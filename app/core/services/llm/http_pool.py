@@ -0,0 +1,40 @@
+import importlib.util
+import logging
+
+import httpx
+
+from app.settings.settings import LLMSettings
+
+logger = logging.getLogger(__name__)
+
+
+def build_http_client(settings: LLMSettings) -> httpx.AsyncClient:
+    """
+    Build a pooled, keep-alive httpx client for one LLM provider.
+
+    Args:
+        settings: Application settings holding the pool limits
+
+    Returns:
+        An httpx.AsyncClient that should live for the lifetime of the process
+    """
+    http2 = settings.http2_enabled
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=settings.request_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+
+async def warm_connection(client: httpx.AsyncClient, url: str) -> None:
+    """Open a pooled connection to `url` (DNS, TCP, TLS) so the first real request can reuse it."""
+    # Any HTTP status is fine, we only care about the connection being established
+    await client.head(url)
@@ -1,17 +1,22 @@
+from typing import Optional
+
 from app.core.services.llm.base import LLMClient
 from app.core.services.llm.anthropic import ClaudeClient
 from app.core.services.llm.openai import OpenAIClient
 from app.core.services.llm.google import GeminiClient
 from app.core.services.llm.gemma import GemmaClient
 from app.core.services.llm.flash import FlashClient
+from app.core.services.llm.router import RoutingLLMClient, build_route_clients
 from app.settings.settings import LLMSettings
 
-def get_llm_client(settings: LLMSettings) -> LLMClient:
+def get_llm_client(settings: LLMSettings, provider: Optional[str] = None, model: Optional[str] = None) -> LLMClient:
     """
     Factory function to create an LLM client based on the configuration.
     
     Args:
         settings: Application settings
+        provider: Provider to build, defaults to settings.llm_provider
+        model: Model to use instead of the provider's configured one (claude, openai and gemini)
         
     Returns:
         An instance of LLMClient
@@ -19,17 +24,20 @@ def get_llm_client(settings: LLMSettings) -> LLMClient:
     Raises:
         ValueError: If the requested provider is not supported
     """
-    provider = settings.llm_provider.lower()
+    provider = (provider or settings.llm_provider).lower()
     
     if provider == "claude":
-        return ClaudeClient(settings)
+        return ClaudeClient(settings, model=model)
     elif provider == "openai":
-        return OpenAIClient(settings)
+        return OpenAIClient(settings, model=model)
     elif provider == "gemini":
-        return GeminiClient(settings)
+        return GeminiClient(settings, model=model)
     elif provider == "gemma":
         return GemmaClient(settings)
     elif provider == "flash":
         return FlashClient(settings)
+    elif provider == "router":
+        clients = build_route_clients(settings.router_providers, lambda name: get_llm_client(settings, name))
+        return RoutingLLMClient.from_settings(settings, clients, owns_clients=True)
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
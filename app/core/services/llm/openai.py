@@ -1,47 +1,160 @@
+import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 import openai
 
-from app.core.services.llm.base import LLMClient
+from app.core.services.llm.base import LatencyMode, LLMClient, LLMResponse, cap_output_tokens, normalise_finish_reason
+from app.core.services.llm.http_pool import build_http_client, warm_connection
 from app.settings.settings import LLMSettings
 
+# Reasoning models: they take reasoning_effort and max_completion_tokens, and no temperature
+REASONING_MODELS = re.compile(r"^(o\d|gpt-5)")
+
+REASONING_EFFORT = {LatencyMode.FAST: "low", LatencyMode.BALANCED: "medium", LatencyMode.THOROUGH: "high"}
+
+
 class OpenAIClient(LLMClient):
     """OpenAI client implementation."""
     
-    def __init__(self, settings: LLMSettings):
+    def __init__(self, settings: LLMSettings, model: Optional[str] = None):
         self.api_key = settings.openai_api_key
-        self.model = settings.openai_model
+        self.model = model or settings.openai_model
         if not self.api_key:
             raise ValueError("OpenAI API key is required but not provided")
-        self.client = openai.OpenAI(api_key=self.api_key)
         self.request_timeout = settings.request_timeout
+        self.use_executor = settings.llm_async_mode == "executor"
+        self.executor_workers = settings.llm_executor_workers
+        self.http_client = None
+        if self.use_executor:
+            self.client = openai.OpenAI(api_key=self.api_key, timeout=self.request_timeout)
+        else:
+            self.http_client = build_http_client(settings)
+            self.client = openai.AsyncOpenAI(
+                api_key=self.api_key, timeout=self.request_timeout, http_client=self.http_client
+            )
         
     async def generate(
         self, 
         prompt: str, 
         max_tokens: Optional[int] = 1000,
         temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> LLMResponse:
+        params = {
+            "model": self.model,
+            "messages": self._messages(prompt, system),
+            **self._latency_params(max_tokens, temperature, latency_mode),
+            **self._schema_params(response_schema),
+            **kwargs
+        }
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=max_tokens,
-                temperature=temperature,
-                **kwargs
-            )
+            start = time.perf_counter()
+            if self.use_executor:
+                response = await self.run_blocking(self.client.chat.completions.create, **params)
+            else:
+                response = await self.client.chat.completions.create(**params)
             
+            choice = response.choices[0]
             return {
-                "text": response.choices[0].message.content,
+                "text": choice.message.content,
                 "model": self.model,
                 "provider": self.provider_name,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **self._usage(response),
+                "finish_reason": normalise_finish_reason(getattr(choice, "finish_reason", None)),
+                "latency_ms": (time.perf_counter() - start) * 1000,
             }
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = 1000,
+        temperature: Optional[float] = 0.7,
+        latency_mode: Optional[LatencyMode] = None,
+        system: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        if self.use_executor:
+            async for chunk in super().generate_stream(
+                prompt, max_tokens, temperature, latency_mode, system, response_schema, **kwargs
+            ):
+                yield chunk
+            return
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system),
+                **self._latency_params(max_tokens, temperature, latency_mode),
+                **self._schema_params(response_schema),
+                stream=True,
+                **kwargs
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        # OpenAI caches prompt prefixes automatically, so the static system message goes first
+        messages = [{"role": "system", "content": system}] if system else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    @staticmethod
+    def _schema_params(response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Strict JSON schema mode: the output is guaranteed to parse and match the schema."""
+        if response_schema is None:
+            return {}
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": response_schema, "strict": True},
+            }
+        }
+
+    @staticmethod
+    def _usage(response: Any) -> Dict[str, Optional[int]]:
+        """Token counts; prompt_tokens includes the cached ones and completion_tokens any reasoning."""
+        usage = getattr(response, "usage", None)
+        return {
+            "input_tokens": getattr(usage, "prompt_tokens", None),
+            "output_tokens": getattr(usage, "completion_tokens", None),
+            "cached_tokens": getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None),
+        }
+
+    def _latency_params(
+        self, max_tokens: Optional[int], temperature: Optional[float], latency_mode: Optional[LatencyMode]
+    ) -> Dict[str, Any]:
+        """
+        Output cap, temperature and reasoning effort for a call in `latency_mode`.
+
+        Reasoning models get the matching reasoning_effort; their max_completion_tokens covers the
+        reasoning as well, so it is not shortened. Other models only get a shorter cap on fast calls.
+        """
+        if latency_mode is not None and REASONING_MODELS.search(self.model):
+            return {"max_completion_tokens": max_tokens, "reasoning_effort": REASONING_EFFORT[latency_mode]}
+        return {"max_tokens": cap_output_tokens(max_tokens, latency_mode), "temperature": temperature}
+
+    async def warm_up(self) -> None:
+        if self.http_client is not None:
+            await warm_connection(self.http_client, str(self.client.base_url))
+
+    async def aclose(self) -> None:
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        else:
+            self.client.close()
+
     @property
     def provider_name(self) -> str:
         return "openai"
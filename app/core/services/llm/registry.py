@@ -0,0 +1,102 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.services.llm.adaptive import AdaptiveLimit, AdaptiveLLMClient
+from app.core.services.llm.base import LLMClient
+from app.core.services.llm.hedging import HedgedLLMClient
+from app.core.services.llm.llm_factory import get_llm_client
+from app.core.services.llm.router import RoutingLLMClient, build_route_clients
+from app.settings.settings import LLMSettings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of LLM clients.
+
+    Clients are built once (lazily, so a missing key for an unused provider never breaks startup) and
+    shared by every request, which keeps their connection pools and TLS sessions alive between calls.
+    """
+
+    def __init__(self, settings: LLMSettings):
+        self.settings = settings
+        self._clients: Dict[str, LLMClient] = {}
+
+    def get(self, provider: Optional[str] = None, model: Optional[str] = None) -> LLMClient:
+        """
+        Return the shared client for `provider` (defaults to settings.llm_provider). With `model`, a
+        separate shared client for that model of the provider.
+        """
+        provider = (provider or self.settings.llm_provider).lower()
+        key = f"{provider}:{model}" if model else provider
+        client = self._clients.get(key)
+        if client is None and provider == "router":
+            # Routes over the shared per-provider clients, so it shares their pools and adaptive limits
+            client = RoutingLLMClient.from_settings(
+                self.settings, build_route_clients(self.settings.router_providers, self.get)
+            )
+            self._clients[key] = client
+        elif client is None:
+            client = get_llm_client(self.settings, provider, model=model)
+            if self.settings.llm_adaptive_concurrency:
+                client = AdaptiveLLMClient(
+                    client,
+                    AdaptiveLimit(
+                        initial=self.settings.llm_concurrency_initial,
+                        min_limit=self.settings.llm_concurrency_min,
+                        max_limit=self.settings.llm_concurrency_max,
+                        tolerance=self.settings.llm_latency_tolerance,
+                    ),
+                    # Waiting for a slot is bounded like admission, so a backed-off limit rejects rather than hangs
+                    max_wait_s=self.settings.admission_max_wait if self.settings.admission_enabled else None,
+                    retry_after=self.settings.admission_retry_after,
+                )
+            self._clients[key] = client
+        return client
+
+    def get_hedged(self, provider: Optional[str] = None) -> LLMClient:
+        """
+        Return the shared hedging wrapper around `provider`'s client. Hedges go to
+        settings.llm_hedge_provider when set, otherwise to the same provider.
+        """
+        provider = (provider or self.settings.llm_provider).lower()
+        key = f"hedged:{provider}"
+        client = self._clients.get(key)
+        if client is None:
+            alternate = self.settings.llm_hedge_provider
+            client = HedgedLLMClient(
+                self.get(provider),
+                self.get(alternate) if alternate else None,
+                percentile=self.settings.llm_hedge_percentile,
+                budget=self.settings.llm_hedge_budget,
+                min_delay_s=self.settings.llm_hedge_min_delay,
+            )
+            self._clients[key] = client
+        return client
+
+    async def warm_up(self, providers: Optional[List[str]] = None) -> None:
+        """Create the clients for `providers` and open their connections. Failures are logged, not raised."""
+        for provider in providers or [self.settings.llm_provider]:
+            try:
+                await self.get(provider).warm_up()
+                logger.info(f"Warmed up LLM client for provider '{provider}'")
+            except Exception as e:
+                logger.warning(f"Could not warm up LLM client for provider '{provider}': {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Adaptive concurrency state per provider, plus router health and hedging counters when in use."""
+        return {
+            provider: client.stats()
+            for provider, client in self._clients.items()
+            if isinstance(client, (AdaptiveLLMClient, RoutingLLMClient, HedgedLLMClient))
+        }
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        for provider, client in self._clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing LLM client for provider '{provider}': {e}")
+        self._clients.clear()
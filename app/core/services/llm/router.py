@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.services.llm.base import LLMClient, LLMResponse
+from app.settings.settings import LLMSettings
+
+logger = logging.getLogger(__name__)
+
+# Provider that served the latest routed stream in this task; generate() results carry it in "provider"
+served_by: ContextVar[Optional[str]] = ContextVar("served_by", default=None)
+
+
+def latency_percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderHealth:
+    """
+    Rolling latency and error rate for one provider, plus its circuit breaker.
+
+    The breaker opens after `failure_threshold` consecutive failures (errors or timeouts). While open,
+    the provider gets no traffic for `open_s`. It is then half-open: one trial call is let through,
+    and its outcome either closes the breaker or opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        window: int = 100,
+        failure_threshold: int = 5,
+        open_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_s = open_s
+        self._clock = clock
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.open_s:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        return latency_percentile(list(self._latencies), q)
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now; claims the half-open trial slot if there is one."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record(self, latency_s: Optional[float], ok: bool) -> None:
+        self._outcomes.append(ok)
+        self._trial_in_flight = False
+        if ok:
+            self._latencies.append(latency_s)
+            self.consecutive_failures = 0
+            self._opened_at = None
+            return
+        self.consecutive_failures += 1
+        if self._opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            if self._opened_at is None:
+                self.trips += 1
+            self._opened_at = self._clock()
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot whose call was cancelled before it finished."""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "state": self.state,
+            "samples": self.samples,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+            "error_rate": self.error_rate,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+        }
+
+
+def build_route_clients(providers: List[str], build: Callable[[str], LLMClient]) -> Dict[str, LLMClient]:
+    """
+    Build the client for each of `providers`, skipping (with a warning) those that cannot be built,
+    e.g. for lack of an API key. Raises ValueError when none can.
+    """
+    clients = {}
+    for name in providers:
+        try:
+            clients[name] = build(name)
+        except Exception as e:
+            logger.warning(f"Router skips provider '{name}': {e}")
+    if not clients:
+        raise ValueError(f"None of the router providers {providers} could be configured")
+    return clients
+
+
+class RoutingLLMClient(LLMClient):
+    """
+    LLM client that sends each call to the healthiest of several providers.
+
+    Providers with an open circuit breaker are skipped. The others are ranked by rolling p95 latency,
+    inflated by their error rate. Providers that do not have `min_samples` yet rank after the
+    measured ones, in configured order. So the first configured provider takes the traffic until it
+    fails over and another provider has been measured as faster.
+    A failed attempt (error, or no answer within `attempt_timeout_s`) is retried on the next provider.
+    Results keep the serving provider's name in "provider".
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, LLMClient],
+        *,
+        window: int = 100,
+        min_samples: int = 5,
+        failure_threshold: int = 5,
+        open_s: float = 30.0,
+        error_penalty: float = 4.0,
+        attempt_timeout_s: Optional[float] = None,
+        owns_clients: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not clients:
+            raise ValueError("RoutingLLMClient needs at least one provider")
+        self.clients = clients
+        self.min_samples = min_samples
+        self.error_penalty = error_penalty
+        self.attempt_timeout_s = attempt_timeout_s
+        self.owns_clients = owns_clients
+        self.health = {
+            name: ProviderHealth(window=window, failure_threshold=failure_threshold, open_s=open_s, clock=clock)
+            for name in clients
+        }
+
+    @classmethod
+    def from_settings(cls, settings: LLMSettings, clients: Dict[str, LLMClient], owns_clients: bool = False):
+        return cls(
+            clients,
+            window=settings.router_window,
+            min_samples=settings.router_min_samples,
+            failure_threshold=settings.router_failure_threshold,
+            open_s=settings.router_open_seconds,
+            error_penalty=settings.router_error_penalty,
+            attempt_timeout_s=settings.request_timeout,
+            owns_clients=owns_clients,
+        )
+
+    @property
+    def provider_name(self) -> str:
+        return "router"
+
+    @property
+    def model(self) -> str:
+        return ",".join(f"{name}:{getattr(client, 'model', '')}" for name, client in self.clients.items())
+
+    def ranked(self) -> List[str]:
+        """Providers in the order they would be tried now, breakers permitting."""
+        order = list(self.clients)
+
+        def key(name: str) -> Tuple[int, float, int]:
+            health = self.health[name]
+            p95 = health.percentile(0.95)
+            if health.samples < self.min_samples or p95 is None:
+                return (1, 0.0, order.index(name))
+            return (0, p95 * (1 + self.error_penalty * health.error_rate), order.index(name))
+
+        return sorted(order, key=key)
+
+    def _candidates(self):
+        for name in self.ranked():
+            if self.health[name].allow():
+                yield name
+
+    async def generate(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> LLMResponse:
+        last_error: Optional[Exception] = None
+        for name in self._candidates():
+            health = self.health[name]
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self.clients[name].generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs),
+                    self.attempt_timeout_s,
+                )
+            except asyncio.CancelledError:
+                health.release_trial()
+                raise
+            except Exception as e:
+                health.record(None, ok=False)
+                logger.warning(f"Provider '{name}' failed ({type(e).__name__}: {e}); trying the next one")
+                last_error = e
+                continue
+            health.record(time.perf_counter() - start, ok=True)
+            return {**result, "provider": result.get("provider") or self.clients[name].provider_name}
+        raise last_error or Exception("No LLM provider available: all circuit breakers are open")
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream from the healthiest provider; fails over only while nothing has been yielded yet."""
+        last_error: Optional[Exception] = None
+        for name in self._candidates():
+            health = self.health[name]
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in self.clients[name].generate_stream(
+                    prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+                ):
+                    if not started:
+                        started = True
+                        served_by.set(self.clients[name].provider_name)
+                    yield chunk
+            except asyncio.CancelledError:
+                health.release_trial()
+                raise
+            except GeneratorExit:
+                # The consumer stopped reading; a stream that was producing still counts as served
+                if started:
+                    health.record(time.perf_counter() - start, ok=True)
+                else:
+                    health.release_trial()
+                raise
+            except Exception as e:
+                health.record(None, ok=False)
+                if started:
+                    raise
+                logger.warning(f"Provider '{name}' failed to stream ({type(e).__name__}: {e}); trying the next one")
+                last_error = e
+                continue
+            health.record(time.perf_counter() - start, ok=True)
+            return
+        raise last_error or Exception("No LLM provider available: all circuit breakers are open")
+
+    async def warm_up(self) -> None:
+        for name, client in self.clients.items():
+            try:
+                await client.warm_up()
+            except Exception as e:
+                logger.warning(f"Could not warm up routed provider '{name}': {e}")
+
+    async def aclose(self) -> None:
+        if self.owns_clients:
+            for client in self.clients.values():
+                await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"order": self.ranked(), "providers": {name: health.stats() for name, health in self.health.items()}}
@@ -0,0 +1,62 @@
+import logging
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.api.schemas.output import LLMUsage
+from app.core.services.llm.base import LLMResponse
+from app.core.services.metrics import LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Usage of the response being produced in this task; parallel shards share the same object
+current_usage: ContextVar[Optional[LLMUsage]] = ContextVar("current_usage", default=None)
+
+
+def _count(value) -> int:
+    # Providers leave unreported counts out or None
+    return value if isinstance(value, int) else 0
+
+
+def call_cost(response: LLMResponse, prices: Dict[str, List[float]]) -> Optional[float]:
+    """Cost in USD of one call from per-million-token prices; None when its model or token counts are unknown."""
+    price = prices.get(response.get("model") or "")
+    if not price or not isinstance(response.get("input_tokens"), int) or not isinstance(response.get("output_tokens"), int):
+        return None
+    cached = _count(response.get("cached_tokens"))
+    cached_price = price[2] if len(price) > 2 else price[0]
+    return (
+        (response["input_tokens"] - cached) * price[0] + cached * cached_price + response["output_tokens"] * price[1]
+    ) / 1_000_000
+
+
+def record_usage(response: LLMResponse, prices: Dict[str, List[float]], usage: Optional[LLMUsage] = None) -> None:
+    """Add one generate() result to `usage` (default: the current response's) and to the token counters."""
+    provider, model = response.get("provider") or "", response.get("model") or ""
+    for kind in ("input", "output", "cached"):
+        LLM_TOKENS.labels(provider, model, kind).inc(_count(response.get(f"{kind}_tokens")))
+    if response.get("finish_reason") == "length":
+        logger.info(f"{provider} {model} output was cut off by max_tokens")
+
+    if usage is None:
+        usage = current_usage.get()
+    if usage is None:
+        return
+    usage.calls += 1
+    usage.input_tokens += _count(response.get("input_tokens"))
+    usage.output_tokens += _count(response.get("output_tokens"))
+    usage.cached_tokens += _count(response.get("cached_tokens"))
+    usage.truncated += response.get("finish_reason") == "length"
+    usage.llm_ms += response.get("latency_ms") or 0.0
+    cost = call_cost(response, prices)
+    if cost is not None:
+        usage.cost_usd = (usage.cost_usd or 0.0) + cost
+
+
+def log_usage(usage: LLMUsage) -> None:
+    """Log the LLM usage of one response."""
+    cost = f", ${usage.cost_usd:.5f}" if usage.cost_usd is not None else ""
+    ttft = f", first text after {usage.ttft_ms:.0f} ms" if usage.ttft_ms is not None else ""
+    logger.info(
+        f"LLM usage: {usage.calls} calls, {usage.input_tokens} input ({usage.cached_tokens} cached) / "
+        f"{usage.output_tokens} output tokens, {usage.llm_ms:.0f} ms{ttft}{cost}"
+    )
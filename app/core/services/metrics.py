@@ -0,0 +1,110 @@
+"""
+Prometheus metrics for the recommendation pipeline, served at /metrics.
+
+prometheus_client is optional: without it every metric below is a no-op and /metrics answers 503.
+With several workers, point PROMETHEUS_MULTIPROC_DIR at an empty directory shared by them (cleared
+before each start) so that every worker writes its samples there and /metrics sums them all.
+"""
+
+import contextlib
+import os
+import time
+from typing import Any, Iterator, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+METRICS_AVAILABLE = prometheus_client is not None
+
+# From sub-millisecond parsing and validation up to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+
+if METRICS_AVAILABLE:
+    STAGE_SECONDS = Histogram(
+        "recommendation_stage_seconds",
+        "Duration of one recommendation pipeline stage: prompt, parse, validation or enrichment",
+        ["stage"],
+        buckets=LATENCY_BUCKETS,
+    )
+    LLM_CALL_SECONDS = Histogram(
+        "llm_call_seconds",
+        "Duration of successful recommendation LLM calls",
+        ["provider", "model"],
+        buckets=LATENCY_BUCKETS,
+    )
+    LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by kind: input, output or cached", ["provider", "model", "kind"])
+    PARSE_FAILURES = Counter(
+        "recommendation_parse_failures_total", "LLM output items dropped because they could not be parsed"
+    )
+    EMPTY_RESULTS = Counter("recommendation_empty_results_total", "Recommendation responses without any item")
+    CACHE_LOOKUPS = Counter("cache_lookups_total", "Response cache lookups by result: hit, stale or miss", ["cache", "result"])
+    ENRICHMENT_TIMEOUTS = Counter(
+        "exa_enrichment_timeouts_total", "Items left unenriched because the Exa enrichment deadline passed"
+    )
+    IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum")
+else:
+    STAGE_SECONDS = LLM_CALL_SECONDS = LLM_TOKENS = PARSE_FAILURES = EMPTY_RESULTS = _NoopMetric()
+    CACHE_LOOKUPS = ENRICHMENT_TIMEOUTS = IN_FLIGHT = _NoopMetric()
+
+
+@contextlib.contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Observe the duration of the block as `stage` in recommendation_stage_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+class InFlightMiddleware:
+    """ASGI middleware counting HTTP requests in flight; a streamed response counts until its last chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The exposition text and its content type; summed over all workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_worker_exit() -> None:
+    """Drop this worker's live gauge samples in multiprocess mode; its counters and histograms are kept."""
+    if METRICS_AVAILABLE and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,6 +1,21 @@
 from app.core.services.prompts.v1.prompt import (
+    COMPACT_FIELDS,
+    PROMPT_VERSION,
+    create_recommendation_messages,
     create_recommendation_prompt,
+    create_recommendation_system,
+    expand_compact_item,
+    prompt_version,
 )
+from app.core.services.prompts.v1.schema import RESPONSE_KEY, recommendation_response_schema
 __all__ = [
-    create_recommendation_prompt,
+    "COMPACT_FIELDS",
+    "PROMPT_VERSION",
+    "create_recommendation_messages",
+    "create_recommendation_prompt",
+    "create_recommendation_system",
+    "expand_compact_item",
+    "prompt_version",
+    "RESPONSE_KEY",
+    "recommendation_response_schema",
 ]
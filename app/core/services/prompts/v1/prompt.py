@@ -1,3 +1,4 @@
+import functools
 import json
 import pandas as pd
 from datetime import datetime
@@ -5,15 +6,113 @@ from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 
 from app.api.schemas.recommendations import RecommendationRequest
+from app.core.services.prompts.v1.schema import RESPONSE_KEY
+
+# The prompt is a static system prefix (role, rules, schema, self-check) followed by a short request
+# suffix, so providers can cache the prefix and only prefill the suffix on each call.
+PROMPT_TEMPLATE = 'recommendation_system.j2'
+REQUEST_TEMPLATE = 'recommendation_request.j2'
+# Part of the recommendation cache key: bump when the template changes meaningfully
+PROMPT_VERSION = f"v1/{PROMPT_TEMPLATE}+{REQUEST_TEMPLATE}"
+
+# Compact wire schema: each item is a positional row instead of an object, with a code for its type,
+# which roughly halves the output tokens per item. The template lists the same field order.
+COMPACT_FIELDS = ("product", "type", "category", "explanation", "store", "relevance_score")
+TYPE_CODES = {"p": "product", "e": "experience"}
 
 template_dir = Path(__file__).parent
 env = Environment(loader=FileSystemLoader(template_dir))
-template = env.get_template('recommendation_prompt_v2.j2')
 
-def create_recommendation_prompt(request):
-    """Loads and renders the general recommendation prompt"""
-    template = env.get_template('recommendation_prompt_v2.j2')
-    return template.render(
-        request=request
+
+def prompt_version(compact=False, self_check=False, structured=False):
+    """Cache-key version of the prompt; compact output, the self-check block and the structured wrapper
+    make different prompts."""
+    return (
+        PROMPT_VERSION
+        + ("+compact" if compact else "")
+        + ("+self_check" if self_check else "")
+        + ("+structured" if structured else "")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def create_recommendation_system(web_search_enabled=False, compact=False, self_check=False, structured=False):
+    """Renders the static system prefix of the recommendation prompt
+
+    It depends only on the output mode, so every call in that mode sends the same text and provider
+    prompt caches can reuse it.
+
+    Args:
+        web_search_enabled: Ask for search guidance instead of concrete items
+        compact: Ask for positional rows (COMPACT_FIELDS) instead of objects in direct mode
+        self_check: Include the SELF-CHECK block; off by default because the service enforces
+            the same rules locally (see app.core.services.validation)
+        structured: The call sends recommendation_response_schema, so describe its
+            {RESPONSE_KEY: [...]} wrapper instead of a bare array (direct object mode only)
+    """
+    return env.get_template(PROMPT_TEMPLATE).render(
+        web_search_enabled=web_search_enabled,
+        compact=compact,
+        compact_fields=COMPACT_FIELDS,
+        self_check=self_check,
+        wrapped=structured and not compact and not web_search_enabled,
+        response_key=RESPONSE_KEY,
     )
 
+
+def create_recommendation_messages(
+    request, exclusions=None, focus=None, compact=False, self_check=False, structured=False
+):
+    """Renders the recommendation prompt as a (system, request) pair
+
+    Args:
+        request: The recommendation request
+        exclusions: Optional store base domains the model must not use
+        focus: Optional categories this generation must stay within (one shard of a larger request)
+        compact: Ask for positional rows (COMPACT_FIELDS) instead of objects in direct mode
+        self_check: Include the SELF-CHECK block in the system prefix
+        structured: Describe the structured output wrapper object instead of a bare array
+    """
+    system = create_recommendation_system(bool(request.web_search_enabled), compact, self_check, structured)
+    user = env.get_template(REQUEST_TEMPLATE).render(
+        request=request,
+        exclusions=exclusions or [],
+        focus=focus or [],
+    )
+    return system, user
+
+
+def create_recommendation_prompt(
+    request, exclusions=None, focus=None, compact=False, self_check=False, structured=False
+):
+    """Loads and renders the general recommendation prompt as one text, system prefix first
+
+    Args:
+        request: The recommendation request
+        exclusions: Optional store base domains the model must not use
+        focus: Optional categories this generation must stay within (one shard of a larger request)
+        compact: Ask for positional rows (COMPACT_FIELDS) instead of objects in direct mode
+        self_check: Include the SELF-CHECK block in the system prefix
+        structured: Describe the structured output wrapper object instead of a bare array
+    """
+    system, user = create_recommendation_messages(
+        request, exclusions=exclusions, focus=focus, compact=compact, self_check=self_check, structured=structured
+    )
+    return f"{system}\n\n---\n\n{user}"
+
+
+def expand_compact_item(item):
+    """Expand a compact row into the item dict the verbose schema produces; dicts are returned unchanged.
+
+    Raises:
+        TypeError: If the item is neither a row nor an object
+    """
+    if isinstance(item, dict):
+        return item
+    if not isinstance(item, list):
+        raise TypeError(f"expected an object or a row, got {type(item).__name__}")
+    expanded = dict(zip(COMPACT_FIELDS, item))
+    if "type" in expanded:
+        expanded["type"] = TYPE_CODES.get(expanded["type"], expanded["type"])
+    return expanded
+
@@ -0,0 +1,45 @@
+import copy
+import functools
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.validation import ITEM_TYPES
+
+# Structured output wraps the items in an object: OpenAI schemas and Claude tool inputs must be objects
+RESPONSE_KEY = "recommendations"
+
+
+@functools.lru_cache(maxsize=None)
+def _response_schema():
+    item = GeneralRecommendationItem.model_json_schema()
+    # The model fills the required fields; URLs, images and prices come from enrichment
+    fields = item["required"]
+    properties = {
+        name: {key: value for key, value in item["properties"][name].items() if key != "title"}
+        for name in fields
+    }
+    properties["type"]["enum"] = list(ITEM_TYPES)
+    properties["relevance_score"]["description"] = "0.0-1.0"
+    return {
+        "type": "object",
+        "properties": {
+            RESPONSE_KEY: {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": list(fields),
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": [RESPONSE_KEY],
+        "additionalProperties": False,
+    }
+
+
+def recommendation_response_schema():
+    """JSON schema of a structured recommendation response, generated from GeneralRecommendationItem
+
+    Returns a fresh copy, so clients may adapt it to their provider's schema dialect.
+    """
+    return copy.deepcopy(_response_schema())
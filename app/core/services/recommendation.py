@@ -1,60 +1,264 @@
+import contextlib
 import datetime
+import hashlib
 import json
 import logging
 import time
-from typing import Union, List
-import re
-import os
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Deque, Dict, Union, List, Optional, Tuple
 import asyncio
+from collections import deque
 
-from app.api.schemas.recommendations import (GeneralRecommendationItem,RecommendationRequest, RecommendationResponse)
+from app.api.schemas.output import LLMUsage
+from app.api.schemas.recommendations import (EnrichmentReport, GeneralRecommendationItem, RecommendationRequest,
+                                             RecommendationResponse)
+from app.core.services.admission import AdmissionController, AdmissionSlot
+from app.core.services.cache import ResponseCache
+from app.core.services.json_stream import JsonArrayStream, close_truncated, loads_lenient, parse_json_array, parse_structured
 from app.core.services.llm.base import LLMClient
-from app.core.services.prompts.v1 import (create_recommendation_prompt)
-from app.core.services.websearch import enrich_with_exa_async
+from app.core.services.llm.router import served_by
+from app.core.services.llm.usage import current_usage, log_usage, record_usage
+from app.core.services.metrics import EMPTY_RESULTS, LLM_CALL_SECONDS, PARSE_FAILURES, timed
+from app.core.services.prompts.v1 import (RESPONSE_KEY, create_recommendation_messages, expand_compact_item, prompt_version,
+                                          recommendation_response_schema)
+from app.core.services.singleflight import SingleFlight
+from app.core.services.validation import enforce_recommendations, normalise_item, validate_recommendations
+from app.core.services.websearch import ExaClient, base_domain, enrich_items
+from app.settings.settings import LLMSettings, get_settings
 
 
 logger = logging.getLogger(__name__)
+
+
+def _normalise_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return " ".join(value.split()).lower()
+
+
+def recommendation_cache_key(request: RecommendationRequest, provider: str, model: str, prompt_version: str) -> str:
+    """
+    Build a cache key from the parts of a request that change the generated recommendations.
+
+    Interests are de-duplicated, sorted and lower-cased and free text is whitespace/case normalised,
+    so equivalent requests share an entry. profile_id is left out: it does not influence the
+    recommendations and is rewritten on the cached response.
+    """
+    canonical = {
+        "age": request.profile.age,
+        "gender": request.profile.gender.value if request.profile.gender else None,
+        "relationship": _normalise_text(request.profile.relationship),
+        "location": _normalise_text(request.location),
+        "upcoming_event": _normalise_text(request.upcoming_event),
+        "upcoming_event_date": _normalise_text(request.upcoming_event_date),
+        "profile_interests": sorted({_normalise_text(i) for i in request.profile_interests if i.strip()}),
+        "count": request.count,
+        "notes": _normalise_text(request.notes),
+        "web_search_enabled": bool(request.web_search_enabled),
+        "high_value": bool(request.high_value),
+        "latency_mode": request.latency_mode.value if request.latency_mode else None,
+        "provider": provider,
+        "model": model,
+        "prompt_version": prompt_version,
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Gift angles that keep shards apart when there are fewer interests than shards
+SHARD_ANGLES = [
+    "physical products",
+    "experiences and days out",
+    "personalised keepsakes",
+    "food, drink and treats",
+]
+
+
+def plan_shards(interests: List[str], count: int, shards: int) -> List[Tuple[int, List[str]]]:
+    """
+    Split a request for `count` items into `shards` (item count, focus) pairs.
+
+    Item counts differ by at most one. Interests are dealt out round-robin, so the focus lists are
+    disjoint. Each focus also gets its own gift angle, which keeps shards apart when interests run out.
+    """
+    shards = max(1, min(shards, count))
+    plan = []
+    for index in range(shards):
+        size = count // shards + (1 if index < count % shards else 0)
+        focus = list(interests[index::shards]) + [SHARD_ANGLES[index % len(SHARD_ANGLES)]]
+        plan.append((size, focus))
+    return plan
+
+
+class CascadeStats:
+    """Latency per cascade tier and the escalation rate, shared by all requests of a worker."""
+
+    TIERS = ("fast", "strong", "total")
+
+    def __init__(self, window: int = 500):
+        self._latencies: Dict[str, Deque[float]] = {tier: deque(maxlen=window) for tier in self.TIERS}
+        self.requests = 0
+        self.escalations = 0
+        self.high_value = 0
+
+    def record(self, tier: str, latency_s: float) -> None:
+        self._latencies[tier].append(latency_s)
+
+    def _mean_ms(self, tier: str) -> Optional[float]:
+        latencies = self._latencies[tier]
+        return sum(latencies) / len(latencies) * 1000 if latencies else None
+
+    def stats(self) -> Dict[str, Any]:
+        tiers = {tier: {"calls": len(self._latencies[tier]), "mean_ms": self._mean_ms(tier)} for tier in self.TIERS}
+        strong, total = tiers["strong"]["mean_ms"], tiers["total"]["mean_ms"]
+        return {
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "high_value": self.high_value,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+            "tiers": tiers,
+            # Mean end-to-end cascade latency vs. always using the strong model
+            "mean_saving_ms": strong - total if strong is not None and total is not None else None,
+        }
+
+
 class RecommendationService:
     """Service for generating recommendations using an LLM."""
     
-    def __init__(self, llm_client: LLMClient):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        exa_client: Optional[ExaClient] = None,
+        cache: Optional[ResponseCache] = None,
+        settings: Optional[LLMSettings] = None,
+        single_flight: Optional[SingleFlight] = None,
+        fast_client: Optional[LLMClient] = None,
+        cascade_stats: Optional[CascadeStats] = None,
+        admission: Optional[AdmissionController] = None,
+    ):
+        """
+        With `fast_client` set, recommendations are generated in cascade mode: the fast model answers
+        first and `llm_client` is used only when that output fails validation or the request is high_value.
+
+        With `admission` set, each generation holds a "recommend" route slot and a provider slot while
+        it calls the LLM; cache hits and coalesced duplicates need none.
+        """
         self.llm_client = llm_client
+        self.exa_client = exa_client
+        self.cache = cache
+        self.single_flight = single_flight
+        self.fast_client = fast_client
+        self.cascade_stats = cascade_stats
+        self.admission = admission
+        self.settings = settings or get_settings()
+
+    def _admit(self) -> AsyncContextManager:
+        """Route and provider slots for one generation; raises AdmissionRejected when they are full."""
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit("recommend", self.llm_client.provider_name)
+
+    @property
+    def compact_schema(self) -> bool:
+        """Whether the LLM is asked for compact positional rows instead of objects."""
+        return self.settings.prompt_schema == "compact"
+
+    @property
+    def structured_output(self) -> bool:
+        """
+        Whether the provider's structured output mode constrains the response to a JSON schema.
+
+        Compact rows are positional arrays that a strict object schema cannot describe.
+        """
+        return self.settings.llm_structured_output and not self.compact_schema
+
+    @property
+    def response_schema(self) -> Optional[Dict[str, Any]]:
+        """JSON schema for the provider's structured output mode, or None to rely on the prompt."""
+        return recommendation_response_schema() if self.structured_output else None
+
+    def cache_key(self, request: RecommendationRequest) -> str:
+        model = getattr(self.llm_client, "model", "")
+        if self.fast_client is not None:
+            model = f"{getattr(self.fast_client, 'model', '')}>{model}"
+        return recommendation_cache_key(
+            request,
+            provider=self.llm_client.provider_name,
+            model=model,
+            prompt_version=prompt_version(
+                self.compact_schema, self.settings.prompt_self_check, self.structured_output
+            ),
+        )
     
     async def generate_recommendations(self, request: RecommendationRequest) -> RecommendationResponse:
-        """Generate recommendations based on a profile's preferences."""
-        start_time = time.time()
-        # Create a prompt for the LLM
-        # Force direct mode in prompt to keep parser stable; we will enrich with web search separately if enabled
-        prompt_request = request.model_copy(update={"web_search_enabled": False})
-        prompt = create_recommendation_prompt(prompt_request)
-        logger.info(f'Making call to LLM for recommendations')
-        # logger.info(f'Making call to LLM for recommendations with prompt: {prompt}')
-        llm_response = await self.llm_client.generate(
-            prompt=prompt,
-            # max_tokens=5000,
-            temperature=0.7
-        )
+        """
+        Generate recommendations based on a profile's preferences, served from the cache when possible.
+        Identical requests arriving while one is being generated share that generation.
+        """
+        key = self.cache_key(request)
+        generated: List[RecommendationResponse] = []
+
+        async def generate() -> RecommendationResponse:
+            response = await self._generate_recommendations(request)
+            generated.append(response)
+            return response
 
-        # Parse the LLM response into recommendation items
-        recommendations = self._parse_recommendations(llm_response["text"], request.count)
+        def compute() -> Awaitable[RecommendationResponse]:
+            if self.single_flight is None:
+                return generate()
+            return self.single_flight.do(key, generate)
 
-        # Enrich with enhanced web search (Exa) if enabled
+        if self.cache is None:
+            response = await compute()
+        else:
+            response = await self.cache.get_or_compute(
+                key,
+                compute,
+                bypass=request.use_cache is False,
+                # Never cache a failed parse
+                cacheable=lambda result: bool(result.recommendations),
+            )
+        # Cached and coalesced responses are shared: hand out a copy carrying this caller's profile_id.
+        # Only the caller whose generation produced it reports its usage; the others spent nothing.
+        update: Dict[str, Any] = {"profile_id": request.profile.profile_id}
+        if not any(response is own for own in generated):
+            update["usage"] = LLMUsage()
+        return response.model_copy(update=update, deep=True)
+
+    async def _generate_recommendations(self, request: RecommendationRequest) -> RecommendationResponse:
+        """Generate recommendations with the LLM, bypassing the cache."""
+        start_time = time.time()
+        # Every LLM call below, shards and top-ups included, adds to this response's usage
+        usage = LLMUsage()
+        token = current_usage.set(usage)
+        try:
+            async with self._admit():
+                recommendations, provider = await self._generate_validated(request)
+        finally:
+            current_usage.reset(token)
+
+        # Enrich with enhanced web search (Exa) if enabled; items found before the deadline keep their URL
+        enrichment = None
         if getattr(request, "web_search_enabled", False):
             try:
-                t0 = time.perf_counter()
-                recommendations = await asyncio.wait_for(
-                    enrich_with_exa_async(recommendations),
-                    timeout=8
+                enrichment = await enrich_items(
+                    recommendations,
+                    client=self.exa_client,
+                    deadline_s=self.settings.exa_enrichment_budget,
+                )
+                logger.info(
+                    f"Exa enrichment latency: {enrichment.elapsed_ms / 1000:.3f}s, "
+                    f"enriched {enrichment.enriched}/{enrichment.attempted}, timed out {enrichment.timed_out}"
                 )
-                logger.info(f"Exa enrichment latency: {time.perf_counter() - t0:.3f}s")
-            except asyncio.TimeoutError:
-                logger.warning("Exa enrichment timed out; using base recommendations.")
+                if enrichment.timed_out:
+                    logger.warning("Exa enrichment deadline reached; unfinished items use base recommendations.")
             except Exception as ex:
                 logger.warning(f"Exa enrichment failed; using base recommendations. Error: {ex}")
 
+        if not recommendations:
+            EMPTY_RESULTS.inc()
         end_time = time.time()
         execution_time = end_time - start_time
         logger.info(f"Recommendation took {execution_time:.6f} seconds to execute end-to-end.")
+        log_usage(usage)
 
         # logger.info(f"Recommendations: {recommendations}")
         
@@ -62,65 +266,392 @@ class RecommendationService:
             profile_id=request.profile.profile_id,
             recommendations=recommendations,
             generated_at=datetime.datetime.now().isoformat(),
-            provider=self.llm_client.provider_name
+            provider=provider,
+            enrichment=enrichment,
+            usage=usage,
         )
 
-    def _parse_llm_response(self, llm_text: str) -> List[dict]:
-        """Parse JSON from LLM response with fallback extraction."""
-        try:
-            parsed_response = json.loads(llm_text)
-            
-            # Handle case where LLM returns response wrapped in a 'categories' field
-            if isinstance(parsed_response, dict) and 'categories' in parsed_response:
-                logger.info("Found 'categories' field in LLM response, extracting recommendations")
-                return parsed_response['categories']
-            
-            # Handle case where LLM returns direct array
-            if isinstance(parsed_response, list):
-                return parsed_response
-                
-            # If it's a dict but no 'categories' field, return empty list
-            logger.warning(f"Unexpected response format: {type(parsed_response)}")
-            return []
-            
-        except json.JSONDecodeError:
-            logger.warning("Direct JSON parsing failed, attempting to extract JSON from response")
-            # Try to extract JSON array
-            json_match = re.search(r'\[.*\]', llm_text, re.DOTALL)
-            if json_match:
-                try:
-                    return json.loads(json_match.group())
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse extracted JSON")
+    async def _generate_validated(self, request: RecommendationRequest) -> Tuple[List[GeneralRecommendationItem], str]:
+        """Generate and top up the items, through the fast/strong cascade when it is enabled."""
+        if self.fast_client is None:
+            recommendations, provider = await self._generate_batch(request)
+            return await self._fill_missing(request, recommendations), provider
+
+        stats = self.cascade_stats or CascadeStats()
+        stats.requests += 1
+        start = time.perf_counter()
+        if request.high_value:
+            stats.high_value += 1
+        else:
+            try:
+                recommendations, provider = await self._generate_batch(request, llm_client=self.fast_client)
+            except Exception as e:
+                # The fast tier is an optimisation: its failures must not fail the request
+                stats.record("fast", time.perf_counter() - start)
+                stats.escalations += 1
+                logger.warning(f"Fast model call failed ({e}); escalating")
             else:
-                logger.error("No JSON array found in LLM response")
-            return []
+                stats.record("fast", time.perf_counter() - start)
+                problems = validate_recommendations(recommendations, request.count)
+                if not problems:
+                    stats.record("total", time.perf_counter() - start)
+                    return recommendations, provider
+                stats.escalations += 1
+                logger.info(f"Fast model output failed validation ({'; '.join(problems)}); escalating")
+
+        strong_start = time.perf_counter()
+        recommendations, provider = await self._generate_batch(request)
+        recommendations = await self._fill_missing(request, recommendations)
+        stats.record("strong", time.perf_counter() - strong_start)
+        stats.record("total", time.perf_counter() - start)
+        return recommendations, provider
+
+    async def _generate_batch(
+        self,
+        request: RecommendationRequest,
+        llm_client: Optional[LLMClient] = None,
+    ) -> Tuple[List[GeneralRecommendationItem], str]:
+        """
+        Generate `request.count` items, as parallel shards when the request is large enough.
+
+        Each item's JSON is emitted one after the other, so one call's duration grows with the count.
+        Large requests are split into shards with disjoint focus that run at the same time; their items
+        are merged one per store, best first. Each shard asks for a few spare items that the merge drops,
+        so stores clashing across shards rarely cost a top-up; a failed shard is left to the top-up.
+        """
+        settings = self.settings
+        shards = min(settings.recommendation_max_shards, request.count // max(1, settings.recommendation_shard_size))
+        min_count = settings.recommendation_shard_min_count
+        if not min_count or request.count < min_count or shards < 2:
+            return await self._generate_items(request, llm_client=llm_client)
+
+        plan = plan_shards(request.profile_interests, request.count, shards)
+        spares = max(0, settings.recommendation_shard_spares)
+        logger.info(f"Generating {request.count} recommendations as {len(plan)} parallel shards")
+        results = await asyncio.gather(
+            *(
+                self._generate_items(request.model_copy(update={"count": size + spares}), llm_client=llm_client, focus=focus)
+                for size, focus in plan
+            ),
+            return_exceptions=True,
+        )
+        generated = [result for result in results if not isinstance(result, BaseException)]
+        if not generated:
+            raise results[0]
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Recommendation shard failed; topping up instead: {result}")
+
+        merged: List[GeneralRecommendationItem] = []
+        used_stores = set()
+        candidates = [item for items, _ in generated for item in items]
+        for item in sorted(candidates, key=lambda item: item.relevance_score, reverse=True):
+            store = base_domain(item.store)
+            if store not in used_stores:
+                used_stores.add(store)
+                merged.append(item)
+        return merged[:request.count], generated[0][1]
+
+    async def _generate_items(
+        self,
+        request: RecommendationRequest,
+        exclusions: Optional[List[str]] = None,
+        llm_client: Optional[LLMClient] = None,
+        focus: Optional[List[str]] = None,
+    ) -> Tuple[List[GeneralRecommendationItem], str]:
+        """Make one LLM call for `request.count` items; returns the parsed items and the provider that served it."""
+        # Create a prompt for the LLM
+        # Force direct mode in prompt to keep parser stable; we will enrich with web search separately if enabled
+        prompt_request = request.model_copy(update={"web_search_enabled": False})
+        with timed("prompt"):
+            system, prompt = create_recommendation_messages(
+                prompt_request,
+                exclusions=exclusions,
+                focus=focus,
+                compact=self.compact_schema,
+                self_check=self.settings.prompt_self_check,
+                structured=self.structured_output,
+            )
+        logger.info(f'Making call to LLM for recommendations')
+        # logger.info(f'Making call to LLM for recommendations with prompt: {prompt}')
+        # Truncated output is recoverable by the parser, so the output can be capped to bound tail latency
+        llm_client = llm_client or self.llm_client
+        llm_start = time.perf_counter()
+        llm_response = await llm_client.generate(
+            prompt=prompt,
+            max_tokens=self.settings.recommendation_max_tokens,
+            temperature=self.settings.recommendation_temperature,
+            latency_mode=request.latency_mode,
+            system=system,
+            response_schema=self.response_schema,
+        )
+        LLM_CALL_SECONDS.labels(
+            llm_response.get("provider") or llm_client.provider_name,
+            llm_response.get("model") or getattr(llm_client, "model", ""),
+        ).observe(time.perf_counter() - llm_start)
+        record_usage(llm_response, self.settings.llm_prices)
+        if llm_response.get("cached_tokens"):
+            logger.info(f"{llm_response['cached_tokens']} prompt tokens served from the provider's prompt cache")
+
+        # Parse the LLM response into recommendation items; with exclusions keep spares for ones that get filtered out
+        with timed("parse"):
+            items = self._parse_recommendations(llm_response["text"], request.count + len(exclusions or []))
+        # The prompt does not ask the model to self-check; the output rules are enforced here instead
+        with timed("validation"):
+            items, fixes = enforce_recommendations(items, request.count + len(exclusions or []), exclusions or [])
+        if fixes:
+            logger.info(f"Applied {len(fixes)} output fixes: {'; '.join(fixes)}")
+        # A routing client reports the provider that actually served the call
+        return items, llm_response.get("provider") or llm_client.provider_name
+
+    async def _fill_missing(
+        self,
+        request: RecommendationRequest,
+        recommendations: List[GeneralRecommendationItem],
+    ) -> List[GeneralRecommendationItem]:
+        """
+        Top up an under-delivered generation.
+
+        When some usable items came back, a short follow-up asks for just the missing count and excludes
+        the stores already used. Only when nothing usable came back is the full generation repeated.
+        """
+        recommendations = list(recommendations)
+        for _ in range(self.settings.recommendation_topup_attempts):
+            missing = request.count - len(recommendations)
+            if missing <= 0:
+                break
+            if not recommendations:
+                logger.warning("LLM returned no usable recommendations; regenerating")
+                recommendations, _ = await self._generate_items(request)
+                continue
+
+            used_stores = [base_domain(item.store) for item in recommendations]
+            logger.info(f"LLM returned {len(recommendations)}/{request.count} usable recommendations; topping up {missing}")
+            extra, _ = await self._generate_items(request.model_copy(update={"count": missing}), exclusions=used_stores)
+            for item in extra:
+                if missing > 0 and base_domain(item.store) not in used_stores:
+                    recommendations.append(item)
+                    used_stores.append(base_domain(item.store))
+                    missing -= 1
+        return recommendations
+
+    def _stream_cache_hit(self, request: RecommendationRequest) -> Optional[RecommendationResponse]:
+        if self.cache is None or request.use_cache is False:
+            return None
+        return self.cache.get(self.cache_key(request))
+
+    async def admit_stream(self, request: RecommendationRequest) -> Optional[AdmissionSlot]:
+        """
+        Take the admission slots for streaming `request` before the response starts, so that a rejection
+        can still be answered with 429/503. None when admission is off or the stream will replay the cache.
+        Pass the slot to stream_recommendations, which releases it once the LLM is done.
+        """
+        if self.admission is None or self._stream_cache_hit(request) is not None:
+            return None
+        return await self.admission.acquire("recommend", self.llm_client.provider_name)
+
+    async def stream_recommendations(
+        self,
+        request: RecommendationRequest,
+        slot: Optional[AdmissionSlot] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate recommendations as a stream of events.
+
+        Yields {"event": ..., "data": ...} dicts: a "recommendation" for each item as soon as its JSON
+        object closes in the LLM token stream, an "enrichment" for each item Exa finds a URL for, and a
+        final "done". A cached response for the request is replayed instead of calling the LLM.
+        `slot` holds admission slots already taken with admit_stream; without it they are taken here.
+        """
+        start_time = time.perf_counter()
+        cache_key = self.cache_key(request) if self.cache is not None else None
+        cached = self._stream_cache_hit(request)
+        if cached is not None:
+            for index, item in enumerate(cached.recommendations):
+                yield {"event": "recommendation", "data": {"index": index, "item": item.model_dump()}}
+            replayed = cached.model_copy(update={"usage": LLMUsage()})
+            yield {"event": "done", "data": self._done_event(request, replayed, start_time)}
+            return
+
+        prompt_request = request.model_copy(update={"web_search_enabled": False})
+        with timed("prompt"):
+            system, prompt = create_recommendation_messages(
+                prompt_request,
+                compact=self.compact_schema,
+                self_check=self.settings.prompt_self_check,
+                structured=self.structured_output,
+            )
+        logger.info('Making streaming call to LLM for recommendations')
+
+        recommendations: List[GeneralRecommendationItem] = []
+        enrichments: List[asyncio.Task] = []
+        parser = JsonArrayStream()
+        chunks: List[str] = []
+
+        def accept(item: GeneralRecommendationItem) -> Dict[str, Any]:
+            index = len(recommendations)
+            recommendations.append(item)
+            if index == 0:
+                logger.info(f"Time to first recommendation: {time.perf_counter() - start_time:.3f}s")
+            if getattr(request, "web_search_enabled", False):
+                enrichments.append(asyncio.create_task(self._enrich_one(index, item)))
+            return {"event": "recommendation", "data": {"index": index, "item": item.model_dump()}}
+
+        def checked(item: GeneralRecommendationItem) -> Optional[GeneralRecommendationItem]:
+            """Apply the local output rules to a streamed item; None when its store was already streamed."""
+            item, _ = normalise_item(item)
+            if base_domain(item.store) in {base_domain(streamed.store) for streamed in recommendations}:
+                logger.info(f"Skipping streamed recommendation from repeated store {item.store}")
+                return None
+            return item
+
+        # The slots are held while the LLM generates, not while enrichment finishes
+        async with slot if slot is not None else self._admit():
+            served_by.set(None)
+            stream_params = {
+                "prompt": prompt,
+                "max_tokens": self.settings.recommendation_max_tokens,
+                "temperature": self.settings.recommendation_temperature,
+                "latency_mode": request.latency_mode,
+                "system": system,
+                "response_schema": self.response_schema,
+            }
+            # A stream reports no token counts; its time to first text and duration are kept instead
+            usage = LLMUsage(calls=1)
+            stream_start = time.perf_counter()
+            async with contextlib.aclosing(self.llm_client.generate_stream(**stream_params)) as stream:
+                async for chunk in stream:
+                    if usage.ttft_ms is None:
+                        usage.ttft_ms = (time.perf_counter() - stream_start) * 1000
+                    chunks.append(chunk)
+                    for raw in parser.feed(chunk):
+                        try:
+                            item = checked(self._build_item(loads_lenient(raw)))
+                        except (KeyError, TypeError, ValueError) as e:
+                            PARSE_FAILURES.inc()
+                            logger.warning(f"Skipping malformed streamed recommendation: {e}")
+                            continue
+                        if item is None:
+                            continue
+                        yield accept(item)
+                        if len(recommendations) >= request.count:
+                            break
+                    if len(recommendations) >= request.count:
+                        break
+            usage.llm_ms += (time.perf_counter() - stream_start) * 1000
+
+            truncated = parser.pending()
+            if recommendations and truncated is not None and len(recommendations) < request.count:
+                # Output was cut off (e.g. by the token cap): keep the last item if its required fields made it
+                try:
+                    item = checked(self._build_item(loads_lenient(close_truncated(truncated) or "")))
+                except (KeyError, TypeError, ValueError):
+                    logger.warning("Dropped truncated last streamed recommendation")
+                else:
+                    if item is not None:
+                        yield accept(item)
+
+            if not recommendations:
+                # Nothing arrived as a streamable array: parse the full text the usual way
+                items, _ = enforce_recommendations(self._parse_recommendations("".join(chunks), request.count), request.count)
+                for item in items:
+                    yield accept(item)
+
+            if len(recommendations) < request.count:
+                token = current_usage.set(usage)
+                try:
+                    completed = await self._fill_missing(request, recommendations)
+                finally:
+                    current_usage.reset(token)
+                for item in completed[len(recommendations):]:
+                    yield accept(item)
+        if not recommendations:
+            EMPTY_RESULTS.inc()
+
+        enrichment = EnrichmentReport(item_latency_ms=[None] * len(recommendations))
+        for finished in asyncio.as_completed(enrichments):
+            index, report = await finished
+            enrichment.attempted += report.attempted
+            enrichment.enriched += report.enriched
+            enrichment.timed_out += report.timed_out
+            enrichment.item_latency_ms[index] = report.item_latency_ms[0]
+            if report.enriched:
+                yield {
+                    "event": "enrichment",
+                    "data": {"index": index, "product_url": recommendations[index].product_url},
+                }
+
+        response = RecommendationResponse(
+            profile_id=request.profile.profile_id,
+            recommendations=recommendations,
+            generated_at=datetime.datetime.now().isoformat(),
+            provider=served_by.get() or self.llm_client.provider_name,
+            enrichment=enrichment if enrichments else None,
+            usage=usage,
+        )
+        if cache_key is not None and recommendations:
+            await self.cache.store(cache_key, response)
+        logger.info(f"Streaming recommendation took {time.perf_counter() - start_time:.6f} seconds end-to-end.")
+        log_usage(usage)
+        yield {"event": "done", "data": self._done_event(request, response, start_time)}
+
+    async def _enrich_one(self, index: int, item: GeneralRecommendationItem) -> Tuple[int, EnrichmentReport]:
+        """Enrich a single streamed item within the usual enrichment budget."""
+        try:
+            report = await enrich_items([item], client=self.exa_client, deadline_s=self.settings.exa_enrichment_budget)
+        except Exception as ex:
+            logger.warning(f"Exa enrichment failed for streamed item {index}: {ex}")
+            report = EnrichmentReport(item_latency_ms=[None])
+        return index, report
+
+    @staticmethod
+    def _done_event(request: RecommendationRequest, response: RecommendationResponse, start_time: float) -> Dict[str, Any]:
+        return {
+            "profile_id": request.profile.profile_id,
+            "count": len(response.recommendations),
+            "generated_at": response.generated_at,
+            "provider": response.provider,
+            "enrichment": response.enrichment.model_dump() if response.enrichment else None,
+            "usage": response.usage.model_dump() if response.usage else None,
+            "elapsed_ms": (time.perf_counter() - start_time) * 1000,
+        }
+
+    def _parse_llm_response(self, llm_text: str) -> List[dict]:
+        """Parse the JSON array from an LLM response, tolerating wrappers, noise and truncation."""
+        return parse_json_array(llm_text)
+
+    @staticmethod
+    def _build_item(item: dict) -> GeneralRecommendationItem:
+        """Create a general recommendation item from one parsed LLM object or compact row."""
+        item = expand_compact_item(item)
+        return GeneralRecommendationItem(
+            product=item["product"],
+            type=item["type"],
+            category=item["category"],
+            explanation=item["explanation"],
+            store=item["store"],
+            relevance_score=item.get("relevance_score", 0.5),
+            product_url=item.get("product_link") or f"https://{item.get('store', 'example.com')}",
+            product_image=item.get("image_url"),
+            product_cost=(item.get("price") or {}).get("display", "Price not available")
+        )
 
     def _parse_recommendations(self, llm_text: str, expected_count: int) -> list[GeneralRecommendationItem]:
         """Parse the LLM response text into RecommendationItem objects"""
-        # Try to extract JSON from the response
-        try:
-            recommendations_data = self._parse_llm_response(llm_text)
-
-            # Convert to RecommendationItem objects
-            recommendations = []
-            for item in recommendations_data[:expected_count]:
-                # Create general recommendation item
-                recommendation_item = GeneralRecommendationItem(
-                    product=item["product"],
-                    type=item["type"],
-                    category=item["category"],
-                    explanation=item["explanation"],
-                    store=item["store"],
-                    relevance_score=item.get("relevance_score", 0.5),
-                    product_url=item.get("product_link") or f"https://{item.get('store', 'example.com')}",
-                    product_image=item.get("image_url"),
-                    product_cost=item.get("price", {}).get("display", "Price not available")
-                )
-                recommendations.append(recommendation_item)
-            return recommendations
-        except (json.JSONDecodeError, KeyError, IndexError) as e:
-            # Fallback: Create a default recommendation if parsing fails
-            logger.error(f"Failed to create recommendation items: {e}")
-            return []
+        parsed = parse_structured(llm_text, RESPONSE_KEY) if self.structured_output else None
+        if parsed is None:
+            if self.structured_output:
+                logger.info("Response did not follow the structured output schema; parsing it leniently")
+            parsed = self._parse_llm_response(llm_text)
+        recommendations = []
+        for item in parsed:
+            if len(recommendations) >= expected_count:
+                break
+            # Drop only the malformed items; the rest are kept and topped up if needed
+            try:
+                recommendations.append(self._build_item(item))
+            except (KeyError, TypeError, ValueError) as e:
+                PARSE_FAILURES.inc()
+                logger.warning(f"Dropping malformed recommendation item: {e}")
+        return recommendations
             
\ No newline at end of file
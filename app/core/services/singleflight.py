@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight computation.
+
+    The first caller for a key starts the work as a task; callers arriving while it runs await the same
+    task. Each caller awaits it through a shield, so a caller that disconnects (is cancelled) only stops
+    waiting: the shared work carries on for the others, and finishes even if every caller has left so
+    its result can still land in the cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of the in-flight call for `key`, starting `compute()` if there is none."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(compute())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the outcome so a call nobody waits for any more does not log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight call failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
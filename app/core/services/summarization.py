@@ -1,14 +1,42 @@
+import contextlib
 import datetime
-from typing import Dict, Any
+import hashlib
+import json
+from typing import Dict, Any, Optional
 
+from app.api.schemas.output import LLMUsage
 from app.api.schemas.summarization import SummarizationRequest, SummarizationResponse
+from app.core.services.admission import AdmissionController
+from app.core.services.cache import ResponseCache
 from app.core.services.llm.base import LLMClient
+from app.core.services.llm.usage import log_usage, record_usage
+from app.settings.settings import LLMSettings, get_settings
 
 class SummarizationService:
     """Service for generating text summaries using an LLM."""
     
-    def __init__(self, llm_client: LLMClient):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        cache: Optional[ResponseCache] = None,
+        settings: Optional[LLMSettings] = None,
+        admission: Optional[AdmissionController] = None,
+    ):
+        """With `admission` set, each LLM call holds a "summarize" route slot and a provider slot; cache hits need none."""
         self.llm_client = llm_client
+        self.cache = cache
+        self.settings = settings or get_settings()
+        self.admission = admission
+
+    def cache_key(self, request: SummarizationRequest) -> str:
+        canonical = {
+            "text": request.text,
+            "max_length": request.max_length,
+            "format": request.format,
+            "provider": self.llm_client.provider_name,
+            "model": getattr(self.llm_client, "model", ""),
+        }
+        return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
         
     async def generate_summary(self, request: SummarizationRequest) -> SummarizationResponse:
         """
@@ -20,24 +48,43 @@ class SummarizationService:
         Returns:
             A summarization response with the generated summary
         """
+        if self.cache is None:
+            return await self._generate_summary(request)
+        response = await self.cache.get_or_compute(
+            self.cache_key(request),
+            lambda: self._generate_summary(request),
+            cacheable=lambda result: bool(result.summary),
+        )
+        return response.model_copy()
+
+    async def _generate_summary(self, request: SummarizationRequest) -> SummarizationResponse:
+        """Generate a summary with the LLM, bypassing the cache."""
         # Create a prompt for the LLM
         prompt = self._create_prompt(request)
         
         # Generate summary from the LLM
-        llm_response = await self.llm_client.generate(
-            prompt=prompt,
-            max_tokens=request.max_length,
-            temperature=0.3  # Lower temperature for more deterministic summaries
+        admit = contextlib.nullcontext() if self.admission is None else self.admission.admit(
+            "summarize", self.llm_client.provider_name
         )
+        async with admit:
+            llm_response = await self.llm_client.generate(
+                prompt=prompt,
+                max_tokens=request.max_length,
+                temperature=0.3  # Lower temperature for more deterministic summaries
+            )
         
         summary = llm_response["text"].strip()
+        usage = LLMUsage()
+        record_usage(llm_response, self.settings.llm_prices, usage)
+        log_usage(usage)
         
         return SummarizationResponse(
             summary=summary,
             original_text_length=len(request.text),
             summary_length=len(summary),
             generated_at=datetime.datetime.now().isoformat(),
-            provider=self.llm_client.provider_name
+            provider=llm_response.get("provider") or self.llm_client.provider_name,
+            usage=usage,
         )
         
     def _create_prompt(self, request: SummarizationRequest) -> str:
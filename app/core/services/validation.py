@@ -0,0 +1,120 @@
+import logging
+from typing import Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.websearch import base_domain
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("product", "type", "category", "explanation", "store")
+ITEM_TYPES = ("product", "experience")
+MAX_EXPLANATION_WORDS = 30
+
+
+def _link_problem(item: GeneralRecommendationItem) -> str:
+    """Why the item's product_url breaks the link rules (https, on the item's store), or "" when it does not."""
+    # https://example.com is the placeholder web search enrichment replaces
+    if not item.product_url or item.product_url == "https://example.com":
+        return ""
+    url = urlsplit(item.product_url)
+    if url.scheme != "https":
+        return f"product_url {item.product_url} is not https"
+    if base_domain(url.hostname or "") != base_domain(item.store):
+        return f"product_url {item.product_url} is not on {base_domain(item.store)}"
+    return ""
+
+
+def validate_recommendations(items: List[GeneralRecommendationItem], expected_count: int) -> List[str]:
+    """
+    Check a generation against the rules the prompt asks the model to follow.
+
+    Returns a list of human-readable problems; an empty list means the output is acceptable:
+    - exactly `expected_count` items
+    - one item per store (by base domain)
+    - every required field present and non-blank
+    - relevance_score within [0.0, 1.0]
+    - type is product or experience, explanation at most MAX_EXPLANATION_WORDS words
+    - product_url, when set, is https and on the item's store
+    """
+    problems = []
+    if len(items) != expected_count:
+        problems.append(f"expected {expected_count} items, got {len(items)}")
+
+    seen_stores = set()
+    for index, item in enumerate(items):
+        missing = [field for field in REQUIRED_FIELDS if not str(getattr(item, field, "") or "").strip()]
+        if missing:
+            problems.append(f"item {index}: missing {', '.join(missing)}")
+        store = base_domain(item.store) if item.store else ""
+        if store and store in seen_stores:
+            problems.append(f"item {index}: duplicate store {store}")
+        seen_stores.add(store)
+        if not 0.0 <= item.relevance_score <= 1.0:
+            problems.append(f"item {index}: relevance_score {item.relevance_score} out of range")
+        if item.type and item.type not in ITEM_TYPES:
+            problems.append(f"item {index}: unknown type {item.type}")
+        words = len(item.explanation.split())
+        if words > MAX_EXPLANATION_WORDS:
+            problems.append(f"item {index}: explanation has {words} words")
+        link_problem = _link_problem(item)
+        if link_problem:
+            problems.append(f"item {index}: {link_problem}")
+    return problems
+
+
+def normalise_item(item: GeneralRecommendationItem) -> Tuple[GeneralRecommendationItem, List[str]]:
+    """
+    Fix the rule breaks in one item that do not need the model: returns the fixed copy and what was fixed.
+
+    The score is clamped to [0.0, 1.0], the type is lower-cased, an over-long explanation is cut to
+    MAX_EXPLANATION_WORDS words and a product_url that is not https on the item's store is replaced
+    by the store's home page.
+    """
+    update = {}
+    fixes = []
+    score = min(1.0, max(0.0, item.relevance_score))
+    if score != item.relevance_score:
+        update["relevance_score"] = score
+        fixes.append(f"clamped relevance_score {item.relevance_score}")
+    if item.type and item.type != item.type.strip().lower():
+        update["type"] = item.type.strip().lower()
+        fixes.append(f"normalised type {item.type}")
+    words = item.explanation.split()
+    if len(words) > MAX_EXPLANATION_WORDS:
+        update["explanation"] = " ".join(words[:MAX_EXPLANATION_WORDS]).rstrip(",;:") + "…"
+        fixes.append(f"shortened a {len(words)}-word explanation")
+    if item.store and _link_problem(item):
+        update["product_url"] = f"https://{base_domain(item.store)}"
+        fixes.append(f"replaced product_url {item.product_url}")
+    return (item.model_copy(update=update) if update else item), fixes
+
+
+def enforce_recommendations(
+    items: List[GeneralRecommendationItem],
+    expected_count: int,
+    exclusions: Iterable[str] = (),
+) -> Tuple[List[GeneralRecommendationItem], List[str]]:
+    """
+    Make a generation follow the prompt's output rules locally, instead of asking the model to self-check.
+
+    Every item is normalised (see normalise_item). Items on a store already used (by base domain) or in
+    `exclusions` are dropped, and the list is cut to `expected_count`. Returns the kept items and a
+    description of every fix. A shortfall is left to the caller's top-up.
+    """
+    kept: List[GeneralRecommendationItem] = []
+    fixes: List[str] = []
+    used_stores = {base_domain(store) for store in exclusions}
+    for index, item in enumerate(items):
+        item, item_fixes = normalise_item(item)
+        fixes.extend(f"item {index}: {fix}" for fix in item_fixes)
+        store = base_domain(item.store)
+        if store in used_stores:
+            fixes.append(f"item {index}: dropped repeated or excluded store {store}")
+            continue
+        used_stores.add(store)
+        kept.append(item)
+    if len(kept) > expected_count:
+        fixes.append(f"dropped {len(kept) - expected_count} items over the requested {expected_count}")
+        kept = kept[:expected_count]
+    return kept, fixes
@@ -1,20 +1,32 @@
 import os
 import asyncio
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
-from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.api.schemas.recommendations import EnrichmentReport, GeneralRecommendationItem
+from app.core.services.cache import ResponseCache
+from app.core.services.disk_cache import DiskCache
+from app.core.services.metrics import ENRICHMENT_TIMEOUTS, STAGE_SECONDS
+from app.settings.settings import LLMSettings
 
 logger = logging.getLogger(__name__)
 
 EXA_ENDPOINT = "https://api.exa.ai/search"
 
-def _base_domain(domain: str) -> str:
+# Second-level suffixes under which the registrable domain has three labels (e.g. johnlewis.co.uk)
+_MULTI_PART_SUFFIXES = {"co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "ac.uk", "gov.uk", "com.au", "co.nz", "co.ie"}
+
+def base_domain(domain: str) -> str:
     if not domain:
         return ""
-    parts = domain.lower().split(".")
-    return ".".join(parts[-2:]) if len(parts) >= 2 else domain.lower()
+    host = urlsplit(domain if "//" in domain else f"//{domain}").hostname or ""
+    parts = host.lower().split(".")
+    if len(parts) >= 3 and ".".join(parts[-2:]) in _MULTI_PART_SUFFIXES:
+        return ".".join(parts[-3:])
+    return ".".join(parts[-2:]) if len(parts) >= 2 else host.lower()
 
 def _build_query(item: GeneralRecommendationItem) -> str:
     parts: List[str] = []
@@ -22,56 +34,256 @@ def _build_query(item: GeneralRecommendationItem) -> str:
         parts.append(item.product)
     if getattr(item, "category", None):
         parts.append(item.category)
-    dom = _base_domain(getattr(item, "store", "") or "")
+    dom = base_domain(getattr(item, "store", "") or "")
     if dom:
         parts.append(f"site:{dom}")
     parts.append("UK")
     q = " ".join(p for p in parts if p).strip()
     return q or "gift UK"
 
+
+class ExaClient:
+    """
+    Long-lived Exa search client.
+
+    Owns one aiohttp session with a tuned TCPConnector (per-host limit, DNS cache, keep-alive), so
+    connections to Exa are reused across recommendation requests, and one semaphore, so the
+    concurrency cap applies to all in-flight lookups in the process rather than per call.
+
+    With a `cache`, lookups are memoised per query: found URLs for the cache TTL, "no result" and
+    non-200 answers for the shorter `negative_ttl_s`. Identical queries already in flight share one
+    Exa call, so each distinct product costs at most one call per TTL window.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        endpoint: str = EXA_ENDPOINT,
+        concurrency: int = 6,
+        limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout_s: float = 12.0,
+        cache: Optional[ResponseCache] = None,
+        negative_ttl_s: float = 900,
+    ):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout_s = timeout_s
+        self.cache = cache
+        self.negative_ttl_s = negative_ttl_s
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.searches = 0
+        self.deduplicated = 0
+
+    @classmethod
+    def from_settings(cls, settings: LLMSettings, disk_cache: Optional[DiskCache] = None) -> "ExaClient":
+        cache = None
+        if settings.exa_cache_enabled:
+            cache = ResponseCache(
+                max_entries=settings.exa_cache_max_entries,
+                ttl_s=settings.exa_cache_ttl,
+                stale_ttl_s=0,
+                l2=disk_cache,
+                namespace="exa",
+            )
+        return cls(
+            settings.exa_api_key or os.getenv("EXA_API_KEY", ""),
+            endpoint=settings.exa_endpoint,
+            concurrency=settings.exa_concurrency,
+            limit_per_host=settings.exa_limit_per_host,
+            dns_cache_ttl=settings.exa_dns_cache_ttl,
+            keepalive_timeout=settings.exa_keepalive_timeout,
+            timeout_s=settings.exa_timeout,
+            cache=cache,
+            negative_ttl_s=settings.exa_negative_cache_ttl,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily: aiohttp sessions must be created inside a running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+            )
+        return self._session
+
+    async def warm_up(self) -> None:
+        """Resolve DNS and open a keep-alive connection to Exa ahead of the first lookup."""
+        parts = urlsplit(self.endpoint)
+        async with self._get_session().head(f"{parts.scheme}://{parts.netloc}/") as resp:
+            await resp.read()
+
+    async def search(self, query: str, num_results: int = 3) -> Optional[str]:
+        """
+        Return the URL of the first Exa result for `query`, from the cache when possible.
+
+        Returns None when Exa answers with a non-200 status or no results. Network errors and
+        timeouts are raised and never cached. Concurrent callers with the same query share one call,
+        which is shielded so a caller giving up does not cancel it for the others.
+        """
+        key = " ".join(query.split()).lower()
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            task = asyncio.create_task(self._cached_search(key, query, num_results))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Exa lookup failed for '{key}': {task.exception()}")
+
+    async def _cached_search(self, key: str, query: str, num_results: int) -> Optional[str]:
+        if self.cache is None:
+            return await self._search(query, num_results)
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._search(query, num_results),
+            cacheable=lambda url: True,
+            ttl_for=lambda url: None if url else self.negative_ttl_s,
+        )
+
+    async def _search(self, query: str, num_results: int) -> Optional[str]:
+        """Call Exa once, bypassing the cache."""
+        self.searches += 1
+        payload = {"query": query, "numResults": num_results}
+        async with self._semaphore:
+            async with self._get_session().post(self.endpoint, json=payload) as resp:
+                if resp.status != 200:
+                    return None
+                data = await resp.json()
+        first = (data.get("results") or [None])[0]
+        if not first:
+            return None
+        return first.get("url") or first.get("link")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "searches": self.searches,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._inflight),
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+async def enrich_items(
+    items: List[GeneralRecommendationItem],
+    *,
+    client: Optional[ExaClient] = None,
+    num_results: int = 3,
+    concurrency: int = 6,
+    timeout_s: float = 12.0,
+    deadline_s: Optional[float] = None,
+    lookups: Optional[Dict[str, asyncio.Future]] = None,
+) -> EnrichmentReport:
+    """
+    Fill missing product_url fields via Exa search, in place, and report what happened.
+    - Uses the shared `client` when given; otherwise opens a short-lived one for this call.
+    - Leaves items unchanged if no API key or items empty.
+    - Only updates items whose product_url is missing or the default placeholder.
+    - Each lookup races `deadline_s`: items finished by then keep their URL, the rest are left as is.
+      With a shared client, unfinished lookups keep running in the background and fill its cache.
+    - `lookups` memoises query -> lookup across calls (e.g. a whole batch), so each distinct query
+      is searched once however many calls share it.
+    """
+    report = EnrichmentReport(item_latency_ms=[None] * len(items))
+    owns_client = client is None
+    if owns_client:
+        client = ExaClient(os.getenv("EXA_API_KEY", ""), concurrency=concurrency, timeout_s=timeout_s)
+    if not client.enabled or not items:
+        return report
+
+    # Items sharing a query are looked up once
+    pending: Dict[str, List[int]] = {}
+    for index, it in enumerate(items):
+        if getattr(it, "product_url", None) and it.product_url != "https://example.com":
+            continue
+        pending.setdefault(_build_query(it), []).append(index)
+    report.attempted = sum(len(group) for group in pending.values())
+
+    start = time.perf_counter()
+
+    def lookup(query: str):
+        if lookups is None:
+            return client.search(query, num_results=num_results)
+        if query not in lookups:
+            lookups[query] = asyncio.ensure_future(client.search(query, num_results=num_results))
+        return asyncio.shield(lookups[query])
+
+    async def fetch_one(query: str, group: List[int]):
+        try:
+            url = await lookup(query)
+        except Exception as e:
+            url = None
+            logger.debug(f"Exa enrich error: {e}")
+        latency_ms = (time.perf_counter() - start) * 1000
+        for index in group:
+            report.item_latency_ms[index] = latency_ms
+            if url:
+                items[index].product_url = url
+                report.enriched += 1
+
+    tasks = {asyncio.create_task(fetch_one(query, group)): group for query, group in pending.items()}
+    try:
+        if tasks:
+            _, unfinished = await asyncio.wait(tasks, timeout=deadline_s)
+            for task in unfinished:
+                # Only the wrapper is cancelled; the shared lookup itself is shielded and carries on
+                task.cancel()
+                report.timed_out += len(tasks[task])
+    finally:
+        if owns_client:
+            await client.close()
+
+    report.elapsed_ms = (time.perf_counter() - start) * 1000
+    STAGE_SECONDS.labels("enrichment").observe(report.elapsed_ms / 1000)
+    ENRICHMENT_TIMEOUTS.inc(report.timed_out)
+    return report
+
+
 async def enrich_with_exa_async(
     items: List[GeneralRecommendationItem],
     *,
+    client: Optional[ExaClient] = None,
     num_results: int = 3,
     concurrency: int = 6,
     timeout_s: float = 12.0,
 ) -> List[GeneralRecommendationItem]:
     """
     Fill missing product_url fields via Exa search.
+    - Uses the shared `client` when given; otherwise opens a short-lived one for this call.
     - Leaves items unchanged if no API key or items empty.
     - Only updates items whose product_url is missing or the default placeholder.
     """
-    key = os.getenv("EXA_API_KEY")
-    if not key or not items:
-        return items
-
-    headers = {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
-    timeout = aiohttp.ClientTimeout(total=timeout_s)
-    sem = asyncio.Semaphore(concurrency)
-
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        async def fetch_one(it: GeneralRecommendationItem):
-            try:
-                if getattr(it, "product_url", None) and it.product_url != "https://example.com":
-                    return
-                query = _build_query(it)
-                payload = {"query": query, "numResults": num_results}
-                async with sem:
-                    async with session.post(EXA_ENDPOINT, json=payload) as resp:
-                        if resp.status != 200:
-                            return
-                        data = await resp.json()
-                first = (data.get("results") or [None])[0]
-                if not first:
-                    return
-                url = first.get("url") or first.get("link")
-                if url:
-                    it.product_url = url
-            except Exception as e:
-                logger.debug(f"Exa enrich error: {e}")
-
-        await asyncio.gather(*(fetch_one(it) for it in items))
-
+    await enrich_items(items, client=client, num_results=num_results, concurrency=concurrency, timeout_s=timeout_s)
     return items
 
-__all__ = ["enrich_with_exa_async"]
\ No newline at end of file
+__all__ = ["ExaClient", "base_domain", "enrich_items", "enrich_with_exa_async"]
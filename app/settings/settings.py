@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -57,7 +57,16 @@ class LLMSettings(BaseSettings):
     
     # LLM provider settings
     # ToDo: make this configurable in client initialization
-    llm_provider: str = "gemini"  # Options: claude, openai, gemini, gemma, flash
+    llm_provider: str = "gemini"  # Options: claude, openai, gemini, gemma, flash, router
+
+    # Routing settings (llm_provider="router"): each call goes to the healthiest of router_providers
+    # Preference order; providers that cannot be configured (e.g. no API key) are skipped
+    router_providers: List[str] = ["gemini", "claude", "openai"]
+    router_window: int = 100  # recent calls per provider used for p50/p95 and error rate
+    router_min_samples: int = 5  # calls before a provider is ranked on its own latency
+    router_failure_threshold: int = 5  # consecutive failures that open a provider's circuit breaker
+    router_open_seconds: float = 30.0  # how long an open breaker keeps traffic away
+    router_error_penalty: float = 4.0  # p95 is scaled by 1 + penalty * error_rate when ranking
     
     # Claude settings
     claude_api_key: str = ""
@@ -81,6 +90,106 @@ class LLMSettings(BaseSettings):
     
     # Timeout settings
     request_timeout: int = 30  # seconds
+
+    # USD per million tokens by model, [input, output] or [input, output, cached input], e.g. {"gpt-4o": [2.5, 10, 1.25]}.
+    # Responses report cost_usd for the calls whose model is listed here.
+    llm_prices: Dict[str, List[float]] = {}
+
+    # Output cap for recommendation generations. The parser recovers complete items from truncated output.
+    # Gemini 2.5 counts thinking tokens against the cap, so its client adds a thinking allowance on top.
+    recommendation_max_tokens: int = 8192
+    recommendation_temperature: float = 0.7
+    # Output schema asked of the LLM: verbose objects, or compact positional rows (fewer output tokens per item)
+    prompt_schema: str = "verbose"  # Options: verbose, compact
+    # Keep the SELF-CHECK block in the prompt; the output rules are enforced locally either way
+    prompt_self_check: bool = False
+    # Constrain the output to the item JSON schema with the provider's structured output mode (verbose schema only)
+    llm_structured_output: bool = True
+    # Follow-up generations when the LLM returns fewer items than requested (0 disables)
+    recommendation_topup_attempts: int = 1
+    recommendation_single_flight: bool = True  # identical concurrent requests share one generation
+    # Requests for at least this many items are split into parallel shards of about shard_size items (0 disables)
+    recommendation_shard_min_count: int = 6
+    recommendation_shard_size: int = 3
+    recommendation_max_shards: int = 4
+    # Extra items each shard asks for, so the merge can drop clashing stores without a serial top-up
+    recommendation_shard_spares: int = 1
+
+    # Execution settings
+    # native: use the async SDK clients; executor: run the sync SDKs on a bounded thread pool
+    llm_async_mode: str = "native"  # Options: native, executor
+    llm_executor_workers: int = 16
+
+    # Model cascade for /recommend: the fast model answers first, the llm_provider model only when its
+    # output fails validation or the request is high_value
+    recommendation_cascade_enabled: bool = False
+    cascade_fast_provider: str = "gemini"
+    cascade_fast_model: str = "gemini-2.5-flash-preview-04-17"
+
+    # Hedged recommendation generations (opt-in): a slow call gets a second, racing call
+    llm_hedging_enabled: bool = False
+    llm_hedge_percentile: float = 0.9  # hedge once the call is slower than this share of recent calls
+    llm_hedge_budget: float = 0.1  # max extra calls as a share of all calls
+    llm_hedge_min_delay: float = 0.5  # seconds; never hedge sooner than this
+    llm_hedge_provider: str = ""  # provider for the hedged call; empty means the same provider
+
+    # Adaptive per-provider concurrency (AIMD): grows while latency holds, backs off on slowdowns and 429s
+    llm_adaptive_concurrency: bool = True
+    llm_concurrency_initial: int = 16
+    llm_concurrency_min: int = 1
+    llm_concurrency_max: int = 128
+    llm_latency_tolerance: float = 2.0  # back off once latency exceeds this multiple of the baseline
+
+    # Connection pool settings, shared by all requests to a provider
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 60.0  # seconds
+    http2_enabled: bool = False  # requires the h2 package
+    llm_warm_up: bool = True  # open provider connections in the app start handler
+
+    # Admission control for /recommend and /summarize: a request needs a route slot and a provider slot
+    admission_enabled: bool = True
+    admission_route_concurrency: int = 32  # default per route
+    admission_provider_concurrency: int = 32  # default per LLM provider, shared by all routes
+    admission_route_limits: Dict[str, int] = {}  # per-route overrides, e.g. {"summarize": 8}
+    admission_provider_limits: Dict[str, int] = {}  # per-provider overrides, e.g. {"claude": 16}
+    admission_max_queue: int = 64  # waiting requests per limiter before answering 429
+    admission_max_wait: float = 10.0  # seconds a request may wait before answering 503
+    admission_retry_after: int = 2  # Retry-After seconds sent with rejections
+
+    # Exa web search settings
+    exa_api_key: str = ""
+    exa_endpoint: str = "https://api.exa.ai/search"
+    exa_concurrency: int = 6  # shared by all in-flight requests
+    exa_limit_per_host: int = 20
+    exa_dns_cache_ttl: int = 300  # seconds
+    exa_keepalive_timeout: float = 60.0  # seconds
+    exa_timeout: float = 12.0  # seconds
+    exa_enrichment_budget: float = 8.0  # seconds per /recommend; unfinished lookups continue in the background
+    exa_cache_enabled: bool = True
+    exa_cache_max_entries: int = 10000
+    exa_cache_ttl: int = 86400  # seconds a found product URL is reused
+    exa_negative_cache_ttl: int = 900  # seconds "no result" and non-200 answers are reused
+
+    # Batch recommendation settings
+    batch_concurrency: int = 4  # default requests generated at once per batch
+    batch_max_concurrency: int = 16  # upper bound a batch may ask for
+    batch_max_requests: int = 500
+
+    # Recommendation response cache settings
+    recommendation_cache_enabled: bool = True
+    recommendation_cache_max_entries: int = 1024
+    recommendation_cache_ttl: int = 900  # seconds a cached response is served as fresh
+    recommendation_cache_stale_ttl: int = 3600  # further seconds it is served while refreshed in the background
+
+    # Summary cache settings
+    summary_cache_enabled: bool = True
+    summary_cache_max_entries: int = 1024
+    summary_cache_ttl: int = 86400  # seconds
+
+    # Shared on-disk cache tier (SQLite, WAL mode) used by all workers on the host; empty path disables it
+    disk_cache_path: str = ""
+    disk_cache_max_mb: int = 256
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request aiohttp session vs. the shared ExaClient.
+
+Runs `--requests` sequential recommendation-sized enrichment passes (`--items` lookups each)
+against a local fake Exa server and reports latency per pass and the number of TCP connections
+the server saw. Against the real api.exa.ai the per-request variant also pays DNS and TLS on
+every pass, so the gap is larger than on localhost.
+
+    python -m benchmarks.bench_exa_session --requests 50 --items 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.websearch import ExaClient, enrich_with_exa_async
+from benchmarks.fake_exa import FakeExaServer
+
+
+def make_items(n: int):
+    return [
+        GeneralRecommendationItem(
+            product=f"Product {i}",
+            type="product",
+            category="books",
+            explanation="bench",
+            store="waterstones.com",
+            relevance_score=0.5,
+        )
+        for i in range(n)
+    ]
+
+
+async def run(requests: int, items: int, shared: bool, latency: float):
+    server = FakeExaServer(latency=latency)
+    endpoint = await server.start()
+    client = ExaClient("bench", endpoint=endpoint) if shared else None
+    timings = []
+    try:
+        if client is not None:
+            await client.warm_up()
+        for _ in range(requests):
+            per_call = client or ExaClient("bench", endpoint=endpoint)
+            start = time.perf_counter()
+            await enrich_with_exa_async(make_items(items), client=per_call)
+            if client is None:
+                # Mirrors the old behaviour: the session is torn down after every request
+                await per_call.close()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if client is not None:
+            await client.close()
+        await server.stop()
+    return timings, len(server.connections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake Exa processing time in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'p50 (ms)':>10}{'p95 (ms)':>10}{'connections':>14}")
+    for label, shared in (("per-request", False), ("shared", True)):
+        timings, connections = asyncio.run(run(args.requests, args.items, shared, args.latency))
+        timings.sort()
+        p50 = statistics.median(timings) * 1000
+        p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+        print(f"{label:<14}{p50:>10.2f}{p95:>10.2f}{connections:>14}")
+
+
+if __name__ == "__main__":
+    main()
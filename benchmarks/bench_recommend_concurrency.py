@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for POST /recommend.
+
+Fires N parallel /recommend calls at the ASGI app with the Claude SDK replaced by a fake that
+answers after a fixed latency. With non-blocking clients the wall-clock time of N calls should be
+roughly that of one call; with the old inline (blocking) SDK call it grows linearly with N.
+
+    python -m benchmarks.bench_recommend_concurrency --parallel 10 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.api.controllers.routes import get_recommendation_service
+from app.asgi import app
+from app.core.services.llm.anthropic import ClaudeClient
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings
+
+SAMPLE_REQUEST = {
+    "profile": {"profile_id": "bench_001", "age": 30, "gender": "female", "relationship": "sister"},
+    "location": "Manchester, UK",
+    "upcoming_event": "birthday",
+    "profile_interests": ["art", "books", "coffee"],
+    "count": 3,
+    "web_search_enabled": False,
+}
+
+SAMPLE_OUTPUT = json.dumps([
+    {
+        "product": f"Gift {i}",
+        "type": "product",
+        "category": "books",
+        "explanation": "A thoughtful pick for her love of reading.",
+        "store": f"store{i}.co.uk",
+        "relevance_score": 0.9 - i / 10,
+    }
+    for i in range(3)
+])
+
+
+def build_client(latency: float, blocking: bool) -> ClaudeClient:
+    """Build a Claude client whose SDK answers after `latency` seconds."""
+    reply = SimpleNamespace(content=[SimpleNamespace(type="text", text=SAMPLE_OUTPUT)])
+
+    async def create_async(**_):
+        await asyncio.sleep(latency)
+        return reply
+
+    def create_blocking(**_):
+        time.sleep(latency)
+        return reply
+
+    settings = LLMSettings(claude_api_key="bench", _env_file=None)
+    client = ClaudeClient(settings)
+    if blocking:
+        # Reproduces the previous behaviour: a sync SDK call made inline from the coroutine
+        async def create_inline(**kwargs):
+            return create_blocking(**kwargs)
+
+        client.client = SimpleNamespace(messages=SimpleNamespace(create=create_inline))
+    else:
+        client.client = SimpleNamespace(messages=SimpleNamespace(create=create_async))
+    return client
+
+
+async def run(parallel: int, latency: float, blocking: bool) -> float:
+    """Send `parallel` concurrent /recommend requests and return the wall-clock time."""
+    llm_client = build_client(latency, blocking)
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(llm_client)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(http.post("/recommend", json=SAMPLE_REQUEST) for _ in range(parallel))
+            )
+            elapsed = time.perf_counter() - start
+        assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+        return elapsed
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parallel", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated LLM latency in seconds")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'mode':<12}{'calls':>8}{'wall (s)':>12}{'x single call':>16}")
+    for label, blocking in (("blocking", True), ("async", False)):
+        single = asyncio.run(run(1, args.latency, blocking))
+        many = asyncio.run(run(args.parallel, args.latency, blocking))
+        print(f"{label:<12}{1:>8}{single:>12.2f}{1:>16.1f}")
+        print(f"{label:<12}{args.parallel:>8}{many:>12.2f}{many / single:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
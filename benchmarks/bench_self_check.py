@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+In-prompt SELF-CHECK vs. local output enforcement.
+
+For the prompt with and without its SELF-CHECK block this reports the system prompt size, then runs
+`--runs` generations and reports their latency and pass rate: the share of outputs that follow all
+output rules as the model returned them ("raw") and after enforce_recommendations ("enforced";
+a shortfall still fails, since the service tops it up with another call). It also times the local
+validator itself.
+
+Without `--provider` the generations come from a fake model that answers instantly with
+`--defect-rate` of its items breaking a rule (repeated store, score out of range, http link, long
+explanation), which exercises the validator but says nothing about model latency. With a provider
+(e.g. `--provider gemini`, API key in the environment) real generations are measured.
+
+    python -m benchmarks.bench_self_check --runs 200
+    python -m benchmarks.bench_self_check --provider gemini --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from app.api.schemas.recommendations import Gender, Profile, RecommendationRequest
+from app.core.services.llm.base import LLMClient
+from app.core.services.llm.llm_factory import get_llm_client
+from app.core.services.prompts.v1 import create_recommendation_messages
+from app.core.services.recommendation import RecommendationService
+from app.core.services.validation import enforce_recommendations, validate_recommendations
+from app.settings.settings import LLMSettings
+from benchmarks.bench_wire_schema import count_tokens
+
+SAMPLE_REQUEST = RecommendationRequest(
+    profile=Profile(profile_id="bench_001", age=30, gender=Gender.FEMALE, relationship="sister"),
+    location="Manchester, UK",
+    upcoming_event="birthday",
+    profile_interests=["art", "books", "coffee"],
+    count=5,
+    web_search_enabled=False,
+)
+
+
+class DefectiveLLMClient(LLMClient):
+    """Answers with `count` items, each breaking one output rule with probability `defect_rate`."""
+
+    model = "fake-model"
+
+    def __init__(self, count: int, defect_rate: float, seed: int = 0):
+        self.count = count
+        self.defect_rate = defect_rate
+        self.random = random.Random(seed)
+
+    def _item(self, i: int) -> dict:
+        item = {
+            "product": f"Gift {i}",
+            "type": "product",
+            "category": "books",
+            "explanation": "A thoughtful pick for her love of reading.",
+            "store": f"store{i}.co.uk",
+            "product_link": f"https://store{i}.co.uk/gift",
+            "relevance_score": 0.9,
+        }
+        if self.random.random() < self.defect_rate:
+            defect = self.random.choice(["store", "score", "link", "explanation"])
+            if defect == "store":
+                item["store"] = item["product_link"] = "store0.co.uk"
+            elif defect == "score":
+                item["relevance_score"] = 1.3
+            elif defect == "link":
+                item["product_link"] = f"http://store{i}.co.uk/gift"
+            else:
+                item["explanation"] = " ".join(["lovely"] * 40)
+        return item
+
+    async def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        # One item more than asked for, like a model that ignores the count now and then
+        items = [self._item(i) for i in range(self.count + (self.random.random() < self.defect_rate))]
+        return {"text": json.dumps(items), "model": self.model, "provider": self.provider_name}
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+
+async def run_variant(client: LLMClient, self_check: bool, runs: int):
+    service = RecommendationService(client, settings=LLMSettings(_env_file=None))
+    system, prompt = create_recommendation_messages(SAMPLE_REQUEST, self_check=self_check)
+    count = SAMPLE_REQUEST.count
+    latencies, raw_passes, enforced_passes, check_times = [], 0, 0, []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = await client.generate(prompt=prompt, system=system, max_tokens=8192, temperature=0.7)
+        latencies.append(time.perf_counter() - start)
+        items = service._parse_recommendations(response["text"], count + 1)
+
+        check_start = time.perf_counter()
+        raw_passes += not validate_recommendations(items, count)
+        enforced, _ = enforce_recommendations(items, count)
+        enforced_passes += not validate_recommendations(enforced, count)
+        check_times.append(time.perf_counter() - check_start)
+    return system, latencies, raw_passes / runs, enforced_passes / runs, check_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", default="", help="LLM provider to measure; empty uses the fake model")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--defect-rate", type=float, default=0.1, help="fake model only")
+    args = parser.parse_args()
+
+    if args.provider:
+        client = get_llm_client(LLMSettings(), args.provider)
+    else:
+        client = DefectiveLLMClient(SAMPLE_REQUEST.count, args.defect_rate)
+
+    print(f"{'variant':<12}{'system tok':>11}{'p50 (s)':>9}{'p95 (s)':>9}{'raw pass':>10}{'enforced':>10}{'check (us)':>12}")
+    for label, self_check in (("self-check", True), ("local", False)):
+        system, latencies, raw, enforced, checks = asyncio.run(run_variant(client, self_check, args.runs))
+        p95 = sorted(latencies)[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(f"{label:<12}{count_tokens(system):>11}{statistics.median(latencies):>9.2f}{p95:>9.2f}"
+              f"{raw:>10.0%}{enforced:>10.0%}{statistics.mean(checks) * 1e6:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Token-count comparison of the recommendation output schemas.
+
+Builds the same `--items` gifts in the shape each prompt asks for and counts their output tokens:
+the v1 template's nested objects (price, shipping, metadata), the current template's flat objects,
+and its compact rows (PROMPT_SCHEMA=compact). Output tokens are generated one after the other, so at
+`--tokens-per-second` the saving per item translates directly into latency. The prompt (input)
+tokens of each template are shown as well.
+
+Counts use tiktoken's cl100k_base when it is installed and about 4 characters per token otherwise.
+
+    python -m benchmarks.bench_wire_schema --items 5 --tokens-per-second 80
+"""
+
+import argparse
+import json
+
+from app.api.schemas.recommendations import Gender, Profile, RecommendationRequest
+from app.core.services.prompts.v1.prompt import create_recommendation_prompt, env
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional
+    tiktoken = None
+
+SAMPLE_REQUEST = RecommendationRequest(
+    profile=Profile(profile_id="bench_001", age=30, gender=Gender.FEMALE, relationship="sister"),
+    location="Manchester, UK",
+    upcoming_event="birthday",
+    profile_interests=["art", "books", "coffee"],
+    count=5,
+    web_search_enabled=False,
+)
+
+GIFTS = [
+    (
+        "Watercolour Masterclass", "experience", "art classes",
+        "A relaxed afternoon painting with a local artist, perfect for her creative streak.",
+        "artclasses.co.uk",
+    ),
+    (
+        "Signed First Edition Mystery", "product", "books",
+        "A signed first edition from her favourite crime writer to treasure on her shelf.",
+        "waterstones.com",
+    ),
+    (
+        "Single Origin Coffee Subscription", "product", "coffee",
+        "Three months of freshly roasted beans delivered to her door, ideal for slow weekend mornings.",
+        "pactcoffee.com",
+    ),
+    (
+        "Personalised Leather Journal", "product", "stationery",
+        "An embossed journal for sketches and notes, with her initials on the cover.",
+        "papier.com",
+    ),
+    (
+        "Barista Skills Workshop", "experience", "coffee",
+        "A hands-on session learning latte art, so her home coffee looks as good as it tastes.",
+        "baristaschool.co.uk",
+    ),
+]
+
+
+def count_tokens(text: str) -> int:
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    return round(len(text) / 4)
+
+
+def v1_item(product, kind, category, explanation, store, score):
+    return {
+        "product": product,
+        "type": kind,
+        "category": category,
+        "explanation": explanation,
+        "store": store,
+        "store_name": store.split(".")[0].title(),
+        "store_country": "UK",
+        "product_link": f"https://{store}/gifts/{product.lower().replace(' ', '-')}",
+        "image_url": None,
+        "price": {"min_gbp": 35, "max_gbp": 35, "display": "£35"},
+        "relevance_score": score,
+        "shipping": {"lead_time_days": 3, "delivery_method": "post", "ships_to": ["UK"]},
+        "personalisation_available": False,
+        "matching_signals": [category, "birthday"],
+        "suitability_flags": ["none"],
+        "metadata": {"location": None, "duration": None, "voucher_validity": None},
+    }
+
+
+def flat_item(product, kind, category, explanation, store, score):
+    return {
+        "product": product,
+        "type": kind,
+        "category": category,
+        "explanation": explanation,
+        "store": store,
+        "store_name": store.split(".")[0].title(),
+        "store_country": "UK",
+        "relevance_score": score,
+    }
+
+
+def compact_row(product, kind, category, explanation, store, score):
+    # Same order as COMPACT_FIELDS
+    return [product, kind[0], category, explanation, store, score]
+
+
+def render_objects(items) -> str:
+    # Models pretty-print object arrays the way the schema in the prompt is laid out
+    return json.dumps(items, indent=2, ensure_ascii=False)
+
+
+def render_rows(rows) -> str:
+    return "[\n" + ",\n".join(f"  {json.dumps(row, ensure_ascii=False)}" for row in rows) + "\n]"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="output decode speed of the model")
+    args = parser.parse_args()
+
+    gifts = [(*GIFTS[i % len(GIFTS)], round(0.95 - i * 0.05, 2)) for i in range(args.items)]
+    request = SAMPLE_REQUEST.model_copy(update={"count": args.items})
+    schemas = [
+        ("v1 nested", env.get_template("recommendation_prompt.j2").render(request=request, exclusions=[]),
+         render_objects([v1_item(*gift) for gift in gifts])),
+        ("objects", create_recommendation_prompt(request),
+         render_objects([flat_item(*gift) for gift in gifts])),
+        ("compact", create_recommendation_prompt(request, compact=True),
+         render_rows([compact_row(*gift) for gift in gifts])),
+    ]
+
+    print(f"counting with {'tiktoken cl100k_base' if tiktoken else '~4 chars per token'}; "
+          f"{args.items} items at {args.tokens_per_second:.0f} tokens/s")
+    print(f"{'schema':<14}{'prompt':>8}{'output':>8}{'per item':>10}{'decode (s)':>12}{'saved/item (ms)':>17}")
+    baseline = None
+    for label, prompt, output in schemas:
+        tokens = count_tokens(output)
+        per_item = tokens / args.items
+        baseline = per_item if baseline is None else baseline
+        saved_ms = (baseline - per_item) / args.tokens_per_second * 1000
+        print(f"{label:<14}{count_tokens(prompt):>8}{tokens:>8}{per_item:>10.1f}"
+              f"{tokens / args.tokens_per_second:>12.2f}{saved_ms:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Local stand-in for the Exa search API, used by the benchmarks.
+"""
+
+import asyncio
+import itertools
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+class FakeExaServer:
+    """Serves POST /search on localhost with a fixed (or per-query) processing latency."""
+
+    def __init__(self, latency: float = 0.0, status: int = 200, slow_queries: Optional[Dict[str, float]] = None):
+        self.latency = latency
+        # substring of the query -> latency override
+        self.slow_queries = slow_queries or {}
+        self.status = status
+        self.requests = 0
+        self.connections = set()
+        self._counter = itertools.count()
+        self._runner = None
+        self.endpoint = ""
+
+    async def _search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        body = await request.json()
+        latency = next((v for k, v in self.slow_queries.items() if k in body["query"]), self.latency)
+        if latency:
+            await asyncio.sleep(latency)
+        if self.status != 200:
+            return web.json_response({"error": "fake"}, status=self.status)
+        n = next(self._counter)
+        return web.json_response({"results": [{"url": f"https://shop.example.co.uk/{n}", "title": body["query"]}]})
+
+    async def _head(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/search", self._search)
+        app.router.add_route("HEAD", "/", self._head)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        self.endpoint = f"http://127.0.0.1:{port}/search"
+        return self.endpoint
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
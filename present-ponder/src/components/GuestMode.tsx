@@ -96,7 +96,8 @@ export default function GuestMode({ onExitGuest }: GuestModeProps) {
         profile_interests: selectedInterests,
         count: 4,
         notes: additionalNotes || undefined,
-        web_search_enabled: true
+        web_search_enabled: true,
+        latency_mode: "fast"
       };
 
       const API_BASE_URL = (import.meta as any).env?.VITE_API_BASE_URL || "http://localhost:8000";
@@ -99,7 +99,8 @@ export default function QuickRecommendation({ onBack, onProfileSaved }: QuickRec
         profile_interests: selectedInterests,
         count: 4,
         notes: additionalNotes || undefined,
-        web_search_enabled: true
+        web_search_enabled: true,
+        latency_mode: "fast"
       };
 
       const API_BASE_URL = (import.meta as any).env?.VITE_API_BASE_URL || "http://localhost:8000";
@@ -0,0 +1,137 @@
+"""
+Shared test fixtures: recommendation request and item factories, a scripted LLM client and a fake clock.
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, List, Optional
+
+import pytest
+
+from app.api.schemas.recommendations import Gender, Profile, RecommendationRequest
+from app.core.services.llm.base import LLMClient
+
+
+def _item(i: int, score: float = 0.9, **overrides) -> dict:
+    item = {
+        "product": f"Gift {i}",
+        "type": "product",
+        "category": "books",
+        "explanation": "test",
+        "store": f"store{i}.co.uk",
+        "relevance_score": score,
+    }
+    item.update(overrides)
+    return item
+
+
+def _request(count: int = 3, profile_id: str = "p1", **overrides) -> RecommendationRequest:
+    params = {
+        "profile": Profile(profile_id=profile_id, age=30, gender=Gender.FEMALE, relationship="sister"),
+        "location": "London, UK",
+        "upcoming_event": "birthday",
+        "profile_interests": ["books"],
+        "count": count,
+        "web_search_enabled": False,
+    }
+    params.update(overrides)
+    return RecommendationRequest(**params)
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Answers call N with outputs[N]; the last output repeats.
+
+    An output is raw text, a list or dict sent as JSON, an exception to raise, or a callable that takes
+    the prompt and returns one of those. Each call waits `delay` seconds before answering; streams send
+    the same text in `chunk_size` pieces. Prompts, keyword arguments and peak concurrency are recorded.
+    """
+
+    def __init__(
+        self,
+        outputs: Optional[List[Any]] = None,
+        delay: float = 0.0,
+        chunk_size: int = 11,
+        model: str = "fake-model",
+        provider: str = "fake",
+    ):
+        self.outputs = list(outputs) if outputs is not None else [[_item(1)]]
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.model = model
+        self.provider = provider
+        self.calls = 0
+        self.prompts: List[str] = []
+        self.kwargs: List[dict] = []
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    def _next_output(self, prompt: str, kwargs: dict) -> Any:
+        output = self.outputs[min(self.calls, len(self.outputs) - 1)]
+        self.calls += 1
+        self.prompts.append(prompt)
+        self.kwargs.append(kwargs)
+        return output(prompt) if callable(output) else output
+
+    @staticmethod
+    def _text(output: Any) -> str:
+        if isinstance(output, BaseException):
+            raise output
+        return output if isinstance(output, str) else json.dumps(output)
+
+    async def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        output = self._next_output(prompt, kwargs)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        return {"text": self._text(output), "model": self.model, "provider": self.provider_name}
+
+    async def generate_stream(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        text = self._text(self._next_output(prompt, kwargs))
+        await asyncio.sleep(self.delay)
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider
+
+
+class FakeClock:
+    """A monotonic clock for cache, breaker and limiter tests; move it by setting `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def make_item() -> Callable[..., dict]:
+    """Item dicts as the LLM returns them: Gift i from storei.co.uk, with field overrides."""
+    return _item
+
+
+@pytest.fixture
+def make_request() -> Callable[..., RecommendationRequest]:
+    """Recommendation requests for a 30-year-old sister's birthday in London, without web search."""
+    return _request
+
+
+@pytest.fixture
+def fake_llm() -> type:
+    """The FakeLLMClient class; build clients from it, or subclass it for per-test behaviour."""
+    return FakeLLMClient
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -0,0 +1,110 @@
+"""
+Tests for the adaptive (AIMD) LLM concurrency limit, including a simulation against a fake provider.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.services.admission import AdmissionRejected
+from app.core.services.llm.adaptive import AdaptiveLimit, AdaptiveLLMClient
+
+
+def _provider_latency(in_flight: int, capacity: int, base_s: float = 1.0) -> float:
+    """A provider that queues internally once more than `capacity` calls are in flight."""
+    return base_s * max(1.0, in_flight / capacity)
+
+
+def _simulate(limit: AdaptiveLimit, clock, capacity: int, seconds: int):
+    """Keep the limiter saturated; every simulated second each in-flight call finishes once."""
+    history = []
+    for _ in range(seconds):
+        in_flight = limit.current
+        latency = _provider_latency(in_flight, capacity)
+        throttled = in_flight > 3 * capacity
+        for _ in range(in_flight):
+            limit.on_sample(latency, in_flight, throttled=throttled)
+        clock.now += 1.0
+        history.append(limit.current)
+    return history
+
+
+def test_limit_tracks_provider_capacity(clock):
+    limit = AdaptiveLimit(initial=4, max_limit=200, clock=clock)
+
+    # Healthy provider: the limit climbs past its capacity until latency doubles (tolerance 2.0), then
+    # oscillates below that point without the provider ever throttling
+    history = _simulate(limit, clock, capacity=40, seconds=120)
+    assert max(history) > 40
+    assert all(40 <= value <= 2.5 * 40 for value in history[-30:])
+    assert limit.overloads == 0
+
+    # The provider's capacity drops: the limit backs off to the new level
+    history = _simulate(limit, clock, capacity=10, seconds=60)
+    assert all(10 <= value <= 3 * 10 for value in history[-30:])
+    assert limit.decreases > 2
+
+
+def test_baseline_resets_when_provider_is_slower_for_good(clock):
+    limit = AdaptiveLimit(initial=1, clock=clock)
+    limit.on_sample(1.0, 1)
+    # Even a single call takes 5s now: at min_limit that becomes the baseline instead of a backoff
+    limit.on_sample(5.0, 1)
+    limit.on_sample(5.0, 1)
+    assert limit.stats()["baseline_ms"] == 5000
+    assert limit.current == 2
+
+
+def test_overload_backs_off_once_per_cooldown(clock):
+    limit = AdaptiveLimit(initial=40, clock=clock)
+    for _ in range(10):
+        limit.on_sample(1.0, 40, throttled=True)
+    assert limit.current == 30
+    clock.now += 1.0
+    limit.on_sample(1.0, 40, throttled=True)
+    assert limit.current == 22
+    assert limit.stats()["overloads"] == 11
+
+
+def test_client_holds_calls_to_the_limit(fake_llm):
+    async def run():
+        provider = fake_llm(["ok"], delay=0.01)
+        client = AdaptiveLLMClient(provider, AdaptiveLimit(initial=3, max_limit=3))
+        results = await asyncio.gather(*(client.generate("hi") for _ in range(12)))
+        return provider, client, results
+
+    provider, client, results = asyncio.run(run())
+    assert all(result["text"] == "ok" for result in results)
+    assert provider.peak == 3
+    assert client.stats()["in_flight"] == 0
+    assert client.provider_name == "fake"
+
+
+def test_client_backs_off_on_provider_429(fake_llm):
+    async def run():
+        provider = fake_llm([Exception("Claude API error: Error code: 429")], delay=0.01)
+        client = AdaptiveLLMClient(provider, AdaptiveLimit(initial=8))
+        with pytest.raises(Exception):
+            await client.generate("hi")
+        return client
+
+    client = asyncio.run(run())
+    assert client.stats()["limit"] == 6
+    assert client.stats()["overloads"] == 1
+
+
+def test_backed_off_limit_rejects_instead_of_waiting(fake_llm):
+    async def run():
+        client = AdaptiveLLMClient(fake_llm(delay=0.5), AdaptiveLimit(initial=1, max_limit=1), max_wait_s=0.05)
+        first = asyncio.create_task(client.generate("hi"))
+        await asyncio.sleep(0)
+        start = asyncio.get_running_loop().time()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await client.generate("hi")
+        waited = asyncio.get_running_loop().time() - start
+        await first
+        return client, rejected.value, waited
+
+    client, rejected, waited = asyncio.run(run())
+    assert rejected.status_code == 503 and waited < 0.2
+    assert client.stats()["rejected"] == 1 and client.stats()["waiting"] == 0
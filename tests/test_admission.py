@@ -0,0 +1,181 @@
+"""
+Tests for admission control (ConcurrencyLimiter, AdmissionController and the 429/503 answers).
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.api.controllers.routes import get_recommendation_service
+from app.asgi import app
+from app.core.event_handlers import init_app_state
+from app.core.services.admission import AdmissionController, AdmissionRejected, ConcurrencyLimiter
+from app.core.services.cache import ResponseCache
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings, get_settings
+
+
+@pytest.fixture
+def slow_llm(fake_llm):
+    return fake_llm(delay=0.2)
+
+
+def test_limiter_queues_then_rejects():
+    async def run():
+        limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, max_wait_s=0.05, retry_after=3)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        # The queue is full: rejected straight away with 429
+        with pytest.raises(AdmissionRejected) as full:
+            await limiter.acquire()
+        # The queued request gives up after max_wait_s with 503
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await waiting
+        return limiter, full.value, timed_out.value
+
+    limiter, full, timed_out = asyncio.run(run())
+    assert (full.status_code, full.retry_after) == (429, 3)
+    assert timed_out.status_code == 503
+    assert limiter.stats() == {
+        "limit": 1, "in_flight": 1, "queue_depth": 0, "admitted": 1, "rejected_queue_full": 1, "rejected_timeout": 1,
+    }
+
+
+def test_release_hands_slot_to_next_waiter_in_order():
+    async def run():
+        limiter = ConcurrencyLimiter("test", limit=1, max_queue=5, max_wait_s=1.0)
+        await limiter.acquire()
+        order = []
+
+        async def worker(name):
+            await limiter.acquire()
+            order.append(name)
+            limiter.release()
+
+        tasks = [asyncio.create_task(worker(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        # A cancelled waiter is skipped; the slot goes to the next one
+        tasks[1].cancel()
+        limiter.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return limiter, order
+
+    limiter, order = asyncio.run(run())
+    assert order == ["a", "c"]
+    assert limiter.in_flight == 0
+
+
+def test_recommend_overflow_gets_429_with_retry_after(slow_llm, make_request):
+    init_app_state(app, LLMSettings(admission_route_concurrency=1, admission_max_queue=0, _env_file=None))
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(slow_llm, admission=app.state.admission)
+    request = make_request(count=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            first = asyncio.create_task(http.post("/recommend", json=request.model_dump(mode="json")))
+            await asyncio.sleep(0.05)
+            second = await http.post("/recommend", json=request.model_dump(mode="json"))
+            stats = await http.get("/stats")
+            return await first, second, stats
+
+    try:
+        first, second, stats = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+        init_app_state(app, get_settings())
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["retry-after"] == "2"
+    recommend = stats.json()["admission"]["routes"]["recommend"]
+    assert recommend["rejected_queue_full"] == 1
+
+
+def test_cache_hit_does_not_take_a_slot(slow_llm, make_request):
+    settings = LLMSettings(admission_route_concurrency=1, admission_max_queue=0, _env_file=None)
+    admission = AdmissionController(settings)
+    service = RecommendationService(
+        slow_llm, cache=ResponseCache(namespace="admission-test"), settings=settings, admission=admission
+    )
+    request = make_request(count=1)
+
+    async def run():
+        await service.generate_recommendations(request)
+        # With the only slot taken, a cache hit is still answered and a miss is turned away
+        async with admission.admit("recommend", slow_llm.provider_name):
+            cached = await service.generate_recommendations(request)
+            with pytest.raises(AdmissionRejected):
+                await service.generate_recommendations(request.model_copy(update={"location": "Leeds, UK"}))
+        return cached
+
+    assert [item.store for item in asyncio.run(run()).recommendations] == ["store1.co.uk"]
+
+
+def _post_while_full(path, request_json, service, hold_route):
+    """POST to `path` while another request holds the only `hold_route` slot; returns the response and stats."""
+    init_app_state(app, LLMSettings(admission_route_concurrency=1, admission_max_queue=0, _env_file=None))
+    service.admission = app.state.admission
+    app.dependency_overrides[get_recommendation_service] = lambda: service
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            async with app.state.admission.admit(hold_route):
+                rejected = await http.post(path, json=request_json)
+            admitted = await http.post(path, json=request_json)
+            return rejected, admitted, app.state.admission.stats()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+        init_app_state(app, get_settings())
+
+
+def test_stream_and_batch_are_admitted_before_the_response_starts(fake_llm, make_request):
+    request = make_request(count=1)
+    service = RecommendationService(fake_llm())
+    rejected, admitted, stats = _post_while_full(
+        "/recommend/stream", request.model_dump(mode="json"), service, "recommend"
+    )
+    assert rejected.status_code == 429 and rejected.headers["retry-after"] == "2"
+    assert admitted.status_code == 200 and "event: done" in admitted.text
+    assert stats["routes"]["recommend"]["in_flight"] == 0
+
+    batch = {"requests": [request.model_dump(mode="json")]}
+    rejected, admitted, stats = _post_while_full("/recommend/batch", batch, service, "batch")
+    assert rejected.status_code == 429 and rejected.headers["retry-after"] == "2"
+    assert admitted.status_code == 200 and "result" in admitted.json()
+    assert stats["routes"]["batch"]["in_flight"] == 0
+
+
+def test_rejections_after_the_response_started_carry_status_and_retry_after(fake_llm, make_request):
+    # E.g. the provider's adaptive limit turning the generation away once the stream is under way
+    llm = fake_llm([AdmissionRejected("fake: no LLM capacity", status_code=503, retry_after=2)])
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(llm)
+    request = make_request(count=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            stream = await http.post(
+                "/recommend/stream", json=request.model_dump(mode="json"), headers={"Accept": "application/x-ndjson"}
+            )
+            batch = await http.post("/recommend/batch", json={"requests": [request.model_dump(mode="json")]})
+        return stream, batch
+
+    try:
+        stream, batch = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+
+    error = json.loads(stream.text.splitlines()[-1])
+    assert error["event"] == "error"
+    assert (error["data"]["status_code"], error["data"]["retry_after"]) == (503, 2)
+    line = batch.json()
+    assert (line["status_code"], line["retry_after"]) == (503, 2) and "result" not in line
@@ -0,0 +1,63 @@
+"""
+Tests for the compact positional output schema.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.services.llm.base import LLMClient
+from app.core.services.prompts.v1 import create_recommendation_prompt, expand_compact_item
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings
+
+ROWS = [
+    ["Watercolour Masterclass", "e", "art classes", "A relaxed afternoon painting.", "artclasses.co.uk", 0.9],
+    ["Signed First Edition", "p", "books", "One for her shelf.", "waterstones.com", 0.8],
+]
+
+
+@pytest.fixture
+def compact_request(make_request):
+    return make_request(2, profile_interests=["art", "books"])
+
+
+def _service(client: LLMClient) -> RecommendationService:
+    return RecommendationService(client, settings=LLMSettings(prompt_schema="compact", _env_file=None))
+
+
+def test_rows_expand_to_item_fields():
+    item = expand_compact_item(ROWS[0])
+    assert item["type"] == "experience" and item["store"] == "artclasses.co.uk" and item["relevance_score"] == 0.9
+    assert expand_compact_item({"product": "x"}) == {"product": "x"}
+
+
+def test_compact_prompt_asks_for_rows(compact_request):
+    prompt = create_recommendation_prompt(compact_request, compact=True)
+    assert "COMPACT ROWS" in prompt and '"store_name"' not in prompt
+    assert "COMPACT ROWS" not in create_recommendation_prompt(compact_request)
+
+
+def test_service_parses_compact_rows(fake_llm, compact_request):
+    client = fake_llm([ROWS])
+    response = asyncio.run(_service(client).generate_recommendations(compact_request))
+    assert "COMPACT ROWS" in client.kwargs[0]["system"]
+    assert [(item.type, item.store) for item in response.recommendations] == [
+        ("experience", "artclasses.co.uk"),
+        ("product", "waterstones.com"),
+    ]
+
+
+def test_streamed_rows_and_truncated_last_row(fake_llm, compact_request):
+    # The second row is cut off after its store: it keeps the default relevance score
+    text = json.dumps(ROWS)[:-6]
+    client = fake_llm([text], chunk_size=7)
+
+    async def run():
+        return [event async for event in _service(client).stream_recommendations(compact_request)]
+
+    events = asyncio.run(run())
+    items = [event["data"]["item"] for event in events if event["event"] == "recommendation"]
+    assert [item["product"] for item in items] == ["Watercolour Masterclass", "Signed First Edition"]
+    assert items[1]["relevance_score"] == 0.5
@@ -0,0 +1,53 @@
+"""
+Tests for the shared on-disk cache tier.
+"""
+
+import asyncio
+
+from app.core.services.cache import ResponseCache
+from app.core.services.disk_cache import DiskCache
+
+
+def test_round_trip_and_expiry(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("exa", "q", {"url": "https://example.co.uk"}, ttl_s=60)
+    value, _ = cache.get("exa", "q")
+    assert value == {"url": "https://example.co.uk"}
+    assert cache.get("summary", "q") is None
+
+    cache.set("exa", "old", [1, 2], ttl_s=-1)
+    assert cache.get("exa", "old") is None
+    cache.close()
+
+
+def test_size_bounded_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=2000)
+    for i in range(20):
+        cache.set("ns", str(i), "x" * 200, ttl_s=60)
+    cache.evict()
+    assert cache.get("ns", "19") is not None
+    assert cache.get("ns", "0") is None
+    cache.close()
+
+
+def test_workers_share_entries_through_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    async def run():
+        # Two ResponseCaches over separate connections stand in for two worker processes
+        worker_a = ResponseCache(l2=DiskCache(path), namespace="recommendation")
+        worker_b = ResponseCache(l2=DiskCache(path), namespace="recommendation")
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"recommendations": ["gift"]}
+
+        first = await worker_a.get_or_compute("key", compute)
+        second = await worker_b.get_or_compute("key", compute)
+        return first, second, calls, worker_b.stats()
+
+    first, second, calls, stats = asyncio.run(run())
+    assert first == second
+    assert len(calls) == 1
+    assert stats["l2_hits"] == 1
@@ -0,0 +1,127 @@
+"""
+Tests for the shared Exa client against a local fake Exa server.
+"""
+
+import asyncio
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.cache import ResponseCache
+from app.core.services.websearch import ExaClient, enrich_items, enrich_with_exa_async
+from benchmarks.fake_exa import FakeExaServer
+
+
+def _items(n: int, prefix: str = "Product"):
+    return [
+        GeneralRecommendationItem(
+            product=f"{prefix} {i}",
+            type="product",
+            category="books",
+            explanation="test",
+            store="waterstones.com",
+            relevance_score=0.5,
+        )
+        for i in range(n)
+    ]
+
+
+def test_shared_client_reuses_connections_and_caps_concurrency():
+    async def run():
+        server = FakeExaServer(latency=0.05)
+        endpoint = await server.start()
+        client = ExaClient("test", endpoint=endpoint, concurrency=2)
+        try:
+            batches = [_items(3, prefix=f"Batch{b}") for b in range(4)]
+            await asyncio.gather(*(enrich_with_exa_async(batch, client=client) for batch in batches))
+        finally:
+            await client.close()
+            await server.stop()
+        return batches, server
+
+    batches, server = asyncio.run(run())
+    assert all(item.product_url.startswith("https://shop.example.co.uk/") for batch in batches for item in batch)
+    assert server.requests == 12
+    # The cap of 2 applies across all four concurrent enrichments
+    assert len(server.connections) <= 2
+
+
+def test_non_200_leaves_items_unchanged():
+    async def run():
+        server = FakeExaServer(status=429)
+        endpoint = await server.start()
+        client = ExaClient("test", endpoint=endpoint)
+        items = _items(2)
+        try:
+            await enrich_with_exa_async(items, client=client)
+        finally:
+            await client.close()
+            await server.stop()
+        return items
+
+    assert all(item.product_url is None for item in asyncio.run(run()))
+
+
+def test_identical_queries_cost_one_call():
+    async def run():
+        server = FakeExaServer(latency=0.05)
+        endpoint = await server.start()
+        client = ExaClient("test", endpoint=endpoint, cache=ResponseCache(stale_ttl_s=0))
+        try:
+            # Same products inside one batch and across concurrent requests
+            batches = [_items(2) + _items(2) for _ in range(3)]
+            await asyncio.gather(*(enrich_with_exa_async(batch, client=client) for batch in batches))
+            await enrich_with_exa_async(_items(2), client=client)
+        finally:
+            await client.close()
+            await server.stop()
+        return server, client
+
+    server, client = asyncio.run(run())
+    assert server.requests == 2
+    assert client.deduplicated == 4
+    assert client.cache.stats()["hits"] == 2
+
+
+def test_negative_results_cached_for_shorter_ttl(clock):
+    async def run():
+        server = FakeExaServer(status=429)
+        endpoint = await server.start()
+        cache = ResponseCache(ttl_s=3600, stale_ttl_s=0, clock=clock)
+        client = ExaClient("test", endpoint=endpoint, cache=cache, negative_ttl_s=60)
+        try:
+            assert await client.search("gift UK") is None
+            assert await client.search("gift UK") is None
+            first = server.requests
+            clock.now = 61
+            assert await client.search("gift UK") is None
+        finally:
+            await client.close()
+            await server.stop()
+        return first, server.requests
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_deadline_keeps_finished_lookups():
+    async def run():
+        server = FakeExaServer(latency=0.01, slow_queries={"Product 2": 0.5})
+        endpoint = await server.start()
+        client = ExaClient("test", endpoint=endpoint, cache=ResponseCache(stale_ttl_s=0))
+        items = _items(3)
+        try:
+            report = await enrich_items(items, client=client, deadline_s=0.2)
+            # The unfinished lookup keeps running and lands in the cache
+            await asyncio.sleep(0.5)
+            cached = client.cache.get_entry("product 2 books site:waterstones.com uk")
+        finally:
+            await client.close()
+            await server.stop()
+        return items, report, cached
+
+    items, report, cached = asyncio.run(run())
+    assert report.attempted == 3
+    assert report.enriched == 2
+    assert report.timed_out == 1
+    assert report.item_latency_ms[2] is None
+    assert all(latency is not None for latency in report.item_latency_ms[:2])
+    assert items[0].product_url and items[1].product_url and items[2].product_url is None
+    assert cached is not None and cached.value
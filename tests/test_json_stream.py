@@ -0,0 +1,45 @@
+"""
+Tests for the truncation-tolerant LLM output parser.
+"""
+
+from app.core.services.json_stream import parse_json_array
+
+ITEM = '{"product": "Tea set", "store": "whittard.co.uk", "relevance_score": 0.9}'
+
+
+def test_bare_and_wrapped_arrays():
+    assert parse_json_array(f"[{ITEM}]")[0]["product"] == "Tea set"
+    assert parse_json_array(f'{{"categories": [{ITEM}, {ITEM}]}}')[1]["store"] == "whittard.co.uk"
+
+
+def test_code_fences_prose_and_trailing_commas():
+    text = f"Here are the gifts:\n```json\n[{ITEM[:-1]},}}, {ITEM},]\n```\nEnjoy!"
+    assert len(parse_json_array(text)) == 2
+
+
+def test_comments_and_python_literals():
+    text = '[{"product": "Mug", // must be UK\n "personalised": True, "image_url": None, "link": "https://a.co.uk//x"}]'
+    parsed = parse_json_array(text)
+    assert parsed == [{"product": "Mug", "personalised": True, "image_url": None, "link": "https://a.co.uk//x"}]
+
+
+def test_truncated_output_keeps_complete_items():
+    text = f'[{ITEM}, {ITEM}, {{"product": "Scarf", "store": "boden.co.uk", "explanation": "Warm and'
+    parsed = parse_json_array(text)
+    assert len(parsed) == 3
+    assert parsed[2] == {"product": "Scarf", "store": "boden.co.uk"}
+
+
+def test_malformed_element_is_skipped_not_fatal():
+    text = f'[{ITEM}, {{"product": "Broken" "store": "x.co.uk"}}, {ITEM}]'
+    assert len(parse_json_array(text)) == 2
+
+
+def test_non_ascii_bare_word_drops_only_its_element():
+    assert parse_json_array('[{"a": 1}, {"b": é}]') == [{"a": 1}]
+    text = f'[{ITEM}, {{"product": "Scarf", "note": née}}, {ITEM}]'
+    assert len(parse_json_array(text)) == 2
+
+
+def test_no_array():
+    assert parse_json_array("I cannot help with that.") == []
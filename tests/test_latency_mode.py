@@ -0,0 +1,72 @@
+"""
+Tests for per-request latency modes and their provider mappings.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from app.core.services.llm.anthropic import ClaudeClient
+from app.core.services.llm.base import LatencyMode
+from app.core.services.llm.gemma import GemmaClient
+from app.core.services.llm.openai import OpenAIClient
+from app.core.services.recommendation import RecommendationService, recommendation_cache_key
+from app.settings.settings import LLMSettings
+
+
+def _settings(**overrides) -> LLMSettings:
+    params = {"claude_api_key": "test", "openai_api_key": "test", "gemma_api_key": "test", "_env_file": None}
+    params.update(overrides)
+    return LLMSettings(**params)
+
+
+def test_claude_thinking_budget_per_mode():
+    client = ClaudeClient(_settings(), model="claude-3-7-sonnet-20250219")
+    fast = client._latency_params(8192, 0.7, LatencyMode.FAST)
+    assert fast == {"max_tokens": 2048, "temperature": 0.7}
+    thorough = client._latency_params(8192, 0.7, LatencyMode.THOROUGH)
+    assert thorough == {"max_tokens": 8192 + 8192, "thinking": {"type": "enabled", "budget_tokens": 8192}}
+    # Models without extended thinking keep their usual parameters
+    older = ClaudeClient(_settings(), model="claude-3-5-haiku-20241022")
+    assert older._latency_params(8192, 0.7, LatencyMode.BALANCED) == {"max_tokens": 8192, "temperature": 0.7}
+
+
+def test_openai_reasoning_effort_per_mode():
+    reasoning = OpenAIClient(_settings(), model="o4-mini")
+    assert reasoning._latency_params(8192, 0.7, LatencyMode.FAST) == {
+        "max_completion_tokens": 8192, "reasoning_effort": "low",
+    }
+    chat = OpenAIClient(_settings(), model="gpt-4o")
+    assert chat._latency_params(8192, 0.7, LatencyMode.FAST) == {"max_tokens": 2048, "temperature": 0.7}
+    assert chat._latency_params(8192, 0.7, None) == {"max_tokens": 8192, "temperature": 0.7}
+
+
+def test_gemma_does_not_send_latency_mode():
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"generated_text": "ok"})
+
+    async def run():
+        client = GemmaClient(_settings())
+        await client.http_client.aclose()
+        client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await client.generate("hi", max_tokens=8192, latency_mode=LatencyMode.FAST)
+        await client.aclose()
+
+    asyncio.run(run())
+    assert "latency_mode" not in bodies[0]
+    assert bodies[0]["max_tokens"] == 2048
+
+
+def test_service_passes_latency_mode_and_keys_cache_on_it(fake_llm, make_request):
+    client = fake_llm()
+    service = RecommendationService(client)
+    asyncio.run(service.generate_recommendations(make_request(count=1, latency_mode="fast")))
+    assert client.kwargs[0]["latency_mode"] == LatencyMode.FAST
+
+    fast_key = recommendation_cache_key(make_request(count=1, latency_mode="fast"), "fake", "fake-model", "v1")
+    default_key = recommendation_cache_key(make_request(count=1), "fake", "fake-model", "v1")
+    assert fast_key != default_key
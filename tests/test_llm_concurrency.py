@@ -0,0 +1,102 @@
+"""
+Checks that the provider clients do not block the event loop while a generation is in flight.
+The SDK objects are replaced with fakes that take a fixed amount of time to answer.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.core.services.llm.anthropic import ClaudeClient
+from app.core.services.llm.google import GeminiClient
+from app.core.services.llm.openai import OpenAIClient
+from app.settings.settings import LLMSettings
+
+LATENCY = 0.2
+PARALLEL = 5
+
+
+def _settings(**overrides) -> LLMSettings:
+    return LLMSettings(
+        claude_api_key="test",
+        openai_api_key="test",
+        google_api_key="test",
+        _env_file=None,
+        **overrides,
+    )
+
+
+def _claude_reply():
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text="ok")])
+
+
+def _openai_reply():
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+
+async def _sleep_then(reply):
+    await asyncio.sleep(LATENCY)
+    return reply()
+
+
+def _block_then(reply):
+    time.sleep(LATENCY)
+    return reply()
+
+
+class _FakeGenerativeModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, *args, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return SimpleNamespace(text="ok")
+
+    def generate_content(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return SimpleNamespace(text="ok")
+
+
+async def _timed_parallel(client) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.generate(prompt="hi") for _ in range(PARALLEL)))
+    assert all(r["text"] == "ok" for r in results)
+    return time.perf_counter() - start
+
+
+def _assert_parallel(client):
+    elapsed = asyncio.run(_timed_parallel(client))
+    # Serial execution would take PARALLEL * LATENCY
+    assert elapsed < LATENCY * 2.5, f"{PARALLEL} calls took {elapsed:.2f}s"
+
+
+def test_claude_native_is_non_blocking():
+    client = ClaudeClient(_settings())
+    client.client = SimpleNamespace(messages=SimpleNamespace(create=lambda **_: _sleep_then(_claude_reply)))
+    _assert_parallel(client)
+
+
+def test_claude_executor_is_non_blocking():
+    client = ClaudeClient(_settings(llm_async_mode="executor"))
+    client.client = SimpleNamespace(messages=SimpleNamespace(create=lambda **_: _block_then(_claude_reply)))
+    _assert_parallel(client)
+
+
+def test_openai_native_is_non_blocking():
+    client = OpenAIClient(_settings())
+    completions = SimpleNamespace(create=lambda **_: _sleep_then(_openai_reply))
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    _assert_parallel(client)
+
+
+def test_openai_executor_is_non_blocking():
+    client = OpenAIClient(_settings(llm_async_mode="executor"))
+    completions = SimpleNamespace(create=lambda **_: _block_then(_openai_reply))
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    _assert_parallel(client)
+
+
+def test_gemini_is_non_blocking(monkeypatch):
+    monkeypatch.setattr("app.core.services.llm.google.genai.GenerativeModel", _FakeGenerativeModel)
+    _assert_parallel(GeminiClient(_settings()))
+    _assert_parallel(GeminiClient(_settings(llm_async_mode="executor")))
@@ -0,0 +1,122 @@
+"""
+Tests for hedged LLM generations.
+"""
+
+import asyncio
+
+from app.core.services.llm.base import LLMClient
+from app.core.services.llm.hedging import HedgedLLMClient
+
+
+class ScriptedLatencyClient(LLMClient):
+    """Answers call N after delays[N] seconds (the last delay repeats); raises for delays < 0 after |delay|."""
+
+    model = "fake-model"
+
+    def __init__(self, name: str, delays):
+        self.name = name
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(abs(delay))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if delay < 0:
+            raise Exception(f"{self.name} API error: 500")
+        return {"text": "ok", "model": self.model, "provider": self.name}
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+
+def _hedged(primary, alternate=None, **options):
+    params = {"min_samples": 5, "min_delay_s": 0.0, "percentile": 0.9, "budget": 0.5}
+    params.update(options)
+    return HedgedLLMClient(primary, alternate, **params)
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    async def run():
+        primary = ScriptedLatencyClient("gemini", [0.01] * 5 + [1.0])
+        alternate = ScriptedLatencyClient("flash", [0.01])
+        client = _hedged(primary, alternate)
+        for _ in range(5):
+            await client.generate("hi")
+        delay = client.hedge_delay()
+        start = asyncio.get_running_loop().time()
+        result = await client.generate("hi")
+        elapsed = asyncio.get_running_loop().time() - start
+        await asyncio.sleep(0)
+        return client, primary, result, elapsed, delay
+
+    client, primary, result, elapsed, delay = asyncio.run(run())
+    assert result["provider"] == "flash"
+    assert elapsed < 0.2
+    assert primary.cancelled == 1
+    assert client.stats()["hedges"] == 1 and client.stats()["hedge_wins"] == 1
+    # The cancelled primary counts as the hedge delay, a lower bound of its latency, not the hedge's time
+    assert client._latencies[-1] == delay
+
+
+def test_primary_latency_is_recorded_when_it_wins_a_hedge():
+    async def run():
+        primary = ScriptedLatencyClient("gemini", [0.01] * 5 + [0.1])
+        alternate = ScriptedLatencyClient("flash", [1.0])
+        client = _hedged(primary, alternate)
+        for _ in range(5):
+            await client.generate("hi")
+        result = await client.generate("hi")
+        return client, result
+
+    client, result = asyncio.run(run())
+    assert result["provider"] == "gemini"
+    assert client.stats()["hedges"] == 1
+    # Measured from the primary's start to its own answer
+    assert 0.1 <= client._latencies[-1] < 0.2
+
+
+def test_no_hedging_before_enough_samples():
+    async def run():
+        primary = ScriptedLatencyClient("gemini", [0.05])
+        client = _hedged(primary, min_samples=10)
+        for _ in range(5):
+            await client.generate("hi")
+        return client, primary
+
+    client, primary = asyncio.run(run())
+    assert primary.calls == 5
+    assert client.stats()["hedges"] == 0
+
+
+def test_budget_bounds_extra_calls():
+    async def run():
+        # Two calls in five are slower than the median, so 40% of calls would like a hedge
+        primary = ScriptedLatencyClient("gemini", [0.001, 0.001, 0.001, 0.03, 0.03] * 20)
+        alternate = ScriptedLatencyClient("flash", [0.03])
+        client = _hedged(primary, alternate, percentile=0.5, budget=0.1, max_burst=1.0)
+        for _ in range(60):
+            await client.generate("hi")
+        return client
+
+    client = asyncio.run(run())
+    assert 0 < client.hedges <= 0.1 * client.calls
+
+
+def test_failed_primary_falls_back_to_hedge():
+    async def run():
+        primary = ScriptedLatencyClient("gemini", [0.01] * 5 + [-0.1])
+        alternate = ScriptedLatencyClient("claude", [0.15])
+        client = _hedged(primary, alternate)
+        for _ in range(5):
+            await client.generate("hi")
+        return await client.generate("hi")
+
+    result = asyncio.run(run())
+    assert result["provider"] == "claude"
@@ -0,0 +1,64 @@
+"""
+Tests for the process-wide LLM client registry and pooled HTTP clients.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.services.llm.gemma import GemmaClient
+from app.core.services.llm.registry import LLMClientRegistry
+from app.settings.settings import LLMSettings
+
+
+def _settings(**overrides) -> LLMSettings:
+    return LLMSettings(gemma_api_key="test", llm_provider="gemma", _env_file=None, **overrides)
+
+
+def test_registry_reuses_clients():
+    registry = LLMClientRegistry(_settings())
+    assert registry.get() is registry.get("gemma")
+    asyncio.run(registry.aclose())
+
+
+def test_warm_up_failures_do_not_raise():
+    # No Claude key configured: warm-up must log and carry on
+    registry = LLMClientRegistry(_settings())
+    asyncio.run(registry.warm_up(["claude"]))
+
+
+def test_router_skips_providers_without_keys():
+    # Only Gemini and Claude are configured: OpenAI is left out instead of failing every request
+    settings = LLMSettings(
+        llm_provider="router", google_api_key="test", claude_api_key="test", openai_api_key="", _env_file=None
+    )
+    registry = LLMClientRegistry(settings)
+    assert list(registry.get().clients) == ["gemini", "claude"]
+
+    with pytest.raises(ValueError):
+        LLMClientRegistry(LLMSettings(llm_provider="router", router_providers=["flash"], _env_file=None)).get()
+
+
+def test_gemma_reuses_shared_http_client():
+    seen_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_requests.append(request.url.path)
+        return httpx.Response(200, json={"generated_text": "ok"})
+
+    async def run():
+        client = GemmaClient(_settings())
+        pooled = client.http_client
+        client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await pooled.aclose()
+        for _ in range(3):
+            result = await client.generate(prompt="hi")
+            assert result["text"] == "ok"
+        http_client = client.http_client
+        await client.aclose()
+        return http_client
+
+    http_client = asyncio.run(run())
+    assert len(seen_requests) == 3
+    assert http_client.is_closed
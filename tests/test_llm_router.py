@@ -0,0 +1,102 @@
+"""
+Tests for the latency-aware routing LLM client and its circuit breakers.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.services.llm.registry import LLMClientRegistry
+from app.core.services.llm.router import ProviderHealth, RoutingLLMClient
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings
+
+
+@pytest.fixture
+def provider(fake_llm, make_item):
+    """A fake provider `name` answering one item after `delay`, or failing with a 503 when `fail`."""
+    def build(name: str, delay: float = 0.0, fail: bool = False):
+        output = Exception(f"{name} API error: 503 Service Unavailable") if fail else [make_item(1)]
+        return fake_llm([output], delay=delay, model=f"{name}-model", provider=name)
+
+    return build
+
+
+def _router(*providers, **options) -> RoutingLLMClient:
+    return RoutingLLMClient({provider.provider_name: provider for provider in providers}, **options)
+
+
+def test_breaker_opens_then_half_opens_for_one_trial(clock):
+    health = ProviderHealth(failure_threshold=3, open_s=10, clock=clock)
+    for _ in range(3):
+        health.record(None, ok=False)
+    assert health.state == "open" and not health.allow()
+    clock.now += 10
+    assert health.state == "half_open"
+    assert health.allow()
+    assert not health.allow()  # only one trial at a time
+    health.record(0.5, ok=True)
+    assert health.state == "closed"
+    assert health.trips == 1
+
+
+def test_failing_provider_fails_over_and_trips(provider):
+    async def run():
+        primary, backup = provider("gemini", fail=True), provider("claude")
+        router = _router(primary, backup, failure_threshold=2)
+        results = [await router.generate("hi") for _ in range(4)]
+        return primary, backup, router, results
+
+    primary, backup, router, results = asyncio.run(run())
+    assert [result["provider"] for result in results] == ["claude"] * 4
+    # After two failures the breaker keeps traffic away from the primary
+    assert primary.calls == 2
+    assert router.stats()["providers"]["gemini"]["state"] == "open"
+
+
+def test_traffic_moves_to_the_faster_provider(provider):
+    async def run():
+        slow, fast = provider("gemini", delay=0.03), provider("flash", delay=0.001)
+        router = _router(slow, fast, min_samples=2)
+        # Both providers have been measured (e.g. the flash samples came from failovers)
+        for measured in (slow, fast):
+            for _ in range(2):
+                router.health[measured.provider_name].record(measured.delay, ok=True)
+        results = [await router.generate("hi") for _ in range(3)]
+        return router, results
+
+    router, results = asyncio.run(run())
+    assert router.ranked() == ["flash", "gemini"]
+    assert {result["provider"] for result in results} == {"flash"}
+
+
+def test_all_providers_failing_raises_last_error(provider):
+    async def run():
+        router = _router(provider("gemini", fail=True), provider("claude", fail=True))
+        await router.generate("hi")
+
+    with pytest.raises(Exception, match="claude API error"):
+        asyncio.run(run())
+
+
+def test_response_reports_serving_provider(provider, make_request):
+    async def run():
+        router = _router(provider("gemini", fail=True), provider("claude"))
+        service = RecommendationService(router)
+        return await service.generate_recommendations(make_request(count=1))
+
+    response = asyncio.run(run())
+    assert response.provider == "claude"
+
+
+def test_registry_routes_over_shared_clients():
+    settings = LLMSettings(
+        llm_provider="router", router_providers=["gemma", "flash"], gemma_api_key="test", flash_api_key="test",
+        _env_file=None,
+    )
+    registry = LLMClientRegistry(settings)
+    router = registry.get()
+    assert isinstance(router, RoutingLLMClient)
+    assert router.clients["gemma"] is registry.get("gemma")
+    assert set(registry.stats()) == {"router", "gemma", "flash"}
+    asyncio.run(registry.aclose())
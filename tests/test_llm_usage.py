@@ -0,0 +1,137 @@
+"""
+Tests for LLM usage and timing metadata.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.schemas.output import LLMUsage
+from app.api.schemas.summarization import SummarizationRequest
+from app.core.services.llm.anthropic import ClaudeClient
+from app.core.services.llm.base import normalise_finish_reason
+from app.core.services.llm.openai import OpenAIClient
+from app.core.services.llm.usage import call_cost, record_usage
+from app.core.services.cache import ResponseCache
+from app.core.services.recommendation import RecommendationService
+from app.core.services.singleflight import SingleFlight
+from app.core.services.summarization import SummarizationService
+from app.settings.settings import LLMSettings
+
+PRICES = {"fake-model": [2.0, 10.0, 0.5]}
+
+
+def _settings(**overrides) -> LLMSettings:
+    return LLMSettings(claude_api_key="test", openai_api_key="test", llm_prices=PRICES, _env_file=None, **overrides)
+
+
+@pytest.fixture
+def usage_client(fake_llm, make_item):
+    """Reports the same token counts for every call; the first call is cut off by max_tokens."""
+    class UsageClient(fake_llm):
+        async def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+            response = await super().generate(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+            response.update(
+                input_tokens=1000,
+                output_tokens=200,
+                cached_tokens=800,
+                finish_reason="length" if self.calls == 1 else "stop",
+                latency_ms=50.0,
+            )
+            return response
+
+    return UsageClient([[make_item(1)], [make_item(2)]])
+
+
+def test_finish_reasons_are_normalised():
+    assert normalise_finish_reason("max_tokens") == "length"
+    assert normalise_finish_reason("end_turn") == "stop"
+    assert normalise_finish_reason(SimpleNamespace(name="MAX_TOKENS")) == "length"
+    assert normalise_finish_reason(None) is None
+
+
+def test_cost_uses_cached_input_price():
+    response = {"model": "fake-model", "input_tokens": 1000, "output_tokens": 200, "cached_tokens": 800}
+    assert call_cost(response, PRICES) == (200 * 2.0 + 800 * 0.5 + 200 * 10.0) / 1_000_000
+    assert call_cost({**response, "model": "unpriced"}, PRICES) is None
+    assert call_cost({"model": "fake-model"}, PRICES) is None
+
+
+def test_clients_report_usage():
+    async def claude_create(**params):
+        usage = SimpleNamespace(input_tokens=10, output_tokens=30, cache_read_input_tokens=500,
+                                cache_creation_input_tokens=0)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="ok")], usage=usage, stop_reason="max_tokens")
+
+    async def openai_create(**params):
+        usage = SimpleNamespace(prompt_tokens=510, completion_tokens=30,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=500))
+        choice = SimpleNamespace(message=SimpleNamespace(content="ok"), finish_reason="stop")
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+    claude = ClaudeClient(_settings())
+    claude.client = SimpleNamespace(messages=SimpleNamespace(create=claude_create))
+    openai = OpenAIClient(_settings())
+    openai.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=openai_create)))
+
+    claude_result = asyncio.run(claude.generate("request"))
+    openai_result = asyncio.run(openai.generate("request"))
+    assert (claude_result["input_tokens"], claude_result["cached_tokens"], claude_result["output_tokens"]) == (510, 500, 30)
+    assert (openai_result["input_tokens"], openai_result["cached_tokens"], openai_result["output_tokens"]) == (510, 500, 30)
+    assert claude_result["finish_reason"] == "length" and openai_result["finish_reason"] == "stop"
+    assert claude_result["latency_ms"] >= 0 and openai_result["latency_ms"] >= 0
+
+
+def test_recommendation_usage_sums_every_call(usage_client, make_request):
+    # Each call returns one item, so two items take the first call plus a top-up
+    service = RecommendationService(usage_client, settings=_settings())
+    response = asyncio.run(service.generate_recommendations(make_request(count=2)))
+
+    assert usage_client.calls == 2
+    usage = response.usage
+    assert (usage.calls, usage.input_tokens, usage.cached_tokens, usage.output_tokens) == (2, 2000, 1600, 400)
+    assert usage.truncated == 1 and usage.llm_ms == 100.0
+    call = {"model": "fake-model", "input_tokens": 1000, "output_tokens": 200, "cached_tokens": 800}
+    assert abs(usage.cost_usd - 2 * call_cost(call, PRICES)) < 1e-12
+
+
+def test_stream_reports_time_to_first_text(fake_llm, make_request):
+    async def run():
+        service = RecommendationService(fake_llm(delay=0.01), settings=_settings())
+        return [event async for event in service.stream_recommendations(make_request(count=1))]
+
+    done = asyncio.run(run())[-1]["data"]
+    assert done["usage"]["calls"] == 1 and done["usage"]["ttft_ms"] >= 10
+
+
+def test_cache_hits_and_shared_generations_report_no_calls(usage_client, make_request):
+    async def run():
+        cache = ResponseCache(namespace="usage-test")
+        service = RecommendationService(usage_client, cache=cache, settings=_settings(), single_flight=SingleFlight())
+        request = make_request(count=1)
+        leader, follower = await asyncio.gather(
+            service.generate_recommendations(request), service.generate_recommendations(request)
+        )
+        hit = await service.generate_recommendations(request)
+        replay = [event async for event in service.stream_recommendations(request)]
+        return leader, follower, hit, replay[-1]["data"]
+
+    leader, follower, hit, done = asyncio.run(run())
+    assert usage_client.calls == 1
+    assert leader.usage.calls == 1
+    assert follower.usage.calls == hit.usage.calls == done["usage"]["calls"] == 0
+    assert hit.usage.cost_usd is None
+
+
+def test_summary_reports_usage(usage_client):
+    service = SummarizationService(usage_client, settings=_settings())
+    response = asyncio.run(service.generate_summary(SummarizationRequest(text="Some long text.")))
+    assert response.usage.output_tokens == 200 and response.usage.cost_usd is not None
+
+
+def test_record_usage_without_a_current_response_only_counts_tokens():
+    record_usage({"model": "fake-model", "input_tokens": 1}, PRICES)
+    usage = LLMUsage()
+    record_usage({"model": "fake-model", "input_tokens": "n/a", "latency_ms": 5.0}, PRICES, usage)
+    assert usage.calls == 1 and usage.input_tokens == 0 and usage.cost_usd is None
@@ -0,0 +1,54 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.api.controllers.routes import get_recommendation_service
+from app.asgi import app
+from app.core.event_handlers import init_app_state
+from app.core.services.cache import ResponseCache
+from app.core.services.metrics import METRICS_AVAILABLE
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings, get_settings
+
+pytestmark = pytest.mark.skipif(not METRICS_AVAILABLE, reason="prometheus_client is not installed")
+
+
+def test_metrics_cover_the_recommendation_pipeline(fake_llm, make_item, make_request):
+    init_app_state(app, LLMSettings(_env_file=None))
+    cache = ResponseCache(namespace="metrics-test")
+    # One item that cannot be parsed and one good one
+    llm = fake_llm([[{"product": "Broken"}, make_item(1)]], model="metrics-model", provider="metrics-fake")
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(
+        llm, cache=cache, settings=LLMSettings(recommendation_topup_attempts=0, _env_file=None)
+    )
+    request = make_request(count=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            for _ in range(2):
+                await http.post("/recommend", json=request.model_dump(mode="json"))
+            return await http.get("/metrics")
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+        init_app_state(app, get_settings())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'llm_call_seconds_count{model="metrics-model",provider="metrics-fake"} 1.0' in text
+    assert 'cache_lookups_total{cache="metrics-test",result="miss"} 1.0' in text
+    assert 'cache_lookups_total{cache="metrics-test",result="hit"} 1.0' in text
+    for stage in ("prompt", "parse", "validation"):
+        assert f'recommendation_stage_seconds_count{{stage="{stage}"}}' in text
+    assert "recommendation_parse_failures_total" in text
+    # The /metrics request itself is in flight
+    assert "http_requests_in_flight 1.0" in text
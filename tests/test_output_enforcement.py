@@ -0,0 +1,47 @@
+"""
+Tests for enforcing the recommendation output rules locally.
+"""
+
+import asyncio
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.prompts.v1 import create_recommendation_system
+from app.core.services.recommendation import RecommendationService
+from app.core.services.validation import enforce_recommendations, validate_recommendations
+
+
+def test_enforcement_fixes_items_and_drops_repeats(make_item):
+    items = [
+        GeneralRecommendationItem(**make_item(1, relevance_score=1.4, product_url="http://store1.co.uk/a")),
+        GeneralRecommendationItem(**make_item(2, store="www.store1.co.uk")),
+        GeneralRecommendationItem(**make_item(3, explanation=" ".join(["word"] * 40), type="Experience")),
+        GeneralRecommendationItem(**make_item(4, store="excluded.co.uk")),
+        GeneralRecommendationItem(**make_item(5)),
+        GeneralRecommendationItem(**make_item(6)),
+    ]
+    assert validate_recommendations(items, 3)
+
+    kept, fixes = enforce_recommendations(items, 3, exclusions=["excluded.co.uk"])
+    assert [item.store for item in kept] == ["store1.co.uk", "store3.co.uk", "store5.co.uk"]
+    assert kept[0].relevance_score == 1.0 and kept[0].product_url == "https://store1.co.uk"
+    assert kept[1].type == "experience" and len(kept[1].explanation.split()) == 30
+    assert validate_recommendations(kept, 3) == []
+    assert len(fixes) == 7
+
+
+def test_prompt_leaves_self_check_out_by_default():
+    assert "SELF-CHECK" not in create_recommendation_system()
+    assert "SELF-CHECK" in create_recommendation_system(self_check=True)
+
+
+def test_streamed_repeated_store_is_skipped(fake_llm, make_item, make_request):
+    llm = fake_llm([[make_item(1), make_item(2, store="store1.co.uk"), make_item(3, relevance_score=2)]])
+    service = RecommendationService(llm)
+
+    async def run():
+        return [event async for event in service.stream_recommendations(make_request(count=2))]
+
+    events = asyncio.run(run())
+    items = [event["data"]["item"] for event in events if event["event"] == "recommendation"]
+    assert [item["store"] for item in items] == ["store1.co.uk", "store3.co.uk"]
+    assert items[1]["relevance_score"] == 1.0
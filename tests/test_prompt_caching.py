@@ -0,0 +1,81 @@
+"""
+Tests for the static system prompt prefix and how each provider caches it.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core.services.llm.anthropic import ClaudeClient
+from app.core.services.llm.google import GeminiClient
+from app.core.services.llm.openai import OpenAIClient
+from app.core.services.prompts.v1 import create_recommendation_messages
+from app.settings.settings import LLMSettings
+
+
+def _settings() -> LLMSettings:
+    return LLMSettings(claude_api_key="test", openai_api_key="test", google_api_key="test", _env_file=None)
+
+
+def test_system_prefix_is_identical_across_requests(make_request):
+    system, user = create_recommendation_messages(make_request())
+    other_system, other_user = create_recommendation_messages(
+        make_request(5, profile_interests=["hiking"]), exclusions=["store1.co.uk"], focus=["hiking"]
+    )
+    assert system == other_system
+    assert "hiking" not in system and "p1" not in system
+    assert user != other_user and "count: 5" in other_user
+
+
+def test_claude_marks_system_prompt_for_caching():
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        usage = SimpleNamespace(cache_read_input_tokens=812)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="ok")], usage=usage)
+
+    client = ClaudeClient(_settings())
+    client.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    result = asyncio.run(client.generate("request", system="rules"))
+
+    assert calls[0]["system"] == [{"type": "text", "text": "rules", "cache_control": {"type": "ephemeral"}}]
+    assert calls[0]["messages"] == [{"role": "user", "content": "request"}]
+    assert result["cached_tokens"] == 812
+
+
+def test_openai_sends_system_message_first():
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        usage = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=usage)
+
+    client = OpenAIClient(_settings())
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    result = asyncio.run(client.generate("request", system="rules"))
+
+    assert [message["role"] for message in calls[0]["messages"]] == ["system", "user"]
+    assert result["cached_tokens"] == 1024
+
+
+def test_gemini_reuses_one_model_per_system_instruction(monkeypatch):
+    created = []
+
+    class FakeGenerativeModel:
+        def __init__(self, model_name=None, system_instruction=None):
+            created.append(system_instruction)
+
+        async def generate_content_async(self, *args, **kwargs):
+            usage = SimpleNamespace(cached_content_token_count=640)
+            return SimpleNamespace(text="ok", usage_metadata=usage)
+
+    monkeypatch.setattr("app.core.services.llm.google.genai.GenerativeModel", FakeGenerativeModel)
+    client = GeminiClient(_settings())
+
+    async def run():
+        return [await client.generate("request", system="rules") for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert created == [None, "rules"]
+    assert results[-1]["cached_tokens"] == 640
@@ -0,0 +1,93 @@
+"""
+Tests for batch recommendations (BatchRecommendationService and the /recommend/batch route).
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.api.controllers.routes import get_recommendation_service
+from app.asgi import app
+from app.core.services.batch import BatchRecommendationService
+from app.core.services.recommendation import RecommendationService
+from app.core.services.websearch import ExaClient
+from benchmarks.fake_exa import FakeExaServer
+
+GENERATE_DELAY = 0.05
+
+
+@pytest.fixture
+def batch_llm(fake_llm, make_item):
+    """Answers every prompt with the same two items; fails for profiles named "fail"."""
+    items = [make_item(i, product_link="https://example.com") for i in (1, 2)]
+    return fake_llm(
+        [lambda prompt: RuntimeError("LLM unavailable") if "profile_id: fail" in prompt else items], delay=GENERATE_DELAY
+    )
+
+
+@pytest.fixture
+def batch_request(make_request):
+    """A request for two items per profile; each profile has its own interests, so none share a generation."""
+    def build(profile_id: str, **overrides):
+        params = {"profile_interests": [profile_id], "web_search_enabled": True, "use_cache": False}
+        params.update(overrides)
+        return make_request(2, profile_id, **params)
+
+    return build
+
+
+def test_batch_caps_concurrency_and_shares_enrichment(batch_llm, batch_request):
+    async def run():
+        server = FakeExaServer(latency=0.01)
+        endpoint = await server.start()
+        # No Exa cache: only the batch-wide lookup table can deduplicate
+        exa_client = ExaClient("test", endpoint=endpoint)
+        service = RecommendationService(batch_llm, exa_client=exa_client)
+        batch = BatchRecommendationService(service, concurrency=2)
+        try:
+            requests = [batch_request(f"p{i}") for i in range(5)] + [batch_request("fail")]
+            results = [result async for result in batch.run(requests)]
+        finally:
+            await exa_client.close()
+            await server.stop()
+        return server, results
+
+    server, results = asyncio.run(run())
+    assert batch_llm.peak == 2
+    assert sorted(result.index for result in results) == list(range(6))
+    failed = [result for result in results if result.error]
+    assert [result.profile_id for result in failed] == ["fail"]
+    succeeded = [result for result in results if result.result]
+    assert len(succeeded) == 5
+    assert all(
+        item.product_url.startswith("https://shop.example.co.uk/")
+        for result in succeeded
+        for item in result.result.recommendations
+    )
+    # Every profile got the same two items: two searches for the whole batch
+    assert server.requests == 2
+
+
+def test_batch_route_streams_ndjson_and_enforces_limit(batch_llm, batch_request):
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(batch_llm)
+
+    async def run():
+        requests = [batch_request(f"p{i}", web_search_enabled=False).model_dump(mode="json") for i in range(3)]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            ok = await http.post("/recommend/batch", json={"requests": requests})
+            too_big = await http.post("/recommend/batch", json={"requests": requests * 200})
+        return ok, too_big
+
+    try:
+        ok, too_big = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+
+    assert ok.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in ok.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all(len(line["result"]["recommendations"]) == 2 for line in lines)
+    assert too_big.status_code == 413
@@ -0,0 +1,75 @@
+"""
+Tests for the recommendation response cache.
+"""
+
+import asyncio
+
+from app.api.schemas.recommendations import Gender, Profile
+from app.core.services.cache import ResponseCache
+from app.core.services.recommendation import RecommendationService
+
+
+def test_equivalent_requests_share_a_key(fake_llm, make_request):
+    service = RecommendationService(fake_llm())
+    a = make_request(
+        profile=Profile(profile_id="p1", age=30, gender=Gender.FEMALE, relationship="Sister"),
+        upcoming_event="Birthday",
+        profile_interests=["Books", "art"],
+    )
+    b = make_request(profile_id="p2", upcoming_event="  birthday ", profile_interests=["ART", "books", "Books"])
+    assert service.cache_key(a) == service.cache_key(b)
+    assert service.cache_key(a) != service.cache_key(a.model_copy(update={"upcoming_event": "Christmas"}))
+
+
+def test_cache_hit_bypass_and_profile_id(fake_llm, make_request):
+    async def run():
+        llm = fake_llm()
+        service = RecommendationService(llm, cache=ResponseCache())
+        first = await service.generate_recommendations(make_request(count=1))
+        second = await service.generate_recommendations(make_request(count=1, profile_id="p2"))
+        assert llm.calls == 1
+        assert second.profile_id == "p2"
+        assert second.recommendations == first.recommendations
+
+        await service.generate_recommendations(make_request(count=1, use_cache=False))
+        assert llm.calls == 2
+        return service.cache.stats()
+
+    stats = asyncio.run(run())
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_stale_while_revalidate_and_expiry(clock):
+    async def run():
+        cache = ResponseCache(ttl_s=10, stale_ttl_s=20, clock=clock)
+        calls = []
+
+        async def compute():
+            calls.append(clock.now)
+            return len(calls)
+
+        assert await cache.get_or_compute("k", compute) == 1
+        clock.now = 15  # stale: served immediately, refreshed once in the background
+        assert await cache.get_or_compute("k", compute) == 1
+        assert await cache.get_or_compute("k", compute) == 1
+        await asyncio.sleep(0)
+        assert len(calls) == 2
+        assert await cache.get_or_compute("k", compute) == 2
+        clock.now = 100  # past the stale window: a plain miss
+        assert await cache.get_or_compute("k", compute) == 3
+        return cache.stats()
+
+    stats = asyncio.run(run())
+    assert stats["stale_hits"] == 2
+    assert stats["misses"] == 2
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get_entry("a").value == 1
+    cache.set("c", 3)
+    assert cache.get_entry("b") is None
+    assert cache.get_entry("a") is not None
+    assert cache.evictions == 1
@@ -0,0 +1,69 @@
+"""
+Tests for the fast/strong model cascade and the recommendation validator.
+"""
+
+import asyncio
+
+import pytest
+
+from app.api.schemas.recommendations import GeneralRecommendationItem
+from app.core.services.recommendation import CascadeStats, RecommendationService
+from app.core.services.validation import validate_recommendations
+
+
+@pytest.fixture
+def run_cascade(fake_llm, make_item, make_request):
+    """Run one request through a flash -> pro cascade whose fast tier answers with `fast_output`."""
+    def run(fast_output, request=None):
+        fast = fake_llm([fast_output], model="flash", provider="gemini")
+        strong = fake_llm([[make_item(1), make_item(2)]], model="pro", provider="gemini")
+        stats = CascadeStats()
+        service = RecommendationService(strong, fast_client=fast, cascade_stats=stats)
+        response = asyncio.run(service.generate_recommendations(request or make_request(count=2)))
+        return fast, strong, stats, response
+
+    return run
+
+
+def test_valid_fast_output_is_used(run_cascade, make_item):
+    fast, strong, stats, response = run_cascade([make_item(1), make_item(2)])
+    assert (fast.calls, strong.calls) == (1, 0)
+    assert len(response.recommendations) == 2
+    assert stats.stats()["escalation_rate"] == 0.0
+
+
+def test_invalid_fast_output_escalates(run_cascade, make_item):
+    # Same store twice (by base domain) and an out-of-range score
+    fast, strong, stats, response = run_cascade([make_item(1), make_item(2, store="www.store1.co.uk", relevance_score=7)])
+    assert (fast.calls, strong.calls) == (1, 1)
+    assert [item.store for item in response.recommendations] == ["store1.co.uk", "store2.co.uk"]
+    summary = stats.stats()
+    assert summary["escalations"] == 1
+    assert summary["tiers"]["fast"]["calls"] == summary["tiers"]["strong"]["calls"] == 1
+
+
+def test_fast_tier_error_escalates(run_cascade):
+    fast, strong, stats, response = run_cascade(Exception("fast tier 503"))
+    assert (fast.calls, strong.calls) == (1, 1)
+    assert len(response.recommendations) == 2
+    assert stats.escalations == 1
+
+
+def test_high_value_goes_straight_to_strong_model(run_cascade, make_item, make_request):
+    fast, strong, stats, _ = run_cascade([make_item(1), make_item(2)], request=make_request(count=2, high_value=True))
+    assert (fast.calls, strong.calls) == (0, 1)
+    assert stats.high_value == 1
+
+
+def test_validator_reports_each_problem(make_item):
+    items = [
+        GeneralRecommendationItem(**make_item(1, explanation=" ")),
+        GeneralRecommendationItem(**make_item(2, store="store1.co.uk", relevance_score=-0.1)),
+    ]
+    problems = validate_recommendations(items, expected_count=3)
+    assert problems == [
+        "expected 3 items, got 2",
+        "item 0: missing explanation",
+        "item 1: duplicate store store1.co.uk",
+        "item 1: relevance_score -0.1 out of range",
+    ]
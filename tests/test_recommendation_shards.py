@@ -0,0 +1,81 @@
+"""
+Tests for splitting large recommendation requests into parallel shards.
+"""
+
+import asyncio
+import re
+import time
+
+import pytest
+
+from app.core.services.llm.base import LLMClient
+from app.core.services.recommendation import RecommendationService, plan_shards
+from app.settings.settings import LLMSettings
+
+
+@pytest.fixture
+def shard_request(make_request):
+    """A request whose three interests are dealt out across the shards."""
+    return lambda count: make_request(count, profile_interests=["books", "hiking", "baking"])
+
+
+def _service(client: LLMClient, **settings) -> RecommendationService:
+    return RecommendationService(client, settings=LLMSettings(_env_file=None, **settings))
+
+
+def test_plan_splits_count_and_interests_disjointly():
+    plan = plan_shards(["books", "hiking", "baking"], count=7, shards=2)
+    assert [size for size, _ in plan] == [4, 3]
+    assert plan[0][1][:2] == ["books", "baking"] and plan[1][1][:1] == ["hiking"]
+    assert plan[0][1][-1] != plan[1][1][-1]
+
+
+def test_shards_run_in_parallel_and_merge_by_relevance(fake_llm, make_item, shard_request):
+    client = fake_llm([
+        [make_item(1, 0.5), make_item(2, 0.9), make_item(3, 0.6)],
+        [make_item(4, 0.8), make_item(5, 0.7), make_item(6, 0.95)],
+    ], delay=0.05)
+    start = time.perf_counter()
+    response = asyncio.run(_service(client).generate_recommendations(shard_request(6)))
+    elapsed = time.perf_counter() - start
+
+    assert len(client.prompts) == 2
+    assert elapsed < 0.09  # both shards at once, not one after the other
+    # Three items each plus one spare for the merge
+    assert all(re.search(r"length = 4\b", prompt) for prompt in client.prompts)
+    assert "- focus: books; baking" in client.prompts[0] and "- focus: hiking" in client.prompts[1]
+    assert [item.relevance_score for item in response.recommendations] == [0.95, 0.9, 0.8, 0.7, 0.6, 0.5]
+
+
+def test_spare_items_cover_clashing_stores(fake_llm, make_item, shard_request):
+    client = fake_llm([
+        [make_item(1, 0.9), make_item(2, 0.8), make_item(3, 0.7), make_item(4, 0.3)],
+        [make_item(5, 0.9, store="www.store1.co.uk"), make_item(6, 0.6), make_item(7, 0.5), make_item(8, 0.2)],
+    ])
+    response = asyncio.run(_service(client).generate_recommendations(shard_request(6)))
+
+    stores = [item.store for item in response.recommendations]
+    assert len(client.prompts) == 2  # no serial top-up
+    assert stores == ["store1.co.uk", "store2.co.uk", "store3.co.uk", "store6.co.uk", "store7.co.uk", "store4.co.uk"]
+
+
+def test_clashing_stores_without_spares_are_topped_up(fake_llm, make_item, shard_request):
+    client = fake_llm([
+        [make_item(1, 0.9), make_item(2, 0.8), make_item(3, 0.7)],
+        [make_item(4, 0.9, store="www.store1.co.uk"), make_item(5, 0.6), make_item(6, 0.5)],
+        # Top-up for the one missing item
+        [make_item(7, 0.4)],
+    ])
+    response = asyncio.run(_service(client, recommendation_shard_spares=0).generate_recommendations(shard_request(6)))
+
+    stores = [item.store for item in response.recommendations]
+    assert len(stores) == 6 and len(set(stores)) == 6
+    assert "store7.co.uk" in stores
+    assert "store1.co.uk" in client.prompts[2]  # used stores are excluded from the top-up
+
+
+def test_small_requests_are_not_sharded(fake_llm, make_item, shard_request):
+    client = fake_llm([[make_item(i, 0.9) for i in range(1, 6)]])
+    response = asyncio.run(_service(client).generate_recommendations(shard_request(5)))
+    assert len(client.prompts) == 1
+    assert len(response.recommendations) == 5
@@ -0,0 +1,110 @@
+"""
+Tests for streaming recommendations (service events and the /recommend/stream route).
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.api.controllers.routes import get_recommendation_service
+from app.asgi import app
+from app.core.services.cache import ResponseCache
+from app.core.services.json_stream import JsonArrayStream
+from app.core.services.llm.base import LLMClient
+from app.core.services.recommendation import RecommendationService
+
+ITEM_DELAY = 0.1
+
+
+class StreamingLLMClient(LLMClient):
+    """Streams a fenced JSON array of `items` one item at a time, ITEM_DELAY apart."""
+
+    model = "fake-model"
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    async def generate(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        raise AssertionError("streaming should not call generate")
+
+    async def generate_stream(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        yield "```json\n["
+        for i, item in enumerate(self.items):
+            await asyncio.sleep(ITEM_DELAY)
+            text = json.dumps(item) + ("," if i < len(self.items) - 1 else "")
+            # Split mid-object to exercise the incremental splitter
+            yield text[:10]
+            yield text[10:]
+        yield "]\n```"
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+
+def test_json_array_stream_handles_split_chunks():
+    text = 'Here you go: [{"a": "}]\\""}, {"b": [1, {"c": 2}]}]'
+    parser = JsonArrayStream()
+    elements = []
+    for char in text:
+        elements += parser.feed(char)
+    assert [json.loads(e) for e in elements] == [{"a": '}]"'}, {"b": [1, {"c": 2}]}]
+    assert parser.closed
+
+
+def test_first_item_arrives_before_generation_ends(make_item, make_request):
+    async def run():
+        llm = StreamingLLMClient([make_item(i) for i in range(3)])
+        service = RecommendationService(llm, cache=ResponseCache())
+        start = time.perf_counter()
+        events = []
+        async for event in service.stream_recommendations(make_request()):
+            events.append((event, time.perf_counter() - start))
+        return service, events
+
+    service, events = asyncio.run(run())
+    names = [event["event"] for event, _ in events]
+    assert names == ["recommendation"] * 3 + ["done"]
+    first_at, done_at = events[0][1], events[-1][1]
+    assert first_at < ITEM_DELAY * 2
+    assert done_at >= ITEM_DELAY * 3
+    assert events[-1][0]["data"]["count"] == 3
+
+    # The streamed result was cached: a replay does not call the LLM again
+    async def replay():
+        return [event async for event in service.stream_recommendations(make_request())]
+
+    replayed = asyncio.run(replay())
+    assert service.llm_client.calls == 1
+    assert len(replayed) == 4
+
+
+def test_stream_route_emits_sse_and_ndjson(make_item, make_request):
+    llm_client = StreamingLLMClient([make_item(i) for i in range(2)])
+    app.dependency_overrides[get_recommendation_service] = lambda: RecommendationService(llm_client)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            sse = await http.post("/recommend/stream", json=make_request(count=2).model_dump(mode="json"))
+            ndjson = await http.post(
+                "/recommend/stream",
+                json=make_request(count=2).model_dump(mode="json"),
+                headers={"Accept": "application/x-ndjson"},
+            )
+        return sse, ndjson
+
+    try:
+        sse, ndjson = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_recommendation_service, None)
+
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    assert sse.text.count("event: recommendation") == 2
+    assert "event: done" in sse.text
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["event"] for line in lines] == ["recommendation", "recommendation", "done"]
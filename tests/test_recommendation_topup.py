@@ -0,0 +1,31 @@
+"""
+Tests for topping up under-delivered recommendation generations.
+"""
+
+import asyncio
+
+from app.core.services.recommendation import RecommendationService
+
+
+def test_malformed_item_dropped_and_topped_up(fake_llm, make_item, make_request):
+    malformed = {"product": "No store"}
+    llm = fake_llm([
+        [make_item(1), malformed, make_item(2)],
+        # The top-up repeats a used store once; it is skipped in favour of the new one
+        [make_item(2), make_item(3)],
+    ])
+    response = asyncio.run(RecommendationService(llm).generate_recommendations(make_request()))
+
+    assert [r.store for r in response.recommendations] == ["store1.co.uk", "store2.co.uk", "store3.co.uk"]
+    assert len(llm.prompts) == 2
+    assert "store1.co.uk, store2.co.uk" in llm.prompts[1]
+    assert "array with length = 1" in llm.prompts[1]
+
+
+def test_full_regeneration_only_when_nothing_usable(fake_llm, make_item, make_request):
+    llm = fake_llm(["Sorry, I can't do that.", [make_item(1), make_item(2)]])
+    response = asyncio.run(RecommendationService(llm).generate_recommendations(make_request(count=2)))
+
+    assert len(response.recommendations) == 2
+    assert len(llm.prompts) == 2
+    assert "exclusion_list (optional): product URLs or base domains to avoid (may be empty)\n" in llm.prompts[1]
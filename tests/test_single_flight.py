@@ -0,0 +1,49 @@
+"""
+Tests for single-flight coalescing of identical recommendation requests.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.services.recommendation import RecommendationService
+from app.core.services.singleflight import SingleFlight
+
+
+@pytest.fixture
+def llm(fake_llm, make_item):
+    return fake_llm([[make_item(i) for i in range(2)]], delay=0.1)
+
+
+def test_concurrent_duplicates_share_one_generation(llm, make_request):
+    async def run():
+        flights = SingleFlight()
+        service = RecommendationService(llm, single_flight=flights)
+        first, second = await asyncio.gather(
+            service.generate_recommendations(make_request(2, "p1")),
+            service.generate_recommendations(make_request(2, "p2")),
+        )
+        return flights, first, second
+
+    flights, first, second = asyncio.run(run())
+    assert llm.calls == 1
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 1}
+    # Each caller gets its own copy with its own profile_id
+    assert (first.profile_id, second.profile_id) == ("p1", "p2")
+    assert first.recommendations is not second.recommendations
+
+
+def test_cancelled_caller_does_not_cancel_shared_call(llm, make_request):
+    async def run():
+        service = RecommendationService(llm, single_flight=SingleFlight())
+        leaver = asyncio.create_task(service.generate_recommendations(make_request(2)))
+        stayer = asyncio.create_task(service.generate_recommendations(make_request(2)))
+        await asyncio.sleep(llm.delay / 2)
+        leaver.cancel()
+        result = await stayer
+        return leaver, result
+
+    leaver, result = asyncio.run(run())
+    assert leaver.cancelled()
+    assert llm.calls == 1
+    assert len(result.recommendations) == 2
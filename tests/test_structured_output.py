@@ -0,0 +1,133 @@
+"""
+Tests for provider-native structured output.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.core.services.llm.anthropic import RESPONSE_TOOL, ClaudeClient
+from app.core.services.llm.base import LatencyMode
+from app.core.services.llm.google import GeminiClient
+from app.core.services.llm.openai import OpenAIClient
+from app.core.services.prompts.v1 import RESPONSE_KEY, create_recommendation_system, recommendation_response_schema
+from app.core.services.recommendation import RecommendationService
+from app.settings.settings import LLMSettings
+
+ITEMS = [
+    {
+        "product": "Signed First Edition",
+        "type": "product",
+        "category": "books",
+        "explanation": "One for her shelf.",
+        "store": "waterstones.com",
+        "relevance_score": 0.8,
+    },
+    {
+        "product": "Watercolour Masterclass",
+        "type": "experience",
+        "category": "art classes",
+        "explanation": "A relaxed afternoon painting.",
+        "store": "artclasses.co.uk",
+        "relevance_score": 0.9,
+    },
+]
+
+
+def _settings(**overrides) -> LLMSettings:
+    return LLMSettings(
+        claude_api_key="test", openai_api_key="test", google_api_key="test", _env_file=None, **overrides
+    )
+
+
+def test_schema_follows_the_item_model():
+    items = recommendation_response_schema()["properties"][RESPONSE_KEY]["items"]
+    assert items["required"] == ["product", "type", "category", "explanation", "store", "relevance_score"]
+    assert items["properties"]["type"]["enum"] == ["product", "experience"]
+    assert "title" not in items["properties"]["product"]
+
+
+def test_openai_sends_strict_json_schema():
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))], usage=None)
+
+    client = OpenAIClient(_settings())
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    asyncio.run(client.generate("request", response_schema=recommendation_response_schema()))
+
+    response_format = calls[0]["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format["json_schema"]["schema"] == recommendation_response_schema()
+
+
+def test_gemini_sends_supported_schema_subset(monkeypatch):
+    configs = []
+
+    class FakeGenerativeModel:
+        def __init__(self, model_name=None, system_instruction=None):
+            pass
+
+        async def generate_content_async(self, *args, generation_config=None, **kwargs):
+            configs.append(generation_config)
+            return SimpleNamespace(text="{}", usage_metadata=None)
+
+    monkeypatch.setattr("app.core.services.llm.google.genai.GenerativeModel", FakeGenerativeModel)
+    client = GeminiClient(_settings())
+    asyncio.run(client.generate("request", response_schema=recommendation_response_schema()))
+
+    assert configs[0]["response_mime_type"] == "application/json"
+    schema = configs[0]["response_schema"]
+    assert "additionalProperties" not in json.dumps(schema)
+    assert schema["properties"][RESPONSE_KEY]["items"]["properties"]["type"]["enum"] == ["product", "experience"]
+
+
+def test_claude_forces_the_response_tool():
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        block = SimpleNamespace(type="tool_use", name=RESPONSE_TOOL, input={RESPONSE_KEY: ITEMS})
+        return SimpleNamespace(content=[block], usage=None)
+
+    client = ClaudeClient(_settings(claude_model="claude-sonnet-4-20250514"))
+    client.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    schema = recommendation_response_schema()
+    result = asyncio.run(client.generate("request", response_schema=schema))
+
+    assert calls[0]["tools"][0]["input_schema"] == schema
+    assert calls[0]["tool_choice"] == {"type": "tool", "name": RESPONSE_TOOL}
+    assert json.loads(result["text"]) == {RESPONSE_KEY: ITEMS}
+
+    # Thinking calls cannot force a tool, so they fall back to the prompt
+    asyncio.run(client.generate("request", response_schema=schema, latency_mode=LatencyMode.THOROUGH))
+    assert "tool_choice" not in calls[1] and "thinking" in calls[1]
+
+
+def test_service_parses_structured_response(fake_llm, make_request):
+    client = fake_llm([{RESPONSE_KEY: ITEMS}])
+    service = RecommendationService(client, settings=_settings())
+    response = asyncio.run(service.generate_recommendations(make_request(2, profile_interests=["art", "books"])))
+
+    assert client.kwargs[0]["response_schema"] == recommendation_response_schema()
+    assert [item.store for item in response.recommendations] == ["waterstones.com", "artclasses.co.uk"]
+    assert f'"{RESPONSE_KEY}"' in client.kwargs[0]["system"]
+    assert "no wrapper object" not in client.kwargs[0]["system"]
+
+
+def test_prompt_describes_the_wrapper_only_for_structured_object_output():
+    wrapped = create_recommendation_system(structured=True, self_check=True)
+    assert f'Return ONLY a JSON object whose "{RESPONSE_KEY}" key holds the array' in wrapped
+    assert f'{{"{RESPONSE_KEY}": [' in wrapped
+    assert "no wrapper object" not in wrapped and "Return ONLY the JSON object" in wrapped
+
+    for plain in (create_recommendation_system(), create_recommendation_system(compact=True, structured=True)):
+        assert "no wrapper object" in plain and f'"{RESPONSE_KEY}"' not in plain
+
+
+def test_compact_rows_and_disabled_setting_send_no_schema(fake_llm):
+    for settings in (_settings(prompt_schema="compact"), _settings(llm_structured_output=False)):
+        assert RecommendationService(fake_llm(), settings=settings).response_schema is None
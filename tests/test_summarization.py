@@ -0,0 +1,41 @@
+"""
+Tests for the summarization service's LLM call.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.api.schemas.summarization import SummarizationRequest
+from app.core.services.llm.google import THINKING_ALLOWANCE, GeminiClient
+from app.core.services.summarization import SummarizationService
+from app.settings.settings import LLMSettings
+
+
+def _summarise(monkeypatch, model: str):
+    configs = []
+
+    class FakeGenerativeModel:
+        def __init__(self, model_name=None, system_instruction=None):
+            pass
+
+        async def generate_content_async(self, *args, generation_config=None, **kwargs):
+            configs.append(generation_config)
+            return SimpleNamespace(text="A short summary.", usage_metadata=None)
+
+    monkeypatch.setattr("app.core.services.llm.google.genai.GenerativeModel", FakeGenerativeModel)
+    settings = LLMSettings(google_api_key="test", gemini_model=model, _env_file=None)
+    service = SummarizationService(GeminiClient(settings), settings=settings)
+    response = asyncio.run(service.generate_summary(SummarizationRequest(text="Some long text.")))
+    return configs[0], response
+
+
+def test_thinking_model_summary_cap_leaves_room_for_thinking(monkeypatch):
+    # The default max_length of 200 would be spent on thinking alone on Gemini 2.5
+    config, response = _summarise(monkeypatch, "gemini-2.5-pro-preview-03-25")
+    assert config["max_output_tokens"] == 200 + THINKING_ALLOWANCE
+    assert response.summary == "A short summary."
+
+
+def test_non_thinking_model_summary_keeps_requested_cap(monkeypatch):
+    config, _ = _summarise(monkeypatch, "gemini-2.0-flash")
+    assert config["max_output_tokens"] == 200